@@ -1,7 +1,8 @@
-from flask import Flask, render_template, request, jsonify, send_file, flash, redirect, url_for
+from flask import Flask, Blueprint, current_app, g, render_template, request, jsonify, send_file, send_from_directory
 from flask_cors import CORS
 import os
 import json
+import secrets
 import sys
 from werkzeug.utils import secure_filename
 
@@ -9,33 +10,353 @@ from werkzeug.utils import secure_filename
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from config import Config
-from scraper.image_scraper import ImageScraper
-from scraper.video_scraper import VideoScraper
-from scraper.content_scraper import ContentScraper
-from scraper.url_scraper import URLScraper
-from utils.document_generator import DocumentGenerator
-from utils.file_handler import FileHandler
-
-app = Flask(__name__, template_folder='src/templates', static_folder='src/static')
-app.config.from_object(Config)
-CORS(app)
-
-# Ensure upload directory exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-# Initialize scrapers
-image_scraper = ImageScraper()
-video_scraper = VideoScraper()
-content_scraper = ContentScraper()
-url_scraper = URLScraper()
-doc_generator = DocumentGenerator()
-file_handler = FileHandler()
-
-@app.route('/')
+from utils.scraper_registry import ScraperRegistry
+from utils.rate_limiter import configure_default_scheduler
+from utils.circuit_breaker import CircuitOpenError, configure_default_breaker
+from utils.deadline import DeadlineExceeded, check_deadline, reset_deadline, set_deadline
+from utils.warc import configure_warc
+from utils.json_provider import FastJSONProvider
+from utils.compression import ResponseCompressor
+
+main = Blueprint('main', __name__)
+
+def create_app(config_class=Config):
+    """Build a configured Flask application"""
+    app = Flask(__name__, template_folder='src/templates', static_folder='src/static')
+    app.config.from_object(config_class)
+    CORS(app)
+    
+    if app.config['JSON_FAST']:
+        app.json = FastJSONProvider(app)
+    if app.config['COMPRESS_ENABLED']:
+        ResponseCompressor(app)
+    
+    # Ensure upload directory exists
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    
+    configure_default_scheduler(
+        rate=app.config['RATE_LIMIT_PER_HOST'],
+        burst=app.config['RATE_LIMIT_BURST'],
+        max_concurrency=app.config['MAX_CONCURRENCY_PER_HOST'],
+        max_backoff=app.config['MAX_BACKOFF']
+    )
+    configure_default_breaker(
+        failure_threshold=app.config['BREAKER_FAILURE_THRESHOLD'],
+        reset_timeout=app.config['BREAKER_RESET_TIMEOUT'],
+        max_reset_timeout=app.config['BREAKER_MAX_RESET_TIMEOUT']
+    )
+    configure_warc(
+        record_dir=app.config['WARC_RECORD_DIR'],
+        replay=app.config['WARC_REPLAY_PATH'],
+        max_bytes=app.config['WARC_MAX_BYTES'],
+        max_record_bytes=app.config['WARC_MAX_RECORD_BYTES']
+    )
+    
+    # Scrapers hold a requests.Session, so every worker thread gets its own instances.
+    # They are registered by import path and only imported on first use.
+    registry = ScraperRegistry()
+    registry.register('image', 'scraper.image_scraper:ImageScraper',
+                      fetch_stylesheets=app.config['CSS_FETCH_STYLESHEETS'],
+                      css_options={
+                          'max_stylesheets': app.config['CSS_MAX_STYLESHEETS'],
+                          'max_bytes': app.config['CSS_MAX_STYLESHEET_BYTES'],
+                          'cache_ttl': app.config['CSS_CACHE_TTL']
+                      })
+    registry.register('video', 'scraper.video_scraper:VideoScraper')
+    registry.register('content', 'scraper.content_scraper:ContentScraper')
+    registry.register('url', 'scraper.url_scraper:URLScraper')
+    registry.register('fetcher', 'utils.fetcher:Fetcher')
+    registry.register('document', 'utils.document_generator:DocumentGenerator')
+    registry.register('file', 'utils.file_handler:FileHandler')
+    registry.register('thumbnailer', 'utils.thumbnailer:ThumbnailService', shared=True,
+                      cache_folder=app.config['THUMBNAIL_FOLDER'],
+                      max_cache_bytes=app.config['THUMBNAIL_CACHE_BYTES'],
+                      max_workers=app.config['THUMBNAIL_MAX_WORKERS'])
+    registry.register('browser_pool', 'utils.browser_pool:BrowserPool', shared=True,
+                      size=app.config['RENDER_POOL_SIZE'],
+                      page_timeout=app.config['RENDER_PAGE_TIMEOUT'],
+                      max_pages=app.config['RENDER_MAX_PAGES_PER_BROWSER'],
+                      block_images=app.config['RENDER_BLOCK_IMAGES'])
+    registry.register('video_resolver', 'utils.video_resolver:VideoResolver', shared=True,
+                      max_workers=app.config['VIDEO_RESOLVER_WORKERS'],
+                      cache_ttl=app.config['VIDEO_METADATA_TTL'],
+                      fragment_concurrency=app.config['VIDEO_FRAGMENT_CONCURRENCY'],
+                      max_height=app.config['VIDEO_MAX_HEIGHT'])
+    registry.register('near_duplicates', 'utils.near_duplicate:NearDuplicateIndex', shared=True,
+                      max_distance=app.config['NEAR_DUPLICATE_DISTANCE'],
+                      max_entries=app.config['NEAR_DUPLICATE_MAX_ENTRIES'])
+    registry.register('media_probe', 'utils.media_probe:MediaProbe', shared=True,
+                      max_workers=app.config['PROBE_MAX_WORKERS'],
+                      header_bytes=app.config['PROBE_HEADER_BYTES'],
+                      cache_ttl=app.config['PROBE_CACHE_TTL'])
+    registry.register('results_store', 'utils.results_store:ResultsStore', shared=True,
+                      path=app.config['RESULTS_DB_PATH'],
+                      keep_snapshots=app.config['RESULTS_KEEP_SNAPSHOTS'])
+    registry.register('parse_pool', 'utils.parse_pool:ParsePool', shared=True,
+                      max_workers=app.config['PARSE_WORKERS'],
+                      max_tasks_per_child=app.config['PARSE_MAX_TASKS_PER_CHILD'],
+                      max_memory_mb=app.config['PARSE_MAX_MEMORY_MB'],
+                      timeout=app.config['PARSE_TIMEOUT'])
+    registry.register('discovery', 'scraper.site_discovery:SiteDiscovery', shared=True,
+                      max_depth=app.config['DISCOVER_MAX_DEPTH'],
+                      max_sitemaps=app.config['DISCOVER_MAX_SITEMAPS'],
+                      max_workers=app.config['DISCOVER_WORKERS'])
+    registry.register('single_flight', 'utils.single_flight:SingleFlight', shared=True,
+                      grace=app.config['COALESCE_GRACE'],
+                      wait_timeout=app.config['COALESCE_WAIT_TIMEOUT'])
+    registry.register('image_hasher', 'utils.image_hash:ImageHasher', shared=True,
+                      max_workers=app.config['IMAGE_HASH_WORKERS'],
+                      max_bytes=app.config['IMAGE_HASH_MAX_BYTES'],
+                      cache_ttl=app.config['IMAGE_HASH_CACHE_TTL'])
+    registry.register('image_quality', 'utils.image_quality:ImageQualityAnalyzer', shared=True,
+                      max_workers=app.config['IMAGE_QUALITY_WORKERS'],
+                      max_bytes=app.config['IMAGE_QUALITY_MAX_BYTES'],
+                      cache_ttl=app.config['IMAGE_QUALITY_CACHE_TTL'])
+    registry.register('work_queue', 'utils.work_queue:open_queue', shared=True,
+                      url=app.config['QUEUE_URL'])
+    registry.register('result_pages', 'utils.cache:TTLCache', shared=True,
+                      max_entries=app.config['RESULT_CACHE_ENTRIES'],
+                      ttl=app.config['RESULT_CACHE_TTL'])
+    app.extensions['scrapers'] = registry
+    
+    app.register_blueprint(main)
+    return app
+
+def get_scraper(name):
+    """Return the current thread's scraper instance for the running app"""
+    return current_app.extensions['scrapers'].get(name)
+
+def request_budget():
+    """Seconds the current API request may run: its endpoint's deadline, or less if the client asks"""
+    config = current_app.config
+    budget = {
+        'main.download_item': config['DOWNLOAD_DEADLINE'],
+        'main.discover': config['DISCOVER_DEADLINE']
+    }.get(request.endpoint, config['REQUEST_DEADLINE'])
+    
+    data = request.get_json(silent=True) if request.is_json else None
+    requested = data.get('deadline') if isinstance(data, dict) else None
+    try:
+        requested = float(requested if requested is not None else request.args.get('deadline', 0))
+    except (TypeError, ValueError):
+        requested = 0
+    if requested > 0:
+        budget = min(budget, requested) if budget else requested
+    return budget or None
+
+@main.before_request
+def start_deadline():
+    """Start the request's deadline; every fetch and wait below it is clamped to what is left"""
+    budget = request_budget()
+    if budget:
+        g.deadline_token = set_deadline(budget)
+
+@main.teardown_request
+def end_deadline(error=None):
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        reset_deadline(token)
+
+def error_status(error):
+    """HTTP status for a failed request: 504 past the deadline, 503 for a host cut off by the circuit breaker"""
+    # Scrapers re-raise failures as plain Exceptions; the original is kept in the chain
+    while error is not None:
+        if isinstance(error, DeadlineExceeded):
+            return 504
+        if isinstance(error, CircuitOpenError):
+            return 503
+        error = error.__cause__ or error.__context__
+    return 500
+
+@main.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/scrape', methods=['POST'])
+SCRAPE_TYPES = ('images_videos', 'content', 'urls')
+
+# /scrape options that change the scrape result; requests that differ only in
+# response shaping (fields, page_size) can share one scrape
+SCRAPE_OPTIONS = ('render', 'resolve_videos', 'probe', 'filters', 'dedupe')
+
+def run_scrape(url, scrape_type, options=None):
+    """Run the scrapers for one /scrape request and build the response payload"""
+    options = options or {}
+    # Render mode hands the browser-rendered DOM to the normal extractors
+    html = render_page(url) if options.get('render') else None
+    
+    if scrape_type == 'images_videos':
+        parsed = extract(url, ['images', 'videos'], html)
+        images, videos = parsed['images'], parsed['videos']
+        if options.get('resolve_videos'):
+            get_scraper('video_resolver').resolve_items(videos)
+        if options.get('probe'):
+            images, videos = probe_media(images, videos, options.get('filters') or {})
+        if options.get('dedupe'):
+            images = dedupe_images(images)
+        return {
+            'type': 'images_videos',
+            'images': images,
+            'videos': videos,
+            'url': url
+        }
+    elif scrape_type == 'content':
+        content = extract(url, ['content'], html)['content']
+        flag_near_duplicate(content)
+        return {
+            'type': 'content',
+            'content': content,
+            'url': url
+        }
+    else:
+        urls = extract(url, ['urls'], html)['urls']
+        return {
+            'type': 'urls',
+            'urls': urls,
+            'url': url
+        }
+
+# Extractor kind -> (registered scraper, method)
+EXTRACTORS = {
+    'images': ('image', 'scrape_images'),
+    'videos': ('video', 'scrape_videos'),
+    'content': ('content', 'scrape_content'),
+    'urls': ('url', 'scrape_urls')
+}
+
+def extract(url, kinds, html=None):
+    """Run the extractors for kinds on one page and return {kind: result}
+    
+    With PARSE_WORKERS set the page is fetched and decoded once in this thread
+    and parsed in the process pool, in parallel across kinds; otherwise each
+    scraper fetches and parses the page in this thread.
+    """
+    if not current_app.config.get('PARSE_WORKERS'):
+        parsed = {}
+        for kind in kinds:
+            check_deadline()
+            parsed[kind] = getattr(get_scraper(EXTRACTORS[kind][0]), EXTRACTORS[kind][1])(url, html)
+        return parsed
+    
+    if html is None:
+        html = fetch_page(url)
+    parsed = dict(zip(kinds, get_scraper('parse_pool').parse_many([(kind, url, html) for kind in kinds])))
+    if 'images' in parsed:
+        # Stylesheets are fetched here, through this process's rate limiter and CSS cache
+        images, stylesheet_links = parsed['images']
+        parsed['images'] = get_scraper('image').add_stylesheet_images(images, stylesheet_links)
+    return parsed
+
+def fetch_page(url):
+    """Fetch a page and return its decoded HTML"""
+    from utils.charset import decode_response
+    try:
+        response = get_scraper('fetcher').get(url, timeout=30)
+        response.raise_for_status()
+        return decode_response(response)
+    except Exception as e:
+        raise Exception(f"Error fetching page: {str(e)}")
+
+def flag_near_duplicate(content):
+    """Fingerprint scraped content and mark it if an earlier page is nearly identical"""
+    from utils.near_duplicate import flag_near_duplicate as flag
+    if not current_app.config.get('NEAR_DUPLICATE_ENABLED'):
+        return content
+    return flag(get_scraper('near_duplicates'), content)
+
+def render_page(url):
+    """Render a JavaScript-heavy page in the pooled headless browser"""
+    if not current_app.config.get('RENDER_ENABLED'):
+        raise Exception("Render mode is disabled on this server")
+    return get_scraper('browser_pool').render(url)
+
+def probe_media(images, videos, filters):
+    """Attach size, MIME type and real dimensions, then apply the requested filters"""
+    from utils.media_probe import filter_probed
+    media_probe = get_scraper('media_probe')
+    media_probe.probe_items(images)
+    media_probe.probe_items(videos, read_dimensions=False)
+    return filter_probed(images, filters), filter_probed(videos, filters)
+
+def dedupe_images(images):
+    """Perceptually hash images and collapse copies of the same picture under other URLs, sizes or formats"""
+    from utils.image_hash import collapse_duplicates
+    get_scraper('image_hasher').hash_items(images)
+    return collapse_duplicates(images, current_app.config['IMAGE_DUPLICATE_DISTANCE'])
+
+def score_images(images, settings):
+    """Measure image quality; best first with "auto_quality", and below "min_quality" (0-100) dropped"""
+    from utils.image_quality import rank_by_quality
+    get_scraper('image_quality').score_items(images)
+    min_quality = settings.get('min_quality')
+    if min_quality is None and not settings.get('auto_quality'):
+        return images
+    return rank_by_quality(images, None if min_quality is None else float(min_quality))
+
+def coalesced_scrape(url, scrape_type, options):
+    """Run and store a scrape, sharing one in-flight run between identical concurrent requests"""
+    if not current_app.config.get('COALESCE_ENABLED'):
+        return scrape_and_save(url, scrape_type, options)
+    
+    settings = json.dumps({name: options.get(name) for name in SCRAPE_OPTIONS}, sort_keys=True)
+    results = get_scraper('single_flight').do((url, scrape_type, settings), scrape_and_save, url, scrape_type, options)
+    # Each request gets its own top-level dict so per-response keys never leak between requests
+    return dict(results)
+
+def scrape_and_save(url, scrape_type, options):
+    results = run_scrape(url, scrape_type, options)
+    save_result(url, scrape_type, results)
+    return results
+
+def stored_result(url, scrape_type, max_age):
+    """Return the stored result for url if the store has one newer than max_age seconds"""
+    if max_age is None or not current_app.config.get('RESULTS_STORE_ENABLED'):
+        return None
+    stored = get_scraper('results_store').latest(url, scrape_type, float(max_age))
+    if stored is not None:
+        stored['from_store'] = True
+    return stored
+
+def save_result(url, scrape_type, results):
+    """Keep a /scrape result in the results store; a store failure never fails the scrape"""
+    if not current_app.config.get('RESULTS_STORE_ENABLED'):
+        return
+    try:
+        results['result_id'] = get_scraper('results_store').save(url, scrape_type, results)
+    except Exception as e:
+        current_app.logger.warning(str(e))
+
+def shape_response(results, options):
+    """Apply the request's field selection and page size to a /scrape result
+
+    When arrays are cut to page_size the full result is cached (and is also
+    in the results store), and the response lists a cursor per cut array.
+    """
+    from utils.response_shaper import paginate, parse_fields, select_fields
+    
+    fields = options.get('fields')
+    tree = parse_fields(fields)
+    shaped = select_fields(results, tree) if tree else results
+    
+    page_size = options.get('page_size')
+    if not page_size:
+        return shaped
+    
+    token = f"r{results['result_id']}" if results.get('result_id') else f"t{secrets.token_urlsafe(12)}"
+    fields = fields.split(',') if isinstance(fields, str) else fields
+    shaped, pages = paginate(shaped, max(1, int(page_size)), token, fields)
+    if pages:
+        get_scraper('result_pages').set(token, results)
+        shaped['pages'] = pages
+    return shaped
+
+def profiling_requested(data):
+    """Check whether this request asked to be profiled and profiling is allowed"""
+    if not current_app.config.get('PROFILING_ENABLED'):
+        return False
+    header = request.headers.get('X-Scrape-Profile', '').lower()
+    return bool(data.get('profile')) or header in ('1', 'true', 'yes')
+
+@main.route('/scrape', methods=['POST'])
 def scrape():
     try:
         data = request.get_json()
@@ -45,40 +366,268 @@ def scrape():
         if not url or not scrape_type:
             return jsonify({'error': 'URL and scrape type are required'}), 400
         
-        results = {}
+        if scrape_type not in SCRAPE_TYPES:
+            return jsonify({'error': 'Invalid scrape type'}), 400
         
-        if scrape_type == 'images_videos':
-            images = image_scraper.scrape_images(url)
-            videos = video_scraper.scrape_videos(url)
-            results = {
-                'type': 'images_videos',
-                'images': images,
-                'videos': videos,
-                'url': url
-            }
-        elif scrape_type == 'content':
-            content = content_scraper.scrape_content(url)
-            results = {
-                'type': 'content',
-                'content': content,
-                'url': url
-            }
-        elif scrape_type == 'urls':
-            urls = url_scraper.scrape_urls(url)
-            results = {
-                'type': 'urls',
-                'urls': urls,
-                'url': url
-            }
+        if data.get('filters') is not None:
+            from utils.media_probe import parse_filters
+            try:
+                data['filters'] = parse_filters(data['filters'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        if data.get('page_size') is not None:
+            try:
+                if isinstance(data['page_size'], bool):
+                    raise TypeError
+                data['page_size'] = int(data['page_size'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'page_size must be an integer'}), 400
+        
+        # A client that accepts a recent result is answered without refetching
+        stored = stored_result(url, scrape_type, data.get('max_age'))
+        if stored is not None:
+            return jsonify(shape_response(stored, data))
+        
+        if profiling_requested(data):
+            from utils.profiler import ScrapeProfiler
+            profiler = ScrapeProfiler(current_app.config['PROFILE_FOLDER'], current_app.config['PROFILE_SAMPLE_INTERVAL'])
+            results, report = profiler.profile(run_scrape, url, scrape_type, data)
+            save_result(url, scrape_type, results)
+            results['profile'] = report
         else:
+            results = coalesced_scrape(url, scrape_type, data)
+        
+        return jsonify(shape_response(results, data))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), error_status(e)
+
+@main.route('/scrape/page')
+def scrape_page():
+    """Next page of an array cut by page_size on /scrape"""
+    from utils.response_shaper import decode_cursor, page_of
+    
+    cursor = request.args.get('cursor', '')
+    try:
+        token = decode_cursor(cursor)[0]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    cache = get_scraper('result_pages')
+    results = cache.get(token)
+    if results is None and token.startswith('r') and token[1:].isdigit() and current_app.config.get('RESULTS_STORE_ENABLED'):
+        # Another worker process served the first page; fall back to the stored copy
+        results = get_scraper('results_store').snapshot(int(token[1:]))
+        if results is not None:
+            cache.set(token, results)
+    if results is None:
+        return jsonify({'error': 'Cursor expired, scrape the page again'}), 410
+    
+    try:
+        return jsonify(page_of(results, cursor))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@main.route('/discover', methods=['POST'])
+def discover():
+    """List a site's pages from robots.txt and its sitemaps, newest first, optionally scraping them"""
+    try:
+        data = request.get_json()
+        url = data.get('url')
+        scrape_type = data.get('scrape_type')
+        
+        if not url:
+            return jsonify({'error': 'URL is required'}), 400
+        
+        if scrape_type and scrape_type not in SCRAPE_TYPES:
             return jsonify({'error': 'Invalid scrape type'}), 400
         
-        return jsonify(results)
+        since = data.get('since')
+        if isinstance(since, str):
+            from scraper.site_discovery import parse_lastmod
+            since = parse_lastmod(since)
+        max_urls = min(int(data.get('max_urls') or current_app.config['DISCOVER_MAX_URLS']),
+                       current_app.config['DISCOVER_MAX_URLS'])
+        
+        results = get_scraper('discovery').discover(url, max_urls=max_urls, since=since,
+                                                    same_host=data.get('same_host', True),
+                                                    sitemaps=data.get('sitemaps'))
+        if scrape_type:
+            limit = min(int(data.get('scrape_limit') or current_app.config['DISCOVER_SCRAPE_LIMIT']),
+                        current_app.config['DISCOVER_SCRAPE_LIMIT'])
+            results['scraped'] = scrape_batch([entry['url'] for entry in results['urls'][:limit]], scrape_type)
+        
+        return jsonify(shape_response(results, data))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), error_status(e)
+
+def scrape_batch(urls, scrape_type):
+    """Scrape urls through the per-host fair scheduler; results go to the results store
+    
+    Returns one {'url', 'result_id'} or {'url', 'error'} per URL, in input order.
+    """
+    from utils.rate_limiter import get_default_scheduler
+    
+    app = current_app._get_current_object()
+    
+    def scrape_one(page_url):
+        with app.app_context():
+            return coalesced_scrape(page_url, scrape_type, {}).get('result_id')
+    
+    outcomes = {}
+    for page_url, result_id, error in get_default_scheduler().run_batch(
+            scrape_one, urls, max_workers=current_app.config['DISCOVER_SCRAPE_WORKERS']):
+        outcomes[page_url] = {'url': page_url, 'error': str(error)} if error else {'url': page_url, 'result_id': result_id}
+    return [outcomes[page_url] for page_url in urls if page_url in outcomes]
+
+@main.route('/batches', methods=['POST'])
+def submit_batch():
+    """Queue URLs for the cluster workers (python cluster.py work) to scrape"""
+    try:
+        from utils.cluster import Coordinator
+        
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'A JSON object is required'}), 400
+        urls = data.get('urls')
+        scrape_type = data.get('type', 'content')
+        
+        if not urls or not isinstance(urls, list):
+            return jsonify({'error': 'A list of URLs is required'}), 400
+        if not all(isinstance(url, str) and url.strip() for url in urls):
+            return jsonify({'error': 'Every URL must be a non-empty string'}), 400
+        
+        if scrape_type not in SCRAPE_TYPES:
+            return jsonify({'error': 'Invalid scrape type'}), 400
+        
+        max_attempts = data.get('max_attempts')
+        if max_attempts is None:
+            max_attempts = current_app.config['QUEUE_MAX_ATTEMPTS']
+        elif isinstance(max_attempts, bool) or not isinstance(max_attempts, int) or max_attempts < 1:
+            return jsonify({'error': 'max_attempts must be a positive integer'}), 400
+        submitted = Coordinator(get_scraper('work_queue')).submit(urls, scrape_type, max_attempts=max_attempts)
+        return jsonify(submitted), 202
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), error_status(e)
+
+@main.route('/batches/<batch>')
+def batch_status(batch):
+    """Task counts of a queued batch; ?state=failed lists its failed tasks"""
+    queue = get_scraper('work_queue')
+    status = queue.batch_status(batch)
+    if status['total'] == 0:
+        return jsonify({'error': 'Batch not found'}), 404
+    state = request.args.get('state')
+    if state:
+        status['tasks'] = queue.tasks(batch, state=state, after=request.args.get('cursor', 0, type=int),
+                                      limit=page_size())
+    return jsonify(status)
+
+@main.route('/profiles/<path:filename>')
+def download_profile(filename):
+    """Download a stored .pstats or .collapsed profile"""
+    if not current_app.config.get('PROFILING_ENABLED'):
+        return jsonify({'error': 'Profiling is disabled'}), 404
+    if not filename.endswith(('.pstats', '.collapsed')):
+        return jsonify({'error': 'Invalid profile file'}), 400
+    return send_from_directory(os.path.abspath(current_app.config['PROFILE_FOLDER']), secure_filename(filename), as_attachment=True)
+
+def results_store():
+    if not current_app.config.get('RESULTS_STORE_ENABLED'):
+        return None
+    return get_scraper('results_store')
+
+def page_size():
+    """The requested page size, clamped to RESULTS_MAX_PAGE_SIZE"""
+    limit = request.args.get('limit', current_app.config['RESULTS_PAGE_SIZE'], type=int)
+    return max(1, min(limit, current_app.config['RESULTS_MAX_PAGE_SIZE']))
+
+@main.route('/results')
+def list_results():
+    """Stored scrapes, newest first; ?url= lists the fetch history of one page"""
+    store = results_store()
+    if store is None:
+        return jsonify({'error': 'Results store is disabled'}), 404
+    return jsonify(store.pages(host=request.args.get('host'), scrape_type=request.args.get('type'),
+                               url=request.args.get('url'), limit=page_size(),
+                               cursor=request.args.get('cursor', type=int)))
+
+@main.route('/results/<int:result_id>')
+def get_result(result_id):
+    """One stored /scrape payload"""
+    store = results_store()
+    if store is None:
+        return jsonify({'error': 'Results store is disabled'}), 404
+    result = store.snapshot(result_id)
+    if result is None:
+        return jsonify({'error': 'Result not found'}), 404
+    return jsonify(result)
+
+@main.route('/results/links')
+def stored_links():
+    """Stored links, filterable by host, category and file_type (e.g. every PDF on a site)"""
+    store = results_store()
+    if store is None:
+        return jsonify({'error': 'Results store is disabled'}), 404
+    return jsonify(store.links(host=request.args.get('host'), category=request.args.get('category'),
+                               file_type=request.args.get('file_type'), limit=page_size(),
+                               cursor=request.args.get('cursor', type=int)))
+
+@main.route('/results/media')
+def stored_media():
+    """Stored images and videos, filterable by host and kind"""
+    store = results_store()
+    if store is None:
+        return jsonify({'error': 'Results store is disabled'}), 404
+    return jsonify(store.media(host=request.args.get('host'), kind=request.args.get('kind'),
+                               limit=page_size(), cursor=request.args.get('cursor', type=int)))
+
+@main.route('/results/media/similar')
+def similar_media():
+    """Stored images that look like ?url= (fetched and hashed) or ?hash= (a 16-digit pHash)"""
+    store = results_store()
+    if store is None:
+        return jsonify({'error': 'Results store is disabled'}), 404
+    
+    phash = request.args.get('hash')
+    if not phash:
+        url = request.args.get('url')
+        if not url:
+            return jsonify({'error': 'URL or hash is required'}), 400
+        hashed = get_scraper('image_hasher').hash_url(url)
+        if 'hash_error' in hashed:
+            return jsonify({'error': hashed['hash_error']}), 502
+        phash = hashed['phash']
     
+    try:
+        int(phash, 16)
+    except ValueError:
+        return jsonify({'error': 'Invalid hash'}), 400
+    max_distance = min(request.args.get('max_distance', current_app.config['IMAGE_SIMILAR_DISTANCE'], type=int), 32)
+    return jsonify({
+        'hash': phash,
+        'items': store.similar_media(phash, max_distance=max_distance, host=request.args.get('host'), limit=page_size())
+    })
+
+@main.route('/results/search')
+def search_results():
+    """Full-text search over stored paragraphs"""
+    store = results_store()
+    if store is None:
+        return jsonify({'error': 'Results store is disabled'}), 404
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Query is required'}), 400
+    try:
+        return jsonify(store.search(query, host=request.args.get('host'), limit=page_size(),
+                                    offset=request.args.get('offset', 0, type=int)))
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'error': str(e)}), 400
 
-@app.route('/download', methods=['POST'])
+@main.route('/download', methods=['POST'])
 def download_item():
     try:
         data = request.get_json()
@@ -89,11 +638,12 @@ def download_item():
             return jsonify({'error': 'URL is required'}), 400
             
         if item_type == 'image':
-            filename = file_handler.download_image(url)
+            filename = get_scraper('file').download_image(url)
             return send_file(filename, as_attachment=True)
             
         elif item_type == 'video':
-            filename = file_handler.download_video(url)
+            filename = get_scraper('file').download_video(url, resolver=get_scraper('video_resolver'),
+                                                          format_id=data.get('format_id'))
             return send_file(filename, as_attachment=True)
             
         elif item_type == 'content':
@@ -104,24 +654,72 @@ def download_item():
             except:
                 content_data = {'full_text': content_json, 'title': 'Scraped Content'}
             
-            filename = doc_generator.create_document(content_data)
+            filename = get_scraper('document').create_document(content_data)
             return send_file(filename, as_attachment=True, download_name='scraped_content.docx')
             
         else:
             return jsonify({'error': 'Invalid item type'}), 400
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'error': str(e)}), error_status(e)
 
-@app.route('/preview')
+@main.route('/thumbnail')
+def thumbnail():
+    """Serve a cached, downscaled preview of a scraped image"""
+    url = request.args.get('url')
+    if not url:
+        return jsonify({'error': 'URL is required'}), 400
+    
+    try:
+        size = int(request.args.get('size', 320))
+    except ValueError:
+        return jsonify({'error': 'Invalid size'}), 400
+    
+    # Prefer WebP unless the client asked for a format or cannot display WebP
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+    
+    try:
+        path, mimetype, etag = get_scraper('thumbnailer').get_thumbnail(url, size, fmt)
+    except Exception as e:
+        status = error_status(e)
+        return jsonify({'error': str(e)}), 502 if status == 500 else status
+    
+    response = send_file(os.path.abspath(path), mimetype=mimetype, etag=etag,
+                         max_age=current_app.config['THUMBNAIL_MAX_AGE'], conditional=True)
+    response.cache_control.public = True
+    response.vary.add('Accept')
+    return response
+
+@main.route('/resolve-video', methods=['POST'])
+def resolve_video():
+    """Return the formats available for a YouTube/Vimeo/... page or embed URL"""
+    try:
+        data = request.get_json()
+        url = data.get('url')
+        
+        if not url:
+            return jsonify({'error': 'URL is required'}), 400
+        
+        resolver = get_scraper('video_resolver')
+        if not resolver.is_supported(url):
+            return jsonify({'error': 'Unsupported video platform'}), 400
+        
+        return jsonify(resolver.resolve(url))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), error_status(e)
+
+@main.route('/preview')
 def preview():
     return render_template('preview.html')
 
-@app.route('/premium')
+@main.route('/premium')
 def premium():
     return render_template('premium.html')
 
-@app.route('/premium-scrape', methods=['POST'])
+@main.route('/premium-scrape', methods=['POST'])
 def premium_scrape():
     try:
         data = request.get_json()
@@ -131,40 +729,43 @@ def premium_scrape():
         
         if not url or not scrape_type:
             return jsonify({'error': 'URL and scrape type are required'}), 400
+        if not isinstance(settings, dict):
+            return jsonify({'error': 'settings must be an object'}), 400
+        if settings.get('min_quality') is not None:
+            try:
+                float(settings['min_quality'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'min_quality must be a number from 0 to 100'}), 400
         
         results = {}
         
         if scrape_type == 'premium_images':
             # Enhanced image scraping with AI features
-            images = image_scraper.scrape_images(url)
-            # Simulate premium features
+            images = get_scraper('image').scrape_images(url)
             enhanced_images = []
             for img in images:
                 enhanced_img = img.copy()
                 enhanced_img['premium'] = True
-                enhanced_img['ai_enhanced'] = settings.get('ai_enhancement', False)
-                enhanced_img['quality_score'] = 95 if settings.get('auto_quality', False) else 85
-                enhanced_img['format_optimized'] = settings.get('auto_quality', False)
                 enhanced_images.append(enhanced_img)
+            ranked = score_images(enhanced_images, settings)
             
             results = {
                 'type': 'premium_images',
-                'images': enhanced_images,
+                'images': ranked,
                 'url': url,
                 'settings': settings,
                 'total_found': len(enhanced_images),
+                'total_returned': len(ranked),
                 'premium_features_applied': True
             }
             
         elif scrape_type == 'premium_videos':
             # Enhanced video scraping with premium features
-            videos = video_scraper.scrape_videos(url)
+            videos = get_scraper('video').scrape_videos(url)
             enhanced_videos = []
             for video in videos:
                 enhanced_video = video.copy()
                 enhanced_video['premium'] = True
-                enhanced_video['ai_enhanced'] = settings.get('ai_enhancement', False)
-                enhanced_video['quality_score'] = 98 if settings.get('auto_quality', False) else 80
                 enhanced_video['cloud_backup'] = settings.get('cloud_backup', False)
                 enhanced_videos.append(enhanced_video)
             
@@ -178,11 +779,31 @@ def premium_scrape():
             }
             
         elif scrape_type == 'bulk_download':
-            # Bulk download with premium capabilities
-            images = image_scraper.scrape_images(url)
-            videos = video_scraper.scrape_videos(url)
-            content = content_scraper.scrape_content(url)
-            urls = url_scraper.scrape_urls(url)
+            # Bulk download with premium capabilities; the page is fetched once for all four extractors
+            page = fetch_page(url)
+            content = flag_near_duplicate(extract(url, ['content'], page)['content'])
+            
+            # Near-duplicate pages (pagination, print views, tracking variants) skip
+            # the expensive media work when the client asks for it
+            if content.get('near_duplicate_of') and settings.get('skip_near_duplicates'):
+                return jsonify({
+                    'type': 'bulk_download',
+                    'content': content,
+                    'url': url,
+                    'settings': settings,
+                    'skipped': True,
+                    'near_duplicate_of': content['near_duplicate_of'],
+                    'premium_features_applied': True,
+                    'bulk_ready': False
+                })
+            
+            parsed = extract(url, ['images', 'videos', 'urls'], page)
+            images, videos, urls = parsed['images'], parsed['videos'], parsed['urls']
+            if settings.get('dedupe_images'):
+                # Download each picture once, not once per size or format variant
+                images = dedupe_images(images)
+            if settings.get('auto_quality') or settings.get('min_quality') is not None:
+                images = score_images(images, settings)
             
             results = {
                 'type': 'bulk_download',
@@ -202,7 +823,8 @@ def premium_scrape():
         return jsonify(results)
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'error': str(e)}), error_status(e)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only - use wsgi.py with gunicorn in production
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Perceptual hashing and similar-image lookup benchmark
+Decodes and hashes synthetic JPEGs (decode + resize per image, then one
+batched DCT for all of them) and reports images per second for each step.
+Then indexes random 64-bit hashes in a multi-index hash table and compares
+near-duplicate queries against a linear Hamming-distance scan.
+
+Usage:
+    python benchmarks/image_hash_benchmark.py [--images 300] [--hashes 200000] [--radius 8]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from io import BytesIO
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import numpy as np
+from PIL import Image
+
+from utils.image_hash import HashIndex, hash_pixels, load_pixels
+from utils.near_duplicate import hamming_distance
+
+
+def synthetic_jpegs(count, seed):
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        base = Image.fromarray(rng.integers(0, 256, (6, 8, 3), dtype=np.uint8))
+        buffer = BytesIO()
+        base.resize((1024, 768), Image.Resampling.BICUBIC).save(buffer, 'JPEG', quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=300)
+    parser.add_argument('--hashes', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--radius', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    images = synthetic_jpegs(args.images, args.seed)
+    started = time.perf_counter()
+    decoded = [load_pixels(data) for data in images]
+    decode_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    hash_pixels(decoded)
+    hash_seconds = time.perf_counter() - started
+    print(f"decode 1024x768 JPEG: {args.images / decode_seconds:10.0f} images/s")
+    print(f"batched hashing:      {args.images / hash_seconds:10.0f} images/s")
+
+    rng = random.Random(args.seed)
+    values = [rng.getrandbits(64) for _ in range(args.hashes)]
+    started = time.perf_counter()
+    index = HashIndex()
+    for position, value in enumerate(values):
+        index.add(value, position)
+    print(f"hash index build:     {args.hashes / (time.perf_counter() - started):10.0f} hashes/s")
+
+    queries = [value ^ (1 << rng.randrange(64)) for value in rng.sample(values, args.queries)]
+    started = time.perf_counter()
+    index_hits = [len(index.search(query, args.radius)) for query in queries]
+    index_seconds = (time.perf_counter() - started) / args.queries
+    started = time.perf_counter()
+    scan_hits = [sum(1 for value in values if hamming_distance(query, value) <= args.radius) for query in queries]
+    scan_seconds = (time.perf_counter() - started) / args.queries
+    assert index_hits == scan_hits
+    print(f"radius-{args.radius} query over {args.hashes} hashes: hash index {index_seconds * 1000:.2f} ms, "
+          f"linear scan {scan_seconds * 1000:.2f} ms ({scan_seconds / index_seconds:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
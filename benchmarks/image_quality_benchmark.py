@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Image quality scoring benchmark
+Times the decode (full JPEG decode, 256x256 thumbnail and centre crop) and
+the NumPy metrics (Laplacian variance, blockiness) separately, then scores
+the same images through thread pools of increasing size, which is how
+ImageQualityAnalyzer runs them. Reports images per second.
+
+Usage:
+    python benchmarks/image_quality_benchmark.py [--images 128] [--size 1600x1200]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import numpy as np
+from PIL import Image
+
+from utils.image_quality import load_analysis, score_analysis, score_image
+
+
+def synthetic_jpegs(count, size, seed):
+    rng = np.random.default_rng(seed)
+    images = []
+    for i in range(count):
+        base = Image.fromarray(rng.integers(0, 256, (9, 12, 3), dtype=np.uint8))
+        buffer = BytesIO()
+        base.resize(size, Image.Resampling.BICUBIC).save(buffer, 'JPEG', quality=30 + i % 70)
+        images.append(buffer.getvalue())
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=128)
+    parser.add_argument('--size', default='1600x1200')
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+    size = tuple(int(part) for part in args.size.split('x'))
+    images = synthetic_jpegs(args.images, size, args.seed)
+
+    started = time.perf_counter()
+    analyses = [load_analysis(data) for data in images]
+    print(f"decode {args.size}:  {args.images / (time.perf_counter() - started):8.0f} images/s")
+    started = time.perf_counter()
+    for analysis in analyses:
+        score_analysis(analysis)
+    print(f"metrics:             {args.images / (time.perf_counter() - started):8.0f} images/s")
+
+    for workers in (1, 2, 4, 8):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            started = time.perf_counter()
+            list(pool.map(score_image, images))
+            print(f"scored, {workers} threads:  {args.images / (time.perf_counter() - started):8.0f} images/s")
+
+
+if __name__ == '__main__':
+    main()
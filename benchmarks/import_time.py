@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark
+Measures import time, peak memory and loaded module count for a fresh
+interpreter that builds the app, compared with eagerly importing every
+scraper and utility the way app.py used to.
+
+Usage:
+    python benchmarks/import_time.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'create_app (lazy)': "import app; app.create_app()",
+    'first /scrape?type=urls': (
+        "import app; a = app.create_app()\n"
+        "with a.app_context(): app.get_scraper('url')"
+    ),
+    'eager imports (old behaviour)': (
+        "import app; app.create_app()\n"
+        "import scraper.image_scraper, scraper.video_scraper, scraper.content_scraper, "
+        "scraper.url_scraper, utils.document_generator, utils.file_handler, utils.profiler"
+    ),
+}
+
+MEASURE = """
+import resource, sys, time
+started = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - started
+print(__import__('json').dumps({{
+    'seconds': elapsed,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+}}))
+"""
+
+
+def measure(code):
+    """Run code in a fresh interpreter and return its timing and memory stats"""
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE.format(code=code)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold-start import cost')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<32}{'import ms':>12}{'max RSS MB':>12}{'modules':>10}")
+    for name, code in SCENARIOS.items():
+        runs = [measure(code) for _ in range(args.runs)]
+        seconds = statistics.median(run['seconds'] for run in runs)
+        rss = statistics.median(run['max_rss_kb'] for run in runs) / 1024
+        modules = runs[-1]['modules']
+        print(f"{name:<32}{seconds * 1000:>12.1f}{rss:>12.1f}{modules:>10}")
+
+
+if __name__ == '__main__':
+    main()
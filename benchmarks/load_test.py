@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Load test for the production serving modes
+Starts a local target site, launches gunicorn once per worker setting and
+reports requests per second against /scrape.
+
+Usage:
+    python benchmarks/load_test.py                      # default settings matrix
+    python benchmarks/load_test.py --settings 1x1:sync 4x8:gthread
+    python benchmarks/load_test.py --server http://127.0.0.1:5000   # existing server
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SETTINGS = ['1x1:sync', '4x1:sync', '2x4:gthread', '4x8:gthread']
+
+TARGET_PAGE = ("<html><head><title>Load test</title></head><body><main>"
+               + "".join(f"<p>Paragraph {i} with enough words to be kept by the scraper.</p>"
+                         f"<a href='/page/{i}'>Link {i}</a><img src='/img/{i}.jpg' alt='img {i}'>"
+                         for i in range(200))
+               + "</main></body></html>").encode('utf-8')
+
+
+class TargetHandler(BaseHTTPRequestHandler):
+    """Serve the same synthetic page for every path"""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(TARGET_PAGE)))
+        self.end_headers()
+        self.wfile.write(TARGET_PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_target_server():
+    """Start the synthetic target site in a background thread"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TargetHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def run_load(server_url, target_url, scrape_type, concurrency, duration):
+    """Hammer /scrape for duration seconds and return (requests, errors, rps)"""
+    deadline = time.perf_counter() + duration
+    counts = {'ok': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def client():
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            try:
+                response = session.post(f"{server_url}/scrape",
+                                        json={'url': target_url, 'type': scrape_type},
+                                        timeout=60)
+                key = 'ok' if response.status_code == 200 else 'errors'
+            except requests.RequestException:
+                key = 'errors'
+            with lock:
+                counts[key] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client)
+    elapsed = time.perf_counter() - started
+    return counts['ok'], counts['errors'], counts['ok'] / elapsed
+
+
+def wait_for_server(server_url, timeout=30):
+    """Block until the server answers or timeout expires"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(server_url, timeout=2)
+            return True
+        except requests.RequestException:
+            time.sleep(0.25)
+    return False
+
+
+def launch_gunicorn(setting, port):
+    """Start gunicorn for a 'WORKERSxTHREADS:CLASS' setting"""
+    counts, worker_class = setting.split(':')
+    workers, threads = counts.split('x')
+    env = dict(os.environ,
+               SCRAPER_BIND=f"127.0.0.1:{port}",
+               SCRAPER_WORKERS=workers,
+               SCRAPER_THREADS=threads,
+               SCRAPER_WORKER_CLASS=worker_class)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test /scrape at several worker settings')
+    parser.add_argument('--settings', nargs='+', default=DEFAULT_SETTINGS,
+                        help="worker settings as WORKERSxTHREADS:CLASS")
+    parser.add_argument('--server', help='test an already running server instead of launching gunicorn')
+    parser.add_argument('--type', default='urls', choices=['urls', 'content', 'images_videos'])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    target, target_url = start_target_server()
+    print(f"Target site: {target_url}  scrape type: {args.type}  "
+          f"concurrency: {args.concurrency}  duration: {args.duration}s\n")
+    print(f"{'setting':<16}{'requests':>10}{'errors':>8}{'req/s':>10}")
+
+    try:
+        if args.server:
+            ok, errors, rps = run_load(args.server, target_url, args.type, args.concurrency, args.duration)
+            print(f"{'external':<16}{ok:>10}{errors:>8}{rps:>10.1f}")
+            return
+
+        for setting in args.settings:
+            process = launch_gunicorn(setting, args.port)
+            server_url = f"http://127.0.0.1:{args.port}"
+            try:
+                if not wait_for_server(server_url):
+                    print(f"{setting:<16}{'server did not start':>28}")
+                    continue
+                ok, errors, rps = run_load(server_url, target_url, args.type, args.concurrency, args.duration)
+                print(f"{setting:<16}{ok:>10}{errors:>8}{rps:>10.1f}")
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        target.shutdown()
+
+
+if __name__ == '__main__':
+    main()
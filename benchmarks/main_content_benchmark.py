@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Main-content extraction benchmark
+Compares the old main/article heuristic with MainContentExtractor for speed
+and token-level F1 against gold text.
+
+The corpus is a directory of page.html files with matching page.txt gold
+text. Without --corpus a synthetic corpus of article pages wrapped in menus,
+cookie banners, sidebars and footers is generated.
+
+Usage:
+    python benchmarks/main_content_benchmark.py [--corpus DIR] [--pages 200]
+"""
+
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from bs4 import BeautifulSoup
+
+from scraper.content_scraper import ContentScraper
+from scraper.main_content import MainContentExtractor
+
+WORDS = ("performance scraper content article network parser latency memory extraction "
+         "document browser server request response cache thread process queue page text").split()
+
+
+def sentence(rng, words=14):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + ', ' + \
+        ' '.join(rng.choice(WORDS) for _ in range(6)) + '.'
+
+
+def synthetic_page(rng):
+    """Build one page with boilerplate around a known article body"""
+    paragraphs = [' '.join(sentence(rng) for _ in range(rng.randint(2, 5))) for _ in range(rng.randint(4, 12))]
+    menu = ''.join(f"<li><a href='/section/{i}'>Section {rng.choice(WORDS)} {i}</a></li>" for i in range(25))
+    related = ''.join(f"<li><a href='/story/{i}'>{sentence(rng, 6)}</a></li>" for i in range(10))
+    html = f"""<html><head><title>Synthetic</title></head><body>
+      <div class="top-menu"><ul>{menu}</ul></div>
+      <div class="cookie-banner"><p>We use cookies to improve your experience on our website, by continuing you accept them.</p></div>
+      <div class="layout">
+        <div class="{rng.choice(['story-body', 'col-md-8', 'entry', 'c-7f2a'])}">{''.join(f'<p>{p}</p>' for p in paragraphs)}</div>
+        <div class="sidebar"><h3>Related stories</h3><ul>{related}</ul></div>
+      </div>
+      <div class="site-foot"><p>Copyright 2024 Example Media Group, all rights reserved worldwide.</p>
+      <ul>{menu}</ul></div>
+    </body></html>"""
+    return html, ' '.join(paragraphs)
+
+
+def load_corpus(directory, pages, seed):
+    if directory:
+        corpus = []
+        for html_path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+            gold_path = os.path.splitext(html_path)[0] + '.txt'
+            if os.path.exists(gold_path):
+                with open(html_path, 'rb') as f, open(gold_path, encoding='utf-8') as g:
+                    corpus.append((f.read(), g.read()))
+        return corpus
+
+    rng = random.Random(seed)
+    return [tuple(part.encode('utf-8') if i == 0 else part for i, part in enumerate(synthetic_page(rng)))
+            for _ in range(pages)]
+
+
+def f1(predicted, gold):
+    predicted, gold = Counter(predicted.lower().split()), Counter(gold.lower().split())
+    overlap = sum((predicted & gold).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(predicted.values())
+    recall = overlap / sum(gold.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark main-content extraction')
+    parser.add_argument('--corpus', help='directory of .html pages with .txt gold text')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.pages, args.seed)
+    if not corpus:
+        print('No pages found')
+        return
+
+    scraper = ContentScraper()
+    extractor = MainContentExtractor()
+
+    def old_heuristic(html):
+        soup = BeautifulSoup(html, 'html.parser')
+        for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+            tag.decompose()
+        return scraper._extract_clean_text(soup)
+
+    methods = {
+        'old main/article heuristic': old_heuristic,
+        'MainContentExtractor': extractor.extract,
+    }
+
+    print(f"{len(corpus)} pages\n")
+    print(f"{'method':<30}{'ms/page':>10}{'mean F1':>10}{'chars/page':>12}")
+    for name, method in methods.items():
+        scores, chars = [], 0
+        started = time.perf_counter()
+        outputs = [method(html) for html, gold in corpus]
+        elapsed = time.perf_counter() - started
+        for output, (html, gold) in zip(outputs, corpus):
+            scores.append(f1(output, gold))
+            chars += len(output)
+        print(f"{name:<30}{elapsed / len(corpus) * 1000:>10.2f}{sum(scores) / len(scores):>10.3f}"
+              f"{chars // len(corpus):>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate index throughput benchmark
+Fingerprints and indexes N synthetic pages (a fraction of them lightly edited
+copies) and reports pages per second and detection rate.
+
+Usage:
+    python benchmarks/near_duplicate_benchmark.py [--pages 100000] [--words 300]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from utils.near_duplicate import NearDuplicateIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark near-duplicate detection')
+    parser.add_argument('--pages', type=int, default=100000)
+    parser.add_argument('--words', type=int, default=300)
+    parser.add_argument('--duplicate-rate', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = [f"w{i}" for i in range(20000)]
+    index = NearDuplicateIndex()
+    originals = []
+    planted = detected = false_positives = 0
+    elapsed = 0.0
+
+    for page in range(args.pages):
+        if originals and rng.random() < args.duplicate_rate:
+            planted += 1
+            source_id, words = rng.choice(originals)
+            words = list(words)
+            words[rng.randrange(len(words))] = 'edited'
+            text = ' '.join(words)
+            started = time.perf_counter()
+            _, duplicate_of = index.check(f'dup-{page}', text)
+            elapsed += time.perf_counter() - started
+            detected += duplicate_of is not None
+        else:
+            words = [rng.choice(vocabulary) for _ in range(args.words)]
+            text = ' '.join(words)
+            started = time.perf_counter()
+            _, duplicate_of = index.check(f'page-{page}', text)
+            elapsed += time.perf_counter() - started
+            false_positives += duplicate_of is not None
+            if len(originals) < 1000:
+                originals.append((f'page-{page}', words))
+
+    print(f"pages: {args.pages}  words/page: {args.words}  indexed: {len(index)}")
+    print(f"throughput: {args.pages / elapsed:,.0f} pages/s ({elapsed:.1f}s in fingerprint + index)")
+    print(f"planted duplicates detected: {detected}/{planted}  false positives: {false_positives}")
+
+
+if __name__ == '__main__':
+    main()
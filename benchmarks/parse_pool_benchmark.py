@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Parse throughput benchmark: threads vs the ParsePool worker processes
+Parses the same set of synthetic link/content/media-heavy pages with every
+extractor, once with N threads calling the scrapers directly (GIL-bound) and
+once through ParsePool with N worker processes, and reports pages per second.
+
+Usage:
+    python benchmarks/parse_pool_benchmark.py [--pages 64] [--workers 1,2,4,8]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from response_encoding_benchmark import synthetic_page
+from scraper.content_scraper import ContentScraper
+from scraper.image_scraper import ImageScraper
+from scraper.url_scraper import URLScraper
+from scraper.video_scraper import VideoScraper
+from utils.parse_pool import ParsePool
+
+KINDS = ['images', 'videos', 'content', 'urls']
+
+
+def parse_in_thread(url, html):
+    ImageScraper(fetch_stylesheets=False).scrape_images(url, html)
+    VideoScraper().scrape_videos(url, html)
+    ContentScraper().scrape_content(url, html)
+    URLScraper().scrape_urls(url, html)
+
+
+def run_threads(pages, workers):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda page: parse_in_thread(*page), pages))
+    return time.perf_counter() - started
+
+
+def run_pool(pages, workers):
+    pool = ParsePool(max_workers=workers)
+    # Warm the workers up so process start-up is not counted
+    pool.parse_many([(kind, pages[0][0], pages[0][1]) for kind in KINDS] * workers)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers * 2) as executor:
+        list(executor.map(lambda page: pool.parse_many([(kind, page[0], page[1]) for kind in KINDS]), pages))
+    elapsed = time.perf_counter() - started
+    pool.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=64)
+    parser.add_argument('--workers', default=f"1,2,4,{os.cpu_count() or 1}")
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = [(f'https://example.com/page/{i}', synthetic_page(rng, 600, 80, 60).encode('utf-8'))
+             for i in range(args.pages)]
+    workers_list = sorted({int(w) for w in args.workers.split(',')})
+
+    print(f"pages: {args.pages}  avg size: {sum(len(p[1]) for p in pages) / len(pages) / 1024:.0f} KB  "
+          f"cores: {os.cpu_count()}\n")
+    print(f"{'workers':>7} {'threads pages/s':>16} {'pool pages/s':>13} {'speed-up':>9}")
+    for workers in workers_list:
+        threads = args.pages / run_threads(pages, workers)
+        pool = args.pages / run_pool(pages, workers)
+        print(f"{workers:>7} {threads:16.1f} {pool:13.1f} {pool / threads:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
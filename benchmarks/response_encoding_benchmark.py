@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Response encoding benchmark
+Measures JSON encoding time (Flask's stdlib provider vs FastJSONProvider with
+orjson) and the size and CPU cost of gzip and brotli compression for /scrape
+and /premium-scrape payloads.
+
+Payloads come from running the real scrapers on synthetic link-, content- and
+media-heavy pages (no network), so their shape matches what the endpoints send.
+
+Usage:
+    python benchmarks/response_encoding_benchmark.py [--links 3000] [--paragraphs 400] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from scraper.content_scraper import ContentScraper
+from scraper.image_scraper import ImageScraper
+from scraper.url_scraper import URLScraper
+from scraper.video_scraper import VideoScraper
+from utils.compression import brotli, compress
+from utils.json_provider import FastJSONProvider, orjson
+
+WORDS = ("performance scraper content article network parser latency memory extraction "
+         "document browser server request response cache thread process queue page text").split()
+PAGE_URL = 'https://example.com/catalogue/index.html'
+
+
+def synthetic_page(rng, links, paragraphs, images):
+    text = lambda n: ' '.join(rng.choice(WORDS) for _ in range(n))
+    anchors = []
+    for i in range(links):
+        href = rng.choice([f'/products/{i}?ref=nav', f'https://partner{i % 40}.com/item/{i}',
+                           f'/files/report-{i}.pdf', f'mailto:sales{i}@example.com', f'https://twitter.com/u{i}'])
+        anchors.append(f"<a href='{href}' title='{text(3)}'>{text(4)}</a>")
+    body = ''.join(f'<p>{text(rng.randint(30, 80))}.</p>' for _ in range(paragraphs))
+    gallery = ''.join(f"<img src='/img/{i}.jpg' srcset='/img/{i}-2x.jpg 2x' alt='{text(5)}' width='640' height='480'>"
+                      for i in range(images))
+    videos = ''.join(f"<video src='/media/clip{i}.mp4' controls></video>" for i in range(images // 20))
+    return f"""<html><head><title>{text(6)}</title><meta name="description" content="{text(20)}"></head>
+      <body><nav>{''.join(anchors[:50])}</nav><article><h1>{text(6)}</h1>{body}
+      <ul>{''.join(f'<li>{text(8)}</li>' for _ in range(60))}</ul></article>
+      <div class="gallery">{gallery}{videos}</div><footer>{''.join(anchors[50:])}</footer></body></html>"""
+
+
+def build_payloads(args):
+    html = synthetic_page(random.Random(args.seed), args.links, args.paragraphs, args.images)
+    images = ImageScraper(fetch_stylesheets=False).scrape_images(PAGE_URL, html)
+    videos = VideoScraper().scrape_videos(PAGE_URL, html)
+    content = ContentScraper().scrape_content(PAGE_URL, html)
+    urls = URLScraper().scrape_urls(PAGE_URL, html)
+    return {
+        '/scrape images_videos': {'type': 'images_videos', 'images': images, 'videos': videos, 'url': PAGE_URL},
+        '/scrape content': {'type': 'content', 'content': content, 'url': PAGE_URL},
+        '/scrape urls': {'type': 'urls', 'urls': urls, 'url': PAGE_URL},
+        '/premium-scrape bulk_download': {
+            'type': 'bulk_download', 'images': images, 'videos': videos, 'content': content, 'urls': urls,
+            'url': PAGE_URL, 'settings': {}, 'total_items': len(images) + len(videos) + len(urls),
+            'premium_features_applied': True, 'bulk_ready': True
+        }
+    }
+
+
+def timed(func, repeat):
+    """Best-of-repeat wall time in milliseconds and the last result"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--links', type=int, default=3000)
+    parser.add_argument('--paragraphs', type=int, default=400)
+    parser.add_argument('--images', type=int, default=400)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    stdlib_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+
+    print(f"orjson: {'installed' if orjson else 'missing'}  brotli: {'installed' if brotli else 'missing'}\n")
+    print(f"{'payload':32} {'stdlib ms':>9} {'orjson ms':>9} {'raw KB':>8} {'gzip KB':>8} {'gzip ms':>8} "
+          f"{'br KB':>7} {'br ms':>6}")
+
+    with app.app_context():
+        for name, payload in build_payloads(args).items():
+            stdlib_ms, _ = timed(lambda: stdlib_provider.response(payload).get_data(), args.repeat)
+            fast_ms, body = timed(lambda: fast_provider.response(payload).get_data(), args.repeat)
+            gzip_ms, gzipped = timed(lambda: compress(body, 'gzip'), args.repeat)
+            row = (f"{name:32} {stdlib_ms:9.1f} {fast_ms:9.1f} {len(body) / 1024:8.0f} "
+                   f"{len(gzipped) / 1024:8.0f} {gzip_ms:8.1f}")
+            if brotli is not None:
+                br_ms, brotlied = timed(lambda: compress(body, 'br'), args.repeat)
+                row += f" {len(brotlied) / 1024:7.0f} {br_ms:6.1f}"
+            print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Sitemap discovery benchmark
+Generates a sitemap index of gzipped 50,000-URL sitemaps, serves it locally and
+times SiteDiscovery on it, reporting URLs per second. A second, traced pass
+reports the peak Python heap used while stream-parsing (tracemalloc slows the
+parser several times over, so it is kept out of the timed run).
+
+Usage:
+    python benchmarks/sitemap_benchmark.py [--sitemaps 4] [--urls-per-sitemap 50000] [--max-urls 1000]
+"""
+
+import argparse
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'src'))
+sys.path.append(ROOT)
+
+from test_media_probe import serve_directory
+from scraper.site_discovery import SiteDiscovery
+from utils.rate_limiter import configure_default_scheduler
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def build_site(directory, base, sitemaps, urls_per_sitemap, seed):
+    rng = random.Random(seed)
+    index = []
+    for i in range(sitemaps):
+        name = f'sitemap-{i}.xml.gz'
+        index.append(f'<sitemap><loc>{base}/{name}</loc></sitemap>')
+        with gzip.open(os.path.join(directory, name), 'wt', encoding='utf-8') as f:
+            f.write(f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>')
+            for j in range(urls_per_sitemap):
+                lastmod = f'20{rng.randint(15, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+                f.write(f'<url><loc>{base}/section-{i}/article-{j}.html</loc><lastmod>{lastmod}</lastmod>'
+                        f'<changefreq>weekly</changefreq><priority>0.5</priority></url>')
+            f.write('</urlset>')
+    with open(os.path.join(directory, 'sitemap_index.xml'), 'w') as f:
+        f.write(f'<sitemapindex {NS}>{"".join(index)}</sitemapindex>')
+    with open(os.path.join(directory, 'robots.txt'), 'w') as f:
+        f.write(f'User-agent: *\nDisallow: /section-0/article-1\nSitemap: {base}/sitemap_index.xml\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sitemaps', type=int, default=4)
+    parser.add_argument('--urls-per-sitemap', type=int, default=50000)
+    parser.add_argument('--max-urls', type=int, default=1000, help='newest URLs kept (0 keeps all)')
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    # Local server: take politeness limits out of the measurement
+    configure_default_scheduler(rate=1000.0, burst=1000, max_concurrency=16)
+
+    with tempfile.TemporaryDirectory() as directory:
+        server, base = serve_directory(directory)
+        build_site(directory, base, args.sitemaps, args.urls_per_sitemap, args.seed)
+        total_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+        started = time.perf_counter()
+        result = SiteDiscovery().discover(base + '/', max_urls=args.max_urls or None)
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        SiteDiscovery().discover(base + '/', max_urls=args.max_urls or None)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        server.shutdown()
+
+    print(f"sitemaps: {len(result['sitemaps'])}  compressed size: {total_bytes / 1024 / 1024:.1f} MB")
+    print(f"urls found: {result['total']:,}  kept: {len(result['urls']):,}  errors: {len(result['errors'])}")
+    print(f"time: {elapsed:.2f}s  ({result['total'] / elapsed:,.0f} URLs/s)  peak heap: {peak / 1024 / 1024:.1f} MB")
+    if result['urls']:
+        print(f"newest: {result['urls'][0]['lastmod']}  oldest kept: {result['urls'][-1]['lastmod']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Scrape benchmark against recorded traffic
+Runs the content, URL, image and video scrapers over every page in a WARC
+archive with fetches replayed from disk, and reports pages per second per
+scraper. Point --archive at files recorded with SCRAPER_WARC_RECORD to
+benchmark (or regression-test) extractor changes on real captured sites.
+Without --archive, synthetic pages are served locally and recorded first, and
+the live (recording) pass is timed for comparison.
+
+Usage:
+    python benchmarks/warc_replay_benchmark.py [--archive downloads/warc] [--pages 40]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_encoding_benchmark import synthetic_page
+from test_media_probe import serve_directory
+from scraper.content_scraper import ContentScraper
+from scraper.image_scraper import ImageScraper
+from scraper.url_scraper import URLScraper
+from scraper.video_scraper import VideoScraper
+from utils.rate_limiter import configure_default_scheduler
+from utils.warc import WarcArchive, configure_warc
+
+SCRAPERS = {
+    'content': lambda: ContentScraper().scrape_content,
+    'urls': lambda: URLScraper().scrape_urls,
+    'images': lambda: ImageScraper(fetch_stylesheets=False).scrape_images,
+    'videos': lambda: VideoScraper().scrape_videos
+}
+
+
+def run_scrapers(urls):
+    """Scrape every URL with every scraper; returns {name: (seconds, failures)}"""
+    timings = {}
+    for name, factory in SCRAPERS.items():
+        scrape = factory()
+        failures = 0
+        started = time.perf_counter()
+        for url in urls:
+            try:
+                scrape(url)
+            except Exception:
+                failures += 1
+        timings[name] = (time.perf_counter() - started, failures)
+    return timings
+
+
+def record_synthetic_site(archive_dir, pages, seed):
+    rng = random.Random(seed)
+    site = tempfile.mkdtemp()
+    for i in range(pages):
+        with open(os.path.join(site, f'page-{i}.html'), 'w', encoding='utf-8') as f:
+            f.write(synthetic_page(rng, 600, 80, 60))
+    server, base = serve_directory(site)
+    urls = [f'{base}/page-{i}.html' for i in range(pages)]
+    try:
+        configure_warc(record_dir=archive_dir)
+        timings = run_scrapers(urls)
+    finally:
+        configure_warc()
+        server.shutdown()
+    return timings
+
+
+def report(label, timings, pages):
+    for name, (seconds, failures) in timings.items():
+        print(f"{label:>7} {name:>8}: {pages / seconds:8.1f} pages/s  ({failures} failed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--archive', help='WARC file or directory to replay')
+    parser.add_argument('--pages', type=int, default=40, help='synthetic pages when no archive is given')
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    archive_path = args.archive
+    if not archive_path:
+        # Local server: take politeness limits out of the live measurement
+        configure_default_scheduler(rate=1000.0, burst=1000, max_concurrency=16)
+        archive_path = tempfile.mkdtemp()
+        report('live', record_synthetic_site(archive_path, args.pages, args.seed), args.pages)
+
+    started = time.perf_counter()
+    archive = WarcArchive(archive_path)
+    print(f"indexed {len(archive)} responses from {len(archive.files)} files "
+          f"in {time.perf_counter() - started:.2f}s")
+
+    urls = archive.urls()
+    try:
+        configure_warc(replay=archive_path)
+        report('replay', run_scrapers(urls), len(urls))
+    finally:
+        configure_warc()
+
+
+if __name__ == '__main__':
+    main()
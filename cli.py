@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Command-line batch runner
+Reads URLs, one per line, from a file or stdin and scrapes them concurrently.
+As each page finishes, one JSON line is written to stdout (or --output), with
+"index" (its position in the input), "url", "elapsed" and either one key per
+extractor or "error". Progress and throughput go to stderr. Input is read
+lazily and results are written as they arrive, so memory stays flat for
+lists of any length. Per-host rate limits come from config.Config.
+
+Usage:
+    python cli.py urls.txt --extract content,urls --concurrency 32 -o results.jsonl
+    cat urls.txt | python cli.py --extract images,videos | jq .url
+    python cli.py sites.txt --discover --max-urls 5000 --extract content
+"""
+
+import argparse
+import os
+import signal
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from config import Config
+from utils.batch_runner import KINDS, PageScraper, Progress, dumps_line, read_urls, run_unordered
+from utils.circuit_breaker import configure_default_breaker
+from utils.rate_limiter import configure_default_scheduler
+from utils.warc import configure_warc
+
+
+def discovered_urls(sites, max_urls, stream):
+    """Expand site URLs into the page URLs their sitemaps list, one site at a time"""
+    from scraper.site_discovery import SiteDiscovery
+
+    discovery = SiteDiscovery(max_depth=Config.DISCOVER_MAX_DEPTH, max_sitemaps=Config.DISCOVER_MAX_SITEMAPS,
+                              max_workers=Config.DISCOVER_WORKERS)
+    for site in sites:
+        try:
+            found = discovery.discover(site, max_urls=max_urls)
+        except Exception as e:
+            stream.write(f"{site}: discovery failed: {e}\n")
+            continue
+        stream.write(f"{site}: {len(found['urls']):,} URLs from {len(found['sitemaps'])} sitemaps\n")
+        for entry in found['urls']:
+            yield entry['url']
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', nargs='?', default='-', help="file of URLs, or - for stdin (default)")
+    parser.add_argument('-o', '--output', help='write JSON lines here instead of stdout')
+    parser.add_argument('-e', '--extract', default='content',
+                        help=f"comma-separated extractors: {', '.join(KINDS)} (default: content)")
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help='pages fetched at once (default: 16)')
+    parser.add_argument('--parse-workers', type=int, default=Config.PARSE_WORKERS,
+                        help='parse in this many worker processes instead of the fetch threads')
+    parser.add_argument('--deadline', type=float, default=Config.REQUEST_DEADLINE,
+                        help='seconds allowed per page, 0 for none (default: %(default)s)')
+    parser.add_argument('--rate', type=float, default=Config.RATE_LIMIT_PER_HOST,
+                        help='requests per second per host (default: %(default)s)')
+    parser.add_argument('--per-host', type=int, default=Config.MAX_CONCURRENCY_PER_HOST,
+                        help='requests in flight per host (default: %(default)s)')
+    parser.add_argument('--no-stylesheets', action='store_true', help='do not fetch CSS for background images')
+    parser.add_argument('--discover', action='store_true',
+                        help='treat input lines as sites and scrape the pages their sitemaps list')
+    parser.add_argument('--max-urls', type=int, help='with --discover, pages per site (newest first)')
+    parser.add_argument('--warc-record', help='archive every fetch to WARC files in this directory')
+    parser.add_argument('--warc-replay', help='serve every fetch from these WARC files instead of the network')
+    parser.add_argument('--progress-interval', type=float, default=2.0, help='seconds between progress lines')
+    parser.add_argument('-q', '--quiet', action='store_true', help='no progress output')
+    return parser
+
+
+def main(argv=None, stdin=None, stdout=None, stderr=None):
+    """Run a batch; returns the process exit code"""
+    stdin = stdin if stdin is not None else sys.stdin.buffer
+    stdout = stdout if stdout is not None else sys.stdout.buffer
+    stderr = stderr if stderr is not None else sys.stderr
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    kinds = [kind.strip() for kind in args.extract.split(',') if kind.strip()]
+    if not kinds or any(kind not in KINDS for kind in kinds):
+        parser.error(f"--extract takes a comma-separated list of {', '.join(KINDS)}")
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+
+    configure_default_scheduler(rate=args.rate, burst=Config.RATE_LIMIT_BURST,
+                                max_concurrency=args.per_host, max_backoff=Config.MAX_BACKOFF)
+    configure_default_breaker(failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+                              reset_timeout=Config.BREAKER_RESET_TIMEOUT,
+                              max_reset_timeout=Config.BREAKER_MAX_RESET_TIMEOUT)
+    configure_warc(record_dir=args.warc_record, replay=args.warc_replay, max_bytes=Config.WARC_MAX_BYTES,
+                   max_record_bytes=Config.WARC_MAX_RECORD_BYTES)
+
+    parse_pool = None
+    if args.parse_workers:
+        from utils.parse_pool import ParsePool
+        parse_pool = ParsePool(max_workers=args.parse_workers, max_tasks_per_child=Config.PARSE_MAX_TASKS_PER_CHILD,
+                               max_memory_mb=Config.PARSE_MAX_MEMORY_MB, timeout=Config.PARSE_TIMEOUT)
+    scraper = PageScraper(kinds, parse_pool=parse_pool, deadline=args.deadline or None,
+                          fetch_stylesheets=not args.no_stylesheets)
+
+    def scrape(job):
+        started = time.perf_counter()
+        record = {'index': job[0], 'url': job[1]}
+        record.update(scraper.scrape(job[1]))
+        record['elapsed'] = round(time.perf_counter() - started, 3)
+        return record
+
+    source = stdin if args.input == '-' else open(args.input, 'rb')
+    output = stdout if not args.output else open(args.output, 'wb')
+    progress = Progress(None if args.quiet else stderr, interval=args.progress_interval)
+    urls = read_urls(source)
+    if args.discover:
+        urls = discovered_urls(urls, args.max_urls, stderr)
+    results = run_unordered(scrape, enumerate(urls), concurrency=args.concurrency)
+    exit_code = 0
+    try:
+        for (index, url), record, error in results:
+            if error is not None:
+                record = {'index': index, 'url': url, 'error': str(error)}
+            output.write(dumps_line(record))
+            progress.update(failed=error is not None)
+            # Line by line, so piped consumers see each result as it finishes
+            output.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); stop quietly like other Unix tools
+        os.dup2(os.open(os.devnull, os.O_WRONLY), output.fileno())
+        exit_code = 128 + signal.SIGPIPE
+    except KeyboardInterrupt:
+        exit_code = 128 + signal.SIGINT
+    finally:
+        results.close()
+        if source is not stdin:
+            source.close()
+        if output is not stdout:
+            output.close()
+        if parse_pool is not None:
+            parse_pool.close()
+    progress.finish()
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
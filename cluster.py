@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Distributed scraping over a shared work queue
+A coordinator queues a batch of URLs; worker processes on the same machine
+lease tasks from the queue, scrape them with the usual scrapers and save the
+results to the shared results store. Leases expire when a worker dies, failed
+tasks are retried with backoff, and per-host rate limits hold across every
+worker sharing the queue. The queue and store default to config.Config
+(SCRAPER_QUEUE_URL, SCRAPER_RESULTS_DB).
+
+Usage:
+    python cluster.py submit urls.txt --type content            # prints the batch id
+    python cluster.py work --concurrency 16                     # in each worker process
+    python cluster.py status <batch>
+    python cluster.py results <batch> -o results.jsonl
+    python cluster.py requeue <batch>                           # retry failed tasks
+    python cluster.py workers
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from config import Config
+from utils.batch_runner import dumps_line, read_urls
+from utils.circuit_breaker import configure_default_breaker
+from utils.cluster import SCRAPE_KINDS, Coordinator, Worker
+from utils.near_duplicate import NearDuplicateIndex
+from utils.rate_limiter import configure_default_scheduler
+from utils.results_store import ResultsStore
+from utils.warc import configure_warc
+from utils.work_queue import SharedHostScheduler, open_queue
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queue', default=Config.QUEUE_URL, help='queue URL (default: %(default)s)')
+    parser.add_argument('--store', default=Config.RESULTS_DB_PATH, help='results database (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    submit = commands.add_parser('submit', help='queue a batch of URLs')
+    submit.add_argument('input', nargs='?', default='-', help='file of URLs, or - for stdin (default)')
+    submit.add_argument('-t', '--type', default='content', choices=list(SCRAPE_KINDS))
+    submit.add_argument('--max-attempts', type=int, default=Config.QUEUE_MAX_ATTEMPTS)
+    submit.add_argument('--batch', help='batch id (default: generated)')
+    submit.add_argument('--wait', action='store_true', help='block until the batch is finished')
+
+    work = commands.add_parser('work', help='run a worker until stopped')
+    work.add_argument('-c', '--concurrency', type=int, default=Config.CLUSTER_WORKER_CONCURRENCY)
+    work.add_argument('--name', help='worker name (default: host-pid)')
+    work.add_argument('--lease', type=float, default=Config.QUEUE_LEASE_SECONDS, help='lease length in seconds')
+    work.add_argument('--retry-delay', type=float, default=Config.QUEUE_RETRY_DELAY)
+    work.add_argument('--deadline', type=float, default=Config.REQUEST_DEADLINE, help='seconds per page, 0 for none')
+    work.add_argument('--rate', type=float, default=Config.RATE_LIMIT_PER_HOST,
+                      help='requests per second per host across all workers (default: %(default)s)')
+    work.add_argument('--parse-workers', type=int, default=Config.PARSE_WORKERS)
+    work.add_argument('--idle-exit', type=float, help='exit after this many seconds without tasks')
+    work.add_argument('--max-tasks', type=int, help='exit after this many tasks')
+
+    status = commands.add_parser('status', help='task counts of a batch')
+    status.add_argument('batch')
+
+    results = commands.add_parser('results', help='stream the results of a batch as JSON lines')
+    results.add_argument('batch')
+    results.add_argument('-o', '--output', help='write here instead of stdout')
+
+    requeue = commands.add_parser('requeue', help='queue the failed tasks of a batch again')
+    requeue.add_argument('batch')
+
+    commands.add_parser('workers', help='workers seen by the queue')
+    return parser
+
+
+def run_worker(args, queue, store):
+    configure_default_scheduler(SharedHostScheduler(
+        queue, rate=args.rate, burst=Config.RATE_LIMIT_BURST,
+        max_concurrency=Config.MAX_CONCURRENCY_PER_HOST, max_backoff=Config.MAX_BACKOFF))
+    configure_default_breaker(failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+                              reset_timeout=Config.BREAKER_RESET_TIMEOUT,
+                              max_reset_timeout=Config.BREAKER_MAX_RESET_TIMEOUT)
+    configure_warc(record_dir=Config.WARC_RECORD_DIR, replay=Config.WARC_REPLAY_PATH, max_bytes=Config.WARC_MAX_BYTES,
+                   max_record_bytes=Config.WARC_MAX_RECORD_BYTES)
+
+    parse_pool = None
+    if args.parse_workers:
+        from utils.parse_pool import ParsePool
+        parse_pool = ParsePool(max_workers=args.parse_workers, max_tasks_per_child=Config.PARSE_MAX_TASKS_PER_CHILD,
+                               max_memory_mb=Config.PARSE_MAX_MEMORY_MB, timeout=Config.PARSE_TIMEOUT)
+    near_duplicates = None
+    if Config.NEAR_DUPLICATE_ENABLED:
+        near_duplicates = NearDuplicateIndex(max_distance=Config.NEAR_DUPLICATE_DISTANCE,
+                                             max_entries=Config.NEAR_DUPLICATE_MAX_ENTRIES)
+    worker = Worker(queue, store, name=args.name, concurrency=args.concurrency, lease_seconds=args.lease,
+                    retry_delay=args.retry_delay, deadline=args.deadline or None, parse_pool=parse_pool,
+                    fetch_stylesheets=Config.CSS_FETCH_STYLESHEETS, near_duplicates=near_duplicates)
+    def stop(signum, frame):
+        # The first SIGTERM/SIGINT finishes the running tasks instead of abandoning
+        # their leases; a second one exits at once
+        worker.stop()
+        signal.signal(signum, signal.SIG_DFL)
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, stop)
+    print(f"worker {worker.name} polling {args.queue}", file=sys.stderr)
+    try:
+        stats = worker.run(max_tasks=args.max_tasks, idle_timeout=args.idle_exit)
+    finally:
+        if parse_pool is not None:
+            parse_pool.close()
+    print(f"worker {worker.name} stopped: {json.dumps(stats)}", file=sys.stderr)
+
+
+def main(argv=None, stdin=None, stdout=None):
+    """Run one cluster command; returns the process exit code"""
+    stdin = stdin if stdin is not None else sys.stdin.buffer
+    stdout = stdout if stdout is not None else sys.stdout.buffer
+    args = build_parser().parse_args(argv)
+    queue = open_queue(args.queue)
+    store = ResultsStore(args.store, keep_snapshots=Config.RESULTS_KEEP_SNAPSHOTS)
+    coordinator = Coordinator(queue, store)
+
+    if args.command == 'submit':
+        source = stdin if args.input == '-' else open(args.input, 'rb')
+        try:
+            submitted = coordinator.submit(read_urls(source), args.type, max_attempts=args.max_attempts,
+                                           batch=args.batch)
+        finally:
+            if source is not stdin:
+                source.close()
+        stdout.write(dumps_line(submitted))
+        stdout.flush()
+        if args.wait:
+            status = coordinator.wait(submitted['batch'], on_progress=lambda status: print(
+                f"{status['done']:,} done, {status['failed']:,} failed, "
+                f"{status['queued'] + status['leased']:,} to go", file=sys.stderr))
+            stdout.write(dumps_line(status))
+    elif args.command == 'work':
+        run_worker(args, queue, store)
+    elif args.command == 'status':
+        stdout.write(dumps_line(coordinator.status(args.batch)))
+    elif args.command == 'results':
+        output = stdout if not args.output else open(args.output, 'wb')
+        try:
+            for record in coordinator.results(args.batch):
+                output.write(dumps_line(record))
+        finally:
+            if output is not stdout:
+                output.close()
+    elif args.command == 'requeue':
+        stdout.write(dumps_line({'batch': args.batch, 'requeued': coordinator.requeue_failed(args.batch)}))
+    elif args.command == 'workers':
+        for worker in queue.workers():
+            stdout.write(dumps_line(worker))
+    stdout.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,3 +11,152 @@ class Config:
     TIMEOUT = 30
     MAX_RETRIES = 3
     USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    
+    # Profiling - lets a single /scrape request run under the profiler.
+    # Disabled unless SCRAPER_PROFILING is set; never enable in production.
+    PROFILING_ENABLED = os.environ.get('SCRAPER_PROFILING', '').lower() in ('1', 'true', 'yes')
+    PROFILE_FOLDER = os.path.join('downloads', 'profiles')
+    PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+    
+    # Production serving - read by gunicorn.conf.py (see wsgi.py).
+    # WORKER_CLASS 'gthread' runs THREADS threads per worker process and suits the
+    # blocking requests-based scrapers; 'sync' is one request per process; 'gevent'
+    # is async and handles WORKER_CONNECTIONS concurrent requests per process.
+    BIND = os.environ.get('SCRAPER_BIND', '0.0.0.0:5000')
+    WORKERS = int(os.environ.get('SCRAPER_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+    THREADS = int(os.environ.get('SCRAPER_THREADS', 4))
+    WORKER_CLASS = os.environ.get('SCRAPER_WORKER_CLASS', 'gthread')
+    WORKER_CONNECTIONS = int(os.environ.get('SCRAPER_WORKER_CONNECTIONS', 100))
+    WORKER_TIMEOUT = int(os.environ.get('SCRAPER_WORKER_TIMEOUT', 120))  # seconds before a hung worker is restarted
+    MAX_REQUESTS = int(os.environ.get('SCRAPER_MAX_REQUESTS', 1000))  # recycle workers to cap memory growth
+    MAX_REQUESTS_JITTER = 100
+    
+    # Politeness - per-host token bucket shared by every fetch in a worker process
+    RATE_LIMIT_PER_HOST = float(os.environ.get('SCRAPER_RATE_LIMIT', 2.0))  # requests per second
+    RATE_LIMIT_BURST = 5
+    MAX_CONCURRENCY_PER_HOST = 4
+    MAX_BACKOFF = 60  # seconds, upper bound for 429/503 backoff and Retry-After
+    
+    # Deadlines - every API request gets a time budget that caps each fetch's timeout and
+    # stops the remaining work once spent (clients may ask for less with "deadline": seconds)
+    REQUEST_DEADLINE = float(os.environ.get('SCRAPER_REQUEST_DEADLINE', 60))  # seconds, 0 disables
+    DOWNLOAD_DEADLINE = 900  # /download streams whole videos
+    DISCOVER_DEADLINE = 300  # /discover may scrape up to DISCOVER_SCRAPE_LIMIT pages
+    
+    # Circuit breaker - a host is skipped after this many consecutive connection errors,
+    # timeouts or 5xx responses, until a half-open probe request succeeds
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RESET_TIMEOUT = 30  # seconds before the first probe; doubles after each failed probe
+    BREAKER_MAX_RESET_TIMEOUT = 300
+    
+    # Media probing - optional HEAD + ranged GET pass over image/video results
+    # (send "probe": true and optional "filters" such as min_width or max_bytes to /scrape)
+    PROBE_MAX_WORKERS = 8
+    PROBE_HEADER_BYTES = 64 * 1024  # enough for the header of JPEG/PNG/GIF/WebP files
+    PROBE_CACHE_TTL = 3600  # seconds
+    
+    # Thumbnails served by /thumbnail for the preview grid
+    THUMBNAIL_FOLDER = os.path.join('downloads', 'thumbnails')
+    THUMBNAIL_CACHE_BYTES = 200 * 1024 * 1024  # disk budget, least recently used evicted first
+    THUMBNAIL_MAX_WORKERS = 4
+    THUMBNAIL_MAX_AGE = 7 * 24 * 3600  # Cache-Control max-age in seconds
+    
+    # Render mode - "render": true on /scrape loads the page in a pooled headless
+    # Chrome (needs Chrome installed) so JavaScript-injected media and links are found
+    RENDER_ENABLED = os.environ.get('SCRAPER_RENDER', '1').lower() in ('1', 'true', 'yes')
+    RENDER_POOL_SIZE = int(os.environ.get('SCRAPER_RENDER_POOL_SIZE', 2))  # browsers per worker process
+    RENDER_PAGE_TIMEOUT = 20  # seconds
+    RENDER_MAX_PAGES_PER_BROWSER = 50  # restart browsers periodically to bound memory
+    RENDER_BLOCK_IMAGES = True  # image URLs stay in the DOM, only the downloads are skipped
+    
+    # Video resolution - yt-dlp turns YouTube/Vimeo/... embeds into format lists
+    # ("resolve_videos": true on /scrape, POST /resolve-video) and downloads
+    VIDEO_RESOLVER_WORKERS = 4
+    VIDEO_METADATA_TTL = 1800  # seconds; direct stream URLs expire upstream
+    VIDEO_FRAGMENT_CONCURRENCY = 4  # parallel HLS/DASH fragment downloads
+    VIDEO_MAX_HEIGHT = 1080  # default download quality cap
+    
+    # CSS images - linked stylesheets are fetched concurrently per page and cached across pages
+    CSS_FETCH_STYLESHEETS = True
+    CSS_MAX_STYLESHEETS = 10  # per page, including one level of @import
+    CSS_MAX_STYLESHEET_BYTES = 512 * 1024
+    CSS_CACHE_TTL = 3600  # seconds
+    
+    # Near-duplicate detection - SimHash of content full_text checked against an
+    # in-process LSH index; matches are flagged with near_duplicate_of
+    NEAR_DUPLICATE_ENABLED = True
+    NEAR_DUPLICATE_DISTANCE = 6  # max differing bits out of 64; unrelated pages differ by ~32
+    NEAR_DUPLICATE_MAX_ENTRIES = int(os.environ.get('SCRAPER_NEAR_DUPLICATE_MAX_ENTRIES', 100000))  # least recent evicted
+    
+    # Image deduplication - "dedupe": true on /scrape (or "dedupe_images" in bulk_download
+    # settings) perceptually hashes images and collapses the same picture at other URLs/sizes
+    IMAGE_HASH_WORKERS = 8
+    IMAGE_HASH_MAX_BYTES = 10 * 1024 * 1024  # larger images are not hashed
+    IMAGE_HASH_CACHE_TTL = 24 * 3600  # seconds
+    IMAGE_DUPLICATE_DISTANCE = 8  # max differing pHash bits out of 64 for "same picture"
+    IMAGE_SIMILAR_DISTANCE = 12  # default radius of /results/media/similar
+    
+    # Image quality - /premium-scrape scores images on resolution, sharpness and compression
+    IMAGE_QUALITY_WORKERS = 8
+    IMAGE_QUALITY_MAX_BYTES = 20 * 1024 * 1024  # larger images are not scored
+    IMAGE_QUALITY_CACHE_TTL = 24 * 3600  # seconds
+    
+    # Results store - every /scrape result is saved to SQLite and queryable through
+    # the /results endpoints; "max_age": seconds on /scrape answers from the store
+    RESULTS_STORE_ENABLED = os.environ.get('SCRAPER_RESULTS_STORE', '1').lower() in ('1', 'true', 'yes')
+    RESULTS_DB_PATH = os.environ.get('SCRAPER_RESULTS_DB', os.path.join('downloads', 'results.db'))
+    RESULTS_KEEP_SNAPSHOTS = 5  # stored fetches per URL and scrape type
+    RESULTS_PAGE_SIZE = 50  # default page size of the /results endpoints
+    RESULTS_MAX_PAGE_SIZE = 500
+    
+    # Response shaping - "fields" and "page_size" on /scrape trim the response; the
+    # full result is cached briefly so GET /scrape/page can serve the next pages
+    RESULT_CACHE_TTL = 300  # seconds a paged result stays available
+    RESULT_CACHE_ENTRIES = 200
+    
+    # Response encoding - orjson serialises JSON when installed; text responses of at
+    # least COMPRESS_MIN_SIZE bytes are brotli or gzip compressed per Accept-Encoding
+    JSON_FAST = os.environ.get('SCRAPER_JSON_FAST', '1').lower() in ('1', 'true', 'yes')
+    COMPRESS_ENABLED = os.environ.get('SCRAPER_COMPRESS', '1').lower() in ('1', 'true', 'yes')
+    COMPRESS_MIN_SIZE = 1024  # bytes; smaller bodies are not worth the CPU
+    COMPRESS_GZIP_LEVEL = 5  # about half the CPU of level 6 for ~8% larger output on scrape JSON
+    COMPRESS_BROTLI_QUALITY = 5  # 0-11; higher is smaller but much slower for dynamic responses
+    
+    # Request coalescing - concurrent /scrape requests for the same URL, type and
+    # options share one fetch and parse; a finished result is reused for a short grace window
+    COALESCE_ENABLED = True
+    COALESCE_GRACE = 2.0  # seconds
+    COALESCE_WAIT_TIMEOUT = 120  # seconds a request waits for the shared scrape
+    
+    # Parse pool - with PARSE_WORKERS > 0 pages are fetched in the request thread and
+    # parsed in that many worker processes, so parsing uses every core instead of one GIL
+    PARSE_WORKERS = int(os.environ.get('SCRAPER_PARSE_WORKERS', 0))
+    PARSE_MAX_TASKS_PER_CHILD = 200  # pages before a parse worker is replaced
+    PARSE_MAX_MEMORY_MB = 512  # resident size that triggers recycling the pool
+    PARSE_TIMEOUT = 60  # seconds per batch of parse jobs
+    
+    # Site discovery - POST /discover reads robots.txt and (gzipped, nested) sitemaps
+    # and can feed the newest URLs straight into scraping
+    DISCOVER_MAX_URLS = 50000
+    DISCOVER_MAX_SITEMAPS = 500  # sitemap files read per discovery, including nested ones
+    DISCOVER_MAX_DEPTH = 3  # levels of sitemap indexes followed
+    DISCOVER_WORKERS = 4  # sitemaps fetched in parallel
+    DISCOVER_SCRAPE_LIMIT = 50  # discovered URLs scraped by one request with "scrape_type"
+    DISCOVER_SCRAPE_WORKERS = 8
+    
+    # WARC archives - SCRAPER_WARC_RECORD=<dir> archives every fetched page (request and
+    # response, gzipped, rotated at WARC_MAX_BYTES); SCRAPER_WARC_REPLAY=<dir or file>
+    # serves all fetches from such archives instead of the network, for offline runs
+    WARC_RECORD_DIR = os.environ.get('SCRAPER_WARC_RECORD') or None
+    WARC_REPLAY_PATH = os.environ.get('SCRAPER_WARC_REPLAY') or None
+    WARC_MAX_BYTES = int(os.environ.get('SCRAPER_WARC_MAX_BYTES', 1024 * 1024 * 1024))
+    # Streamed bodies larger than this (video and file downloads) pass through unarchived
+    WARC_MAX_RECORD_BYTES = int(os.environ.get('SCRAPER_WARC_MAX_RECORD_BYTES', 10 * 1024 * 1024))
+    
+    # Distributed scraping - cluster.py worker processes on one machine lease URL tasks from
+    # a shared queue, save to the shared results store and share per-host rate limits
+    QUEUE_URL = os.environ.get('SCRAPER_QUEUE_URL', 'sqlite:///' + os.path.join('downloads', 'queue.db'))
+    QUEUE_LEASE_SECONDS = 120  # a worker that stops renewing loses its tasks after this
+    QUEUE_MAX_ATTEMPTS = 3
+    QUEUE_RETRY_DELAY = 30  # seconds before the first retry, doubling after each failure
+    CLUSTER_WORKER_CONCURRENCY = int(os.environ.get('SCRAPER_CLUSTER_CONCURRENCY', 16))
@@ -0,0 +1,13 @@
+# Gunicorn settings for production serving, driven by config.Config
+# Usage: gunicorn -c gunicorn.conf.py wsgi:app
+from config import Config
+
+bind = Config.BIND
+workers = Config.WORKERS
+worker_class = Config.WORKER_CLASS
+threads = Config.THREADS
+worker_connections = Config.WORKER_CONNECTIONS
+timeout = Config.WORKER_TIMEOUT
+max_requests = Config.MAX_REQUESTS
+max_requests_jitter = Config.MAX_REQUESTS_JITTER
+accesslog = '-'
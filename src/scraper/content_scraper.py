@@ -1,26 +1,38 @@
-import requests
 from bs4 import BeautifulSoup
 import re
 
+from scraper.main_content import MainContentExtractor
+from utils.charset import decode_response
+from utils.fetcher import Fetcher
+
 class ContentScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.fetcher = Fetcher()
+        self.session = self.fetcher.session
+        self.main_content = MainContentExtractor()
     
-    def scrape_content(self, url):
-        """Scrape text content from a given URL"""
+    def scrape_content(self, url, html=None):
+        """Scrape text content from a given URL
+        
+        html may hold an already fetched or browser-rendered page, in which
+        case no request is made.
+        """
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            if html is None:
+                response = self.fetcher.get(url, timeout=30)
+                response.raise_for_status()
+                html = decode_response(response)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(html, 'html.parser')
             
             # Remove script and style elements
             for script in soup(["script", "style", "nav", "footer", "header", "aside"]):
                 script.decompose()
             
+            # Score blocks on the raw page with lxml; fall back to
+            # the simple main/article heuristic when no clear main block exists
+            full_text = self.main_content.extract(html) or self._extract_clean_text(soup)
+            
             content = {
                 'title': self._extract_title(soup),
                 'meta_description': self._extract_meta_description(soup),
@@ -28,7 +40,7 @@ class ContentScraper:
                 'paragraphs': self._extract_paragraphs(soup),
                 'lists': self._extract_lists(soup),
                 'tables': self._extract_tables(soup),
-                'full_text': self._extract_clean_text(soup),
+                'full_text': full_text,
                 'word_count': 0,
                 'url': url
             }
@@ -0,0 +1,169 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlparse
+
+from utils.cache import TTLCache
+from utils.circuit_breaker import CircuitOpenError
+from utils.deadline import current_deadline, is_deadline_error, submit_in_context
+from utils.fetcher import Fetcher
+
+# One precompiled scan finds every url(...) reference in a block of CSS
+CSS_URL_PATTERN = re.compile(r'url\(\s*(["\']?)([^"\')]+?)\1\s*\)', re.IGNORECASE)
+CSS_IMPORT_PATTERN = re.compile(r'@import\s+(?:url\()?\s*["\']?([^"\')\s;]+)', re.IGNORECASE)
+
+# url(...) targets that are never images
+NON_IMAGE_EXTENSIONS = ('.woff', '.woff2', '.ttf', '.otf', '.eot', '.css', '.htc', '.cur', '.js')
+
+
+def find_css_urls(css, base_url):
+    """Return absolute image URLs referenced by url(...) in a CSS string"""
+    urls = []
+    for match in CSS_URL_PATTERN.finditer(css):
+        ref = match.group(2).strip()
+        if not ref or ref.startswith(('data:', '#', 'javascript:')):
+            continue
+        full_url = urljoin(base_url, ref)
+        if urlparse(full_url).path.lower().endswith(NON_IMAGE_EXTENSIONS):
+            continue
+        urls.append(full_url)
+    return urls
+
+
+class CSSAssetExtractor:
+    """Collect CSS image references from inline styles, <style> blocks and linked stylesheets
+
+    Linked stylesheets are fetched concurrently (at most max_stylesheets per
+    page, each capped at max_bytes) and their parsed URL lists are cached so
+    other pages of the same site reuse them without refetching.
+    """
+
+    def __init__(self, max_stylesheets=10, max_bytes=512 * 1024, max_workers=4,
+                 cache_ttl=3600, cache_size=2000, timeout=10):
+        self.max_stylesheets = max_stylesheets
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.cache = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='css-assets')
+        self._local = threading.local()
+
+    def extract(self, soup, base_url, fetch_stylesheets=True):
+        """Return a list of (image_url, source, element_number) tuples for a page
+
+        source is 'inline', 'style' or 'stylesheet'; element_number is the
+        1-based position of the styled element for inline styles.
+        """
+        found = []
+
+        styled_elements = soup.find_all(attrs={'style': True})
+        for i, element in enumerate(styled_elements):
+            style = element.get('style', '')
+            # Cheap substring test skips the regex for the vast majority of styles
+            if 'url(' in style:
+                found.extend((url, 'inline', i + 1) for url in find_css_urls(style, base_url))
+
+        for style_tag in soup.find_all('style'):
+            css = style_tag.string or style_tag.get_text()
+            if 'url(' in css:
+                found.extend((url, 'style', None) for url in find_css_urls(css, base_url))
+
+        if fetch_stylesheets:
+            links = self.stylesheet_links(soup, base_url)
+            if links:
+                found.extend((url, 'stylesheet', None) for url in self.fetch_stylesheet_images(links))
+
+        return found
+
+    def stylesheet_links(self, soup, base_url):
+        """Absolute URLs of linked stylesheets, in document order and de-duplicated"""
+        links = []
+        for link in soup.find_all('link', href=True):
+            rel = link.get('rel') or []
+            rel = rel if isinstance(rel, list) else rel.split()
+            if 'stylesheet' in [r.lower() for r in rel]:
+                href = urljoin(base_url, link['href'])
+                if href not in links and href.startswith(('http://', 'https://')):
+                    links.append(href)
+        return links
+
+    def fetch_stylesheet_images(self, links):
+        """Fetch stylesheets concurrently (following one level of @import) and return their image URLs"""
+        urls = []
+        budget = self.max_stylesheets
+        round_links = links[:budget]
+        seen = set(round_links)
+
+        for _ in range(2):
+            if not round_links:
+                break
+            budget -= len(round_links)
+            futures = [submit_in_context(self._executor, self._stylesheet_urls, link) for link in round_links]
+            timeout = self.timeout * 2
+            deadline = current_deadline()
+            if deadline is not None:
+                # Stylesheet images are a bonus; never let them overrun the request
+                timeout = min(timeout, deadline.remaining())
+            done, _ = wait(futures, timeout=timeout)
+
+            imports = []
+            for future in futures:
+                if future not in done:
+                    continue
+                image_urls, imported = future.result()
+                urls.extend(image_urls)
+                imports.extend(link for link in imported if link not in seen)
+
+            round_links = imports[:max(budget, 0)]
+            seen.update(round_links)
+
+        return urls
+
+    def _stylesheet_urls(self, stylesheet_url):
+        """Return (image_urls, imported_stylesheets) for one stylesheet, using the cache"""
+        cached = self.cache.get(stylesheet_url)
+        if cached is not None:
+            return cached
+
+        fetcher = getattr(self._local, 'fetcher', None)
+        if fetcher is None:
+            fetcher = self._local.fetcher = Fetcher()
+
+        try:
+            response = fetcher.get(stylesheet_url, timeout=self.timeout, stream=True)
+            try:
+                response.raise_for_status()
+                content = response.raw.read(self.max_bytes, decode_content=True)
+            finally:
+                response.close()
+        except Exception as e:
+            # Remember failures briefly so every page of the site does not retry them,
+            # unless the request ran out of time or the host's circuit is open
+            result = ([], [])
+            if not (is_deadline_error(e) or isinstance(e, CircuitOpenError)):
+                self.cache.set(stylesheet_url, result, ttl=60)
+            return result
+
+        css = content.decode(response.encoding or 'utf-8', errors='replace')
+        result = (
+            find_css_urls(css, stylesheet_url),
+            [urljoin(stylesheet_url, ref) for ref in CSS_IMPORT_PATTERN.findall(css)]
+        )
+        self.cache.set(stylesheet_url, result)
+        return result
+
+
+_default_extractor = None
+_default_lock = threading.Lock()
+
+
+def get_css_extractor(**settings):
+    """Return the process-wide extractor so the stylesheet cache is shared
+
+    settings are only used when the extractor is first created.
+    """
+    global _default_extractor
+    if _default_extractor is None:
+        with _default_lock:
+            if _default_extractor is None:
+                _default_extractor = CSSAssetExtractor(**settings)
+    return _default_extractor
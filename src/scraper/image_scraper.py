@@ -1,29 +1,40 @@
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
-import re
+
+from scraper.css_assets import get_css_extractor
+from utils.charset import decode_response
+from utils.fetcher import Fetcher
+from utils.url_normalizer import MediaInventory, best_srcset_candidate
 
 class ImageScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+    def __init__(self, fetch_stylesheets=True, css_options=None):
+        self.fetcher = Fetcher()
+        self.session = self.fetcher.session
+        self.fetch_stylesheets = fetch_stylesheets
+        self.css_options = css_options or {}
     
-    def scrape_images(self, url):
-        """Scrape all images from a given URL"""
+    def scrape_images(self, url, html=None, stylesheet_links=None):
+        """Scrape all images from a given URL
+        
+        html may hold an already fetched or browser-rendered page, in which
+        case no request is made. When a stylesheet_links list is passed, linked
+        stylesheets are not fetched; their URLs are appended to the list so the
+        caller can fetch them later with add_stylesheet_images().
+        """
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            if html is None:
+                response = self.fetcher.get(url, timeout=30)
+                response.raise_for_status()
+                html = decode_response(response)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            images = []
+            soup = BeautifulSoup(html, 'html.parser')
+            inventory = MediaInventory()
             
             # Find all img tags
             img_tags = soup.find_all('img')
             
             for i, img in enumerate(img_tags):
-                src = img.get('src')
+                src, srcset_width = self._resolve_img_source(img, url)
                 if src and src.strip():  # Ensure src is not empty or whitespace
                     # Skip data URLs and invalid URLs
                     if src.startswith('data:') or src.startswith('javascript:'):
@@ -36,14 +47,18 @@ class ImageScraper:
                     if not self._is_valid_image_url(full_url):
                         continue
                     
+                    # The same sprite or logo is often repeated across the page
+                    if full_url in inventory:
+                        continue
+                    
                     alt = img.get('alt', f'Image {i+1}')
                     
                     # Get image dimensions if available
-                    width = img.get('width', 'auto')
-                    height = img.get('height', 'auto')
+                    width = srcset_width or img.get('width', 'auto')
+                    height = img.get('height', 'auto') if not srcset_width else 'auto'
                     
                     # Ensure we have both 'src' and 'url' for compatibility
-                    images.append({
+                    inventory.add(full_url, {
                         'index': i,
                         'src': full_url,  # Frontend expects 'src' property
                         'url': full_url,  # Keep 'url' for backward compatibility
@@ -54,14 +69,40 @@ class ImageScraper:
                     })
             
             # Also check for images in CSS background-image
-            style_images = self._extract_css_background_images(soup, url)
-            images.extend(style_images)
+            for style_image in self._extract_css_background_images(soup, url, stylesheet_links):
+                inventory.add(style_image['src'], style_image)
             
+            images = inventory.items()
             return images
         
         except Exception as e:
             raise Exception(f"Error scraping images: {str(e)}")
     
+    def _resolve_img_source(self, img, base_url):
+        """Pick the best-resolution source for an img, including srcset and <picture>
+
+        Returns (url, width) where width is the srcset width descriptor if known.
+        """
+        srcsets = []
+        parent = img.parent
+        if parent is not None and parent.name == 'picture':
+            for source in parent.find_all('source'):
+                # Skip art-direction sources with a non-image MIME type
+                if source.get('srcset') and source.get('type', 'image/').startswith('image/'):
+                    srcsets.append(source['srcset'])
+        if img.get('srcset'):
+            srcsets.append(img['srcset'])
+
+        best_url, best_width = None, None
+        for srcset in srcsets:
+            candidate_url, candidate_width = best_srcset_candidate(srcset, base_url)
+            if candidate_url and (best_url is None or (candidate_width or 0) > (best_width or 0)):
+                best_url, best_width = candidate_url, candidate_width
+
+        if best_url:
+            return best_url, best_width
+        return img.get('src') or img.get('data-src'), None
+    
     def _get_filename_from_url(self, url):
         """Extract filename from URL"""
         parsed = urlparse(url)
@@ -91,31 +132,48 @@ class ImageScraper:
         except Exception:
             return False
     
-    def _extract_css_background_images(self, soup, base_url):
-        """Extract images from CSS background-image properties"""
+    def _extract_css_background_images(self, soup, base_url, stylesheet_links=None):
+        """Extract images referenced from CSS: inline styles, <style> blocks and linked stylesheets"""
         images = []
+        extractor = get_css_extractor(**self.css_options)
+        fetch_stylesheets = self.fetch_stylesheets and stylesheet_links is None
         
-        # Find all elements with style attribute
-        styled_elements = soup.find_all(attrs={'style': True})
+        for full_url, source, element_number in extractor.extract(soup, base_url, fetch_stylesheets):
+            if self._is_valid_image_url(full_url):
+                images.append(self._background_image(full_url, source, element_number, len(images)))
         
-        for i, element in enumerate(styled_elements):
-            style = element.get('style', '')
-            # Look for background-image URLs
-            bg_matches = re.findall(r'background-image:\s*url\(["\']?([^"\')\s]+)["\']?\)', style)
-            
-            for bg_url in bg_matches:
-                if bg_url and bg_url.strip():
-                    full_url = urljoin(base_url, bg_url)
-                    if self._is_valid_image_url(full_url):
-                        images.append({
-                            'index': len(images),
-                            'src': full_url,  # Frontend expects 'src' property
-                            'url': full_url,  # Keep 'url' for backward compatibility
-                            'alt': f'Background Image {i+1}',
-                            'width': 'auto',
-                            'height': 'auto',
-                            'filename': self._get_filename_from_url(full_url),
-                            'type': 'background'
-                        })
+        if self.fetch_stylesheets and stylesheet_links is not None:
+            stylesheet_links.extend(extractor.stylesheet_links(soup, base_url))
         
         return images
+    
+    def add_stylesheet_images(self, images, links):
+        """Fetch linked stylesheets and append their images to a scrape_images() result"""
+        if not links or not self.fetch_stylesheets:
+            return images
+        
+        inventory = MediaInventory()
+        for image in images:
+            inventory.add(image['src'], image)
+        
+        extractor = get_css_extractor(**self.css_options)
+        for full_url in extractor.fetch_stylesheet_images(links):
+            if self._is_valid_image_url(full_url) and full_url not in inventory:
+                image = self._background_image(full_url, 'stylesheet', None, len(images))
+                inventory.add(full_url, image)
+                images.append(image)
+        return images
+    
+    def _background_image(self, full_url, source, element_number, index):
+        alt = f'Background Image {element_number}' if element_number else f'Stylesheet Image {index+1}'
+        return {
+            'index': index,
+            'src': full_url,  # Frontend expects 'src' property
+            'url': full_url,  # Keep 'url' for backward compatibility
+            'alt': alt,
+            'width': 'auto',
+            'height': 'auto',
+            'filename': self._get_filename_from_url(full_url),
+            'type': 'background',
+            'css_source': source
+        }
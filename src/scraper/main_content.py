@@ -0,0 +1,114 @@
+import re
+
+# Tags that never hold article text
+BOILERPLATE_TAGS = [
+    'script', 'style', 'noscript', 'nav', 'footer', 'header', 'aside', 'form',
+    'iframe', 'button', 'select', 'svg', 'canvas', 'template', 'dialog'
+]
+
+# class/id hints used to up- or down-weight blocks
+NEGATIVE_HINTS = re.compile(
+    r'comment|cookie|consent|banner|sidebar|footer|foot|nav|menu|share|social|related|'
+    r'promo|advert|\bads?\b|sponsor|popup|modal|subscribe|newsletter|breadcrumb|widget|masthead|signup',
+    re.IGNORECASE
+)
+POSITIVE_HINTS = re.compile(r'article|content|main|post|entry|story|text|body|blog', re.IGNORECASE)
+
+# Elements whose own text counts as a paragraph-like block
+BLOCK_TAGS = {'p', 'pre', 'blockquote', 'td', 'li', 'dd', 'h2', 'h3', 'h4'}
+
+WHITESPACE = re.compile(r'\s+')
+
+
+class MainContentExtractor:
+    """Find the main text of a page by text-density / link-density block scoring
+
+    Paragraph-like blocks are scored on length and punctuation, the score is
+    propagated to their parent and grandparent containers, containers are
+    penalised by link density and boilerplate class names, and the best
+    container plus its strong siblings form the main content. Pages are parsed
+    with lxml; the caller's own tree is never modified.
+    """
+
+    def __init__(self, min_text_length=200, sibling_threshold=0.2):
+        self.min_text_length = min_text_length
+        self.sibling_threshold = sibling_threshold
+
+    def extract(self, html):
+        """Return the main text of an HTML document, or '' if none was found"""
+        import lxml.html
+
+        parser = None
+        if isinstance(html, str):
+            # lxml refuses str input that carries an XML encoding declaration. The
+            # text is already decoded, so a <meta charset> must not re-decode it.
+            html = html.encode('utf-8')
+            parser = lxml.html.HTMLParser(encoding='utf-8')
+        if not html or not html.strip():
+            return ''
+        try:
+            root = lxml.html.fromstring(html, parser=parser)
+        except Exception:
+            return ''
+        return self._extract_lxml(root)
+
+    def _extract_lxml(self, root):
+        from lxml import etree
+
+        etree.strip_elements(root, *BOILERPLATE_TAGS, etree.Comment, with_tail=False)
+
+        scores = {}
+        for element in root.iter(*BLOCK_TAGS):
+            text = self._text(' '.join(element.itertext()))
+            if len(text) < 25:
+                continue
+            block_score = 1 + text.count(',') + min(len(text) / 100, 3)
+
+            parent = element.getparent()
+            if parent is None:
+                continue
+            scores[parent] = scores.get(parent, 0) + block_score
+            grandparent = parent.getparent()
+            if grandparent is not None:
+                scores[grandparent] = scores.get(grandparent, 0) + block_score / 2
+
+        if not scores:
+            return ''
+
+        best, best_score = None, 0
+        for element, score in scores.items():
+            score = self._weight(score, element.get('class'), element.get('id'),
+                                 self._link_density_lxml(element))
+            scores[element] = score
+            if score > best_score:
+                best, best_score = element, score
+
+        parts = []
+        parent = best.getparent()
+        siblings = list(parent) if parent is not None else [best]
+        for sibling in siblings:
+            if sibling is best or scores.get(sibling, 0) >= best_score * self.sibling_threshold:
+                parts.append(self._text(' '.join(sibling.itertext())))
+
+        text = ' '.join(part for part in parts if part)
+        return text if len(text) >= self.min_text_length else ''
+
+    def _link_density_lxml(self, element):
+        text_length = len(self._text(' '.join(element.itertext()))) or 1
+        link_length = sum(len(self._text(' '.join(a.itertext()))) for a in element.iter('a'))
+        return min(1.0, link_length / text_length)
+
+    def _weight(self, score, class_attr, element_id, link_density):
+        """Apply class/id hints and link density to a container score"""
+        hints = f"{class_attr or ''} {element_id or ''}"
+        if hints.strip():
+            negative = NEGATIVE_HINTS.search(hints)
+            positive = POSITIVE_HINTS.search(hints)
+            if negative and not positive:
+                score *= 0.25
+            elif positive and not negative:
+                score *= 1.25
+        return score * (1 - link_density)
+
+    def _text(self, text):
+        return WHITESPACE.sub(' ', text).strip()
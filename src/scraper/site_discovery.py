@@ -0,0 +1,265 @@
+import gzip
+import heapq
+import io
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+from utils.cache import TTLCache
+from utils.deadline import submit_in_context
+from utils.fetcher import USER_AGENT, Fetcher
+from utils.rate_limiter import get_host
+
+# Tried in order when robots.txt lists no Sitemap: lines
+DEFAULT_SITEMAP_PATHS = ['/sitemap.xml', '/sitemap_index.xml', '/sitemap.xml.gz']
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def parse_lastmod(value):
+    """Turn a W3C datetime (2024, 2024-05, 2024-05-01, 2024-05-01T10:00:00+02:00) into a UTC timestamp"""
+    if not value:
+        return None
+    value = value.strip()
+    for candidate in (value.replace('Z', '+00:00'), value[:10], value[:7] + '-01', value[:4] + '-01-01'):
+        try:
+            parsed = datetime.fromisoformat(candidate)
+        except ValueError:
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return None
+
+
+def parse_priority(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _LimitedReader(io.RawIOBase):
+    """File wrapper that stops a runaway (or decompression-bomb) sitemap at max_bytes"""
+
+    def __init__(self, stream, max_bytes):
+        self._stream = stream
+        self._remaining = max_bytes
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            raise Exception("Sitemap exceeds the size limit")
+        data = self._stream.read(min(len(buffer), self._remaining))
+        self._remaining -= len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class _Collector:
+    """Thread-safe, de-duplicating sink that keeps the max_urls most recently modified URLs"""
+
+    def __init__(self, max_urls=None, since=None):
+        self.max_urls = max_urls
+        self.since = since
+        self.total = 0
+        self._seen = set()
+        self._heap = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        if self.since is not None and (entry['lastmod_ts'] or 0) < self.since:
+            return
+        with self._lock:
+            if entry['url'] in self._seen:
+                return
+            self._seen.add(entry['url'])
+            self.total += 1
+            # Undated URLs sort after every dated one; ties keep sitemap order
+            key = (entry['lastmod_ts'] if entry['lastmod_ts'] is not None else float('-inf'), -next(self._order))
+            if self.max_urls is None or len(self._heap) < self.max_urls:
+                heapq.heappush(self._heap, (key, entry))
+            elif key > self._heap[0][0]:
+                heapq.heapreplace(self._heap, (key, entry))
+
+    def entries(self):
+        """Collected entries, most recently modified first"""
+        return [entry for _, entry in sorted(self._heap, key=lambda item: item[0], reverse=True)]
+
+
+class SiteDiscovery:
+    """Find a site's pages from robots.txt and its sitemaps instead of crawling links
+
+    Sitemaps are stream-parsed with lxml iterparse (memory stays flat for
+    50,000-URL files), may be gzipped, and sitemap indexes are followed up to
+    max_depth levels with child sitemaps fetched concurrently. URLs disallowed
+    by robots.txt are dropped, and results come back newest lastmod first.
+    """
+
+    def __init__(self, max_depth=3, max_sitemaps=500, max_workers=4, max_bytes=50 * 1024 * 1024,
+                 timeout=30, respect_robots=True, robots_ttl=3600):
+        self.max_depth = max_depth
+        self.max_sitemaps = max_sitemaps
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.respect_robots = respect_robots
+        self.robots_cache = TTLCache(max_entries=1000, ttl=robots_ttl)
+        self._local = threading.local()
+
+    def _fetcher(self):
+        fetcher = getattr(self._local, 'fetcher', None)
+        if fetcher is None:
+            fetcher = self._local.fetcher = Fetcher()
+        return fetcher
+
+    def robots(self, site_url):
+        """Return the parsed robots.txt for a site (cached per host)"""
+        parsed = urlparse(site_url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        robots = self.robots_cache.get(robots_url)
+        if robots is not None:
+            return robots
+
+        robots = RobotFileParser(robots_url)
+        try:
+            response = self._fetcher().get(robots_url, timeout=self.timeout)
+            if response.status_code in (401, 403):
+                robots.disallow_all = True
+            elif response.status_code >= 400:
+                robots.allow_all = True
+            else:
+                robots.parse(response.text.splitlines())
+        except Exception:
+            # An unreachable robots.txt is treated as "no restrictions", like most crawlers
+            robots.allow_all = True
+        self.robots_cache.set(robots_url, robots)
+        return robots
+
+    def sitemap_urls(self, site_url):
+        """Sitemaps listed in robots.txt, or the conventional locations"""
+        listed = self.robots(site_url).site_maps()
+        if listed:
+            return list(dict.fromkeys(listed))
+        return [urljoin(site_url, path) for path in DEFAULT_SITEMAP_PATHS]
+
+    def discover(self, site_url, max_urls=None, since=None, same_host=True, sitemaps=None):
+        """Return {'urls': [...], 'sitemaps': [...], 'total': n, 'errors': [...]} for a site
+
+        Each URL entry has url, lastmod, changefreq, priority and the sitemap it
+        came from. max_urls keeps the most recently modified ones; since (a
+        timestamp) drops URLs last modified before it.
+        """
+        robots = self.robots(site_url) if self.respect_robots else None
+        host = get_host(site_url)
+        collector = _Collector(max_urls, since)
+        if sitemaps is None:
+            sitemaps = self.sitemap_urls(site_url)
+        pending = [(url, 0) for url in sitemaps]
+        visited, errors = [], []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sitemaps') as executor:
+            while pending and len(visited) < self.max_sitemaps:
+                batch = pending[:self.max_sitemaps - len(visited)]
+                pending = []
+                futures = {}
+                for sitemap_url, depth in batch:
+                    if sitemap_url in visited:
+                        continue
+                    visited.append(sitemap_url)
+                    futures[submit_in_context(executor, self._read_sitemap, sitemap_url, collector, robots,
+                                              host if same_host else None)] = (sitemap_url, depth)
+
+                for future in as_completed(futures):
+                    sitemap_url, depth = futures[future]
+                    try:
+                        children = future.result()
+                    except Exception as e:
+                        errors.append({'sitemap': sitemap_url, 'error': str(e)})
+                        continue
+                    if depth < self.max_depth:
+                        pending.extend((child, depth + 1) for child in children)
+
+        # Conventional locations that turned out not to exist are not worth reporting
+        guesses = {urljoin(site_url, path) for path in DEFAULT_SITEMAP_PATHS}
+        errors = [error for error in errors if not (error['sitemap'] in guesses and '404' in error['error'])]
+
+        urls = collector.entries()
+        for entry in urls:
+            del entry['lastmod_ts']
+        return {'urls': urls, 'sitemaps': visited, 'total': collector.total, 'errors': errors}
+
+    def _read_sitemap(self, sitemap_url, collector, robots, host):
+        """Stream one sitemap into collector and return the child sitemaps it lists"""
+        children = []
+        response = self._fetcher().get(sitemap_url, timeout=self.timeout, stream=True)
+        try:
+            response.raise_for_status()
+            for kind, entry in self.iter_sitemap(response.raw):
+                if kind == 'sitemap':
+                    children.append(entry['url'])
+                    continue
+                if host and get_host(entry['url']) != host:
+                    continue
+                if robots is not None and not robots.can_fetch(USER_AGENT, entry['url']):
+                    continue
+                entry['sitemap'] = sitemap_url
+                collector.add(entry)
+        except Exception as e:
+            raise Exception(f"Error reading sitemap: {str(e)}")
+        finally:
+            response.close()
+        return children
+
+    def iter_sitemap(self, raw):
+        """Yield ('url' | 'sitemap', entry) from a sitemap stream (XML or plain text, optionally gzipped)"""
+        from lxml import etree
+
+        if hasattr(raw, 'decode_content'):
+            raw.decode_content = True
+        stream = io.BufferedReader(_LimitedReader(raw, self.max_bytes))
+        if stream.peek(2)[:2] == GZIP_MAGIC:
+            # .xml.gz files are served as-is, not with Content-Encoding
+            stream = io.BufferedReader(_LimitedReader(gzip.GzipFile(fileobj=stream), self.max_bytes))
+
+        if stream.peek(64).lstrip(b'\xef\xbb\xbf \t\r\n')[:1] != b'<':
+            yield from self._iter_text_sitemap(stream)
+            return
+
+        context = etree.iterparse(stream, events=('end',), resolve_entities=False, no_network=True, recover=True)
+        for _, element in context:
+            tag = element.tag.rpartition('}')[2] if isinstance(element.tag, str) else None
+            if tag not in ('url', 'sitemap'):
+                continue
+
+            fields = {}
+            for child in element:
+                if isinstance(child.tag, str):
+                    fields[child.tag.rpartition('}')[2]] = (child.text or '').strip()
+            loc = fields.get('loc')
+            if loc:
+                lastmod = fields.get('lastmod') or None
+                yield tag, {
+                    'url': loc,
+                    'lastmod': lastmod,
+                    'lastmod_ts': parse_lastmod(lastmod),
+                    'changefreq': fields.get('changefreq') or None,
+                    'priority': parse_priority(fields.get('priority'))
+                }
+
+            # Free the element and everything parsed before it so memory stays flat
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    def _iter_text_sitemap(self, stream):
+        for line in io.TextIOWrapper(stream, encoding='utf-8', errors='replace'):
+            line = line.strip()
+            if line.startswith(('http://', 'https://')):
+                yield 'url', {'url': line, 'lastmod': None, 'lastmod_ts': None, 'changefreq': None, 'priority': None}
@@ -1,22 +1,28 @@
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import re
 
+from utils.charset import decode_response
+from utils.fetcher import Fetcher
+
 class URLScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.fetcher = Fetcher()
+        self.session = self.fetcher.session
     
-    def scrape_urls(self, url):
-        """Scrape all URLs from a given URL"""
+    def scrape_urls(self, url, html=None):
+        """Scrape all URLs from a given URL
+        
+        html may hold an already fetched or browser-rendered page, in which
+        case no request is made.
+        """
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            if html is None:
+                response = self.fetcher.get(url, timeout=30)
+                response.raise_for_status()
+                html = decode_response(response)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(html, 'html.parser')
             urls = {
                 'internal_links': [],
                 'external_links': [],
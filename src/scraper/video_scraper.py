@@ -1,23 +1,30 @@
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import re
 
+from utils.charset import decode_response
+from utils.fetcher import Fetcher
+from utils.url_normalizer import MediaInventory
+
 class VideoScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.fetcher = Fetcher()
+        self.session = self.fetcher.session
     
-    def scrape_videos(self, url):
-        """Scrape all videos from a given URL"""
+    def scrape_videos(self, url, html=None):
+        """Scrape all videos from a given URL
+        
+        html may hold an already fetched or browser-rendered page, in which
+        case no request is made.
+        """
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            if html is None:
+                response = self.fetcher.get(url, timeout=30)
+                response.raise_for_status()
+                html = decode_response(response)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            videos = []
+            soup = BeautifulSoup(html, 'html.parser')
+            inventory = MediaInventory()
             
             # Find all video tags
             video_tags = soup.find_all('video')
@@ -28,24 +35,28 @@ class VideoScraper:
                 
                 # Check for source tags within video
                 sources = video.find_all('source')
-                video_sources = []
+                # The same file is often given both as src and as a <source>
+                source_inventory = MediaInventory()
                 
                 if src:
-                    video_sources.append({
-                        'url': urljoin(url, src),
+                    source_url = urljoin(url, src)
+                    source_inventory.add(source_url, {
+                        'url': source_url,
                         'type': video.get('type', 'video/mp4')
                     })
                 
                 for source in sources:
                     source_src = source.get('src')
                     if source_src:
-                        video_sources.append({
-                            'url': urljoin(url, source_src),
+                        source_url = urljoin(url, source_src)
+                        source_inventory.add(source_url, {
+                            'url': source_url,
                             'type': source.get('type', 'video/mp4')
                         })
+                video_sources = source_inventory.items()
                 
                 if video_sources:
-                    videos.append({
+                    inventory.add(video_sources[0]['url'], {
                         'index': i,
                         'src': video_sources[0]['url'],  # Frontend expects 'src' property
                         'url': video_sources[0]['url'],  # Keep 'url' for backward compatibility
@@ -59,10 +70,10 @@ class VideoScraper:
                     })
             
             # Find iframe videos (YouTube, Vimeo, etc.)
-            iframe_videos = self._extract_iframe_videos(soup, url)
-            videos.extend(iframe_videos)
+            for iframe_video in self._extract_iframe_videos(soup, url):
+                inventory.add(iframe_video['src'], iframe_video)
             
-            return videos
+            return inventory.items()
         
         except Exception as e:
             raise Exception(f"Error scraping videos: {str(e)}")
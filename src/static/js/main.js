@@ -217,9 +217,9 @@ class ShadAIScraper {
                     <div class="col-md-6 col-lg-4 mb-4">
                         <div class="preview-item">
                             <div class="image-container" style="position: relative; overflow: hidden; border-radius: 10px;">
-                                <img src="${img.src}" alt="${img.alt || 'Scraped image'}" 
+                                <img src="${this.thumbnailUrl(img.src)}" data-original="${img.src}" alt="${img.alt || 'Scraped image'}" 
                                      class="preview-image w-100" loading="lazy"
-                                     onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';"
+                                     onerror="if (!this.dataset.fallback) { this.dataset.fallback = '1'; this.src = this.dataset.original; } else { this.style.display='none'; this.nextElementSibling.style.display='flex'; }"
                                      style="height: 200px; object-fit: cover;">
                                 <div class="image-placeholder" style="display: none; height: 200px; background: linear-gradient(135deg, #f0f0f0, #e0e0e0); align-items: center; justify-content: center; flex-direction: column;">
                                     <i class="fas fa-image fa-3x text-muted mb-2"></i>
@@ -490,6 +490,11 @@ class ShadAIScraper {
         }
     }
 
+    thumbnailUrl(src, size = 320) {
+        // Server-side downscaled preview; the full image is only loaded on View/Download
+        return `/thumbnail?size=${size}&url=${encodeURIComponent(src)}`;
+    }
+
     viewImage(url) {
         try {
             // Create a modal to view the image
@@ -250,7 +250,7 @@ class PremiumScraper {
                 filename: `premium_image_${i + 1}_4K.jpg`,
                 size: `${(Math.random() * 5 + 2).toFixed(1)} MB`,
                 resolution: ['4K UHD', '2K QHD', 'Full HD', '8K Ultra'][Math.floor(Math.random() * 4)],
-                quality: Math.floor(Math.random() * 20) + 80,
+                quality_score: Math.floor(Math.random() * 20) + 80,
                 ai_enhanced: Math.random() > 0.3,
                 metadata: {
                     camera: 'Canon EOS R5',
@@ -369,7 +369,8 @@ class PremiumScraper {
             col.innerHTML = `
                 <div class="card premium-image-card" style="animation-delay: ${index * 0.1}s">
                     <div class="premium-image-container">
-                        <img src="${image.url}" class="card-img-top premium-image" alt="Premium Image ${index + 1}">
+                        <img src="/thumbnail?size=320&url=${encodeURIComponent(image.url)}" data-original="${image.url}" class="card-img-top premium-image" alt="Premium Image ${index + 1}" loading="lazy"
+                             onerror="if (!this.dataset.fallback) { this.dataset.fallback = '1'; this.src = this.dataset.original; }">
                         <div class="premium-image-overlay">
                             <div class="premium-image-actions">
                                 <button class="btn btn-sm btn-premium" onclick="premiumScraper.viewPremiumImage('${image.url}')">
@@ -390,7 +391,7 @@ class PremiumScraper {
                         <div class="premium-image-meta">
                             <small class="text-muted">
                                 <i class="fas fa-hdd me-1"></i>${image.size} • 
-                                <i class="fas fa-star me-1"></i>${image.quality}% Quality
+                                ${image.quality_score != null ? `<i class="fas fa-star me-1"></i>${image.quality_score}% Quality` : ''}
                             </small>
                         </div>
                     </div>
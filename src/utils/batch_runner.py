@@ -0,0 +1,173 @@
+import importlib
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.deadline import deadline_scope, submit_in_context
+from utils.parse_pool import PARSERS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+KINDS = tuple(PARSERS)
+
+
+def read_urls(lines):
+    """Yield the URLs in an iterable of lines, skipping blank lines and # comments"""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def dumps_line(record):
+    """Encode a record as one line of JSON (bytes, newline included)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+
+class PageScraper:
+    """Fetch a page once and run the chosen extractors over its HTML
+
+    Scrapers hold a requests.Session, so each thread gets its own instances.
+    With a ParsePool the extraction runs in its worker processes instead of
+    the calling thread, spreading parsing over all cores.
+    """
+
+    def __init__(self, kinds=('content',), parse_pool=None, timeout=30, deadline=None, fetch_stylesheets=True):
+        unknown = [kind for kind in kinds if kind not in PARSERS]
+        if unknown:
+            raise ValueError(f"Unknown extractor: {', '.join(unknown)} (choose from {', '.join(KINDS)})")
+        self.kinds = list(kinds)
+        self.parse_pool = parse_pool
+        self.timeout = timeout
+        self.deadline = deadline
+        self.fetch_stylesheets = fetch_stylesheets
+        self._local = threading.local()
+
+    def _scraper(self, kind):
+        scrapers = getattr(self._local, 'scrapers', None)
+        if scrapers is None:
+            scrapers = self._local.scrapers = {}
+        scraper = scrapers.get(kind)
+        if scraper is None:
+            module_name, class_name, _, options = PARSERS[kind]
+            if kind == 'images':
+                options = dict(options, fetch_stylesheets=self.fetch_stylesheets)
+            scraper = scrapers[kind] = getattr(importlib.import_module(module_name), class_name)(**options)
+        return scraper
+
+    def _fetcher(self):
+        from utils.fetcher import Fetcher
+
+        fetcher = getattr(self._local, 'fetcher', None)
+        if fetcher is None:
+            fetcher = self._local.fetcher = Fetcher()
+        return fetcher
+
+    def fetch(self, url):
+        """Fetch a page and return its decoded HTML"""
+        from utils.charset import decode_response
+
+        try:
+            response = self._fetcher().get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return decode_response(response)
+        except Exception as e:
+            raise Exception(f"Error fetching page: {str(e)}")
+
+    def scrape(self, url):
+        """Return {kind: result} for one page, within the per-page deadline"""
+        with deadline_scope(self.deadline):
+            html = self.fetch(url)
+            if self.parse_pool is None:
+                return {kind: getattr(self._scraper(kind), PARSERS[kind][2])(url, html) for kind in self.kinds}
+
+            parsed = dict(zip(self.kinds, self.parse_pool.parse_many([(kind, url, html) for kind in self.kinds])))
+            if 'images' in parsed:
+                images, stylesheet_links = parsed['images']
+                parsed['images'] = self._scraper('images').add_stylesheet_images(images, stylesheet_links)
+            return parsed
+
+
+def run_unordered(func, items, concurrency=8, max_pending=None):
+    """Call func on every item in a thread pool and yield (item, result, error) as each finishes
+
+    items is consumed lazily and at most max_pending calls (twice the
+    concurrency by default) are queued or running at a time, so memory stays
+    flat however long the input is. Closing the generator cancels queued calls.
+    """
+    max_pending = max_pending or concurrency * 2
+    items = iter(items)
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch')
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[submit_in_context(executor, func, item)] = item
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Progress:
+    """Counts finished items and writes a throughput line to a text stream every interval seconds"""
+
+    def __init__(self, stream, interval=2.0, unit='pages'):
+        self.stream = stream
+        self.interval = interval
+        self.unit = unit
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+        self._last_done = 0
+
+    def update(self, failed=False):
+        self.done += 1
+        if failed:
+            self.failed += 1
+        now = time.monotonic()
+        if self.stream is not None and now - self._last_report >= self.interval:
+            recent = (self.done - self._last_done) / (now - self._last_report)
+            self._write(f"{self.done:,} {self.unit} ({self.failed:,} failed)  "
+                        f"{self.rate():.1f}/s overall, {recent:.1f}/s now")
+            self._last_report, self._last_done = now, self.done
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def finish(self):
+        elapsed = time.monotonic() - self.started
+        if self.stream is not None:
+            self._write(f"done: {self.done:,} {self.unit}, {self.failed:,} failed in {elapsed:.1f}s "
+                        f"({self.rate():.1f}/s)")
+
+    def _write(self, line):
+        self.stream.write(line + '\n')
+        self.stream.flush()
@@ -0,0 +1,158 @@
+import atexit
+import queue
+import threading
+import time
+
+from utils.circuit_breaker import get_default_breaker
+from utils.deadline import DeadlineExceeded, check_deadline, clamp_timeout, current_deadline
+from utils.rate_limiter import get_default_scheduler
+
+# Requests the browser never needs to build the DOM we scrape
+DEFAULT_BLOCKED_URLS = [
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*facebook.net*', '*connect.facebook.com*',
+    '*hotjar.com*', '*segment.io*', '*segment.com/analytics*', '*scorecardresearch.com*',
+    '*adservice.google.*', '*amazon-adsystem.com*', '*criteo.*', '*taboola.com*', '*outbrain.com*'
+]
+
+class BrowserPool:
+    """Pool of long-lived headless Chrome instances for rendering JavaScript pages
+
+    Browsers are started on first use and reused across requests, so start-up
+    cost is paid once per browser rather than once per scrape. A browser is
+    replaced after max_pages renders or whenever it errors. Renders honour the
+    request deadline and the host's circuit breaker like plain fetches.
+    """
+
+    def __init__(self, size=2, page_timeout=20, max_pages=50, block_images=True,
+                 blocked_urls=None, checkout_timeout=60, driver_factory=None):
+        self.size = size
+        self.page_timeout = page_timeout
+        self.max_pages = max_pages
+        self.block_images = block_images
+        self.blocked_urls = DEFAULT_BLOCKED_URLS if blocked_urls is None else blocked_urls
+        self.checkout_timeout = checkout_timeout
+        self._driver_factory = driver_factory or self._create_driver
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._started = 0
+        self._closed = False
+        atexit.register(self.close)
+
+    def render(self, url):
+        """Load url in a pooled browser and return the rendered HTML"""
+        breaker = get_default_breaker()
+        breaker.allow(url)
+        entry = self._checkout()
+        healthy = False
+        deadline = current_deadline()
+        try:
+            driver = entry['driver']
+            # The page itself still counts against the host's politeness budget
+            with get_default_scheduler().slot(url):
+                self._set_page_timeout(entry, clamp_timeout(self.page_timeout))
+                driver.get(url)
+            html = driver.page_source
+            entry['pages'] += 1
+            healthy = True
+            breaker.record_success(url)
+            return html
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(f"Request deadline of {deadline.seconds:g}s exceeded rendering {url}") from e
+            raise Exception(f"Error rendering page: {str(e)}")
+        finally:
+            self._checkin(entry, healthy)
+
+    def _set_page_timeout(self, entry, timeout):
+        """Limit the next page load to timeout seconds, skipping the call when it is unchanged"""
+        if entry.get('page_timeout') != timeout:
+            entry['driver'].set_page_load_timeout(timeout)
+            entry['page_timeout'] = timeout
+
+    def _checkout(self):
+        """Take an idle browser, starting a new one while under the pool size"""
+        deadline = time.monotonic() + clamp_timeout(self.checkout_timeout)
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                start_new = self._started < self.size
+                if start_new:
+                    self._started += 1
+
+            if start_new:
+                try:
+                    return {'driver': self._driver_factory(), 'pages': 0}
+                except Exception:
+                    with self._lock:
+                        self._started -= 1
+                    raise
+
+            # Wait briefly, then re-check in case a retired browser freed a slot
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                check_deadline()
+                raise Exception("No browser available within the checkout timeout")
+            try:
+                return self._idle.get(timeout=min(remaining, 0.5))
+            except queue.Empty:
+                continue
+
+    def _checkin(self, entry, healthy):
+        """Return a browser to the pool, or retire it if it is worn out or broken"""
+        if healthy and not self._closed and entry['pages'] < self.max_pages:
+            self._idle.put(entry)
+            return
+
+        self._quit(entry['driver'])
+        with self._lock:
+            self._started -= 1
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Shut down every idle browser"""
+        self._closed = True
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(entry['driver'])
+            with self._lock:
+                self._started -= 1
+
+    def _create_driver(self):
+        """Start a headless Chrome with fonts, trackers and optionally images blocked"""
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless=new')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-extensions')
+        options.add_argument('--mute-audio')
+        # Return as soon as the DOM is ready rather than waiting for every subresource
+        options.page_load_strategy = 'eager'
+        if self.block_images:
+            # img src attributes stay in the DOM; only the downloads are skipped
+            options.add_argument('--blink-settings=imagesEnabled=false')
+
+        driver = webdriver.Chrome(options=options)
+        driver.set_script_timeout(self.page_timeout)
+        if self.blocked_urls:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_urls})
+        return driver
@@ -0,0 +1,140 @@
+import codecs
+import re
+
+from utils.cache import TTLCache
+from utils.rate_limiter import get_host
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be')
+]
+
+CONTENT_TYPE_CHARSET = re.compile(r'charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+# Matches both <meta charset="..."> and <meta http-equiv="Content-Type" content="...; charset=...">
+META_CHARSET = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+# Labels browsers decode differently from Python's codec of the same name
+ENCODING_ALIASES = {
+    'iso-8859-1': 'windows-1252', 'iso8859-1': 'windows-1252', 'latin-1': 'windows-1252',
+    'latin1': 'windows-1252', 'us-ascii': 'windows-1252', 'ascii': 'windows-1252',
+    'iso-8859-9': 'windows-1254', 'iso-8859-11': 'windows-874', 'tis-620': 'windows-874',
+    'x-sjis': 'shift_jis', 'gb2312': 'gb18030', 'gbk': 'gb18030'
+}
+
+# Most common encodings on the web, used to break ties between equally plausible guesses
+# (a French cp1252 page scores the same as cp1250, which turns "à" into "ŕ")
+WEB_PREVALENCE = ['utf_8', 'cp1252', 'cp1251', 'gb18030', 'shift_jis', 'cp932', 'euc_kr', 'euc_jp',
+                  'big5', 'cp1250', 'cp1256', 'cp1253', 'cp1254', 'cp1255', 'koi8_r', 'iso8859_2']
+
+META_SCAN_BYTES = 1024
+DETECT_SAMPLE_BYTES = 32 * 1024
+
+_host_charsets = TTLCache(max_entries=4096, ttl=3600)
+
+
+def normalize_encoding(label):
+    """Return a Python codec name for a charset label, or None if it is unknown"""
+    if not label:
+        return None
+    label = label.strip().strip('"\'').lower()
+    label = ENCODING_ALIASES.get(label, label)
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return None
+
+
+def sniff_bom(content):
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+    return None
+
+
+def header_encoding(content_type):
+    match = CONTENT_TYPE_CHARSET.search(content_type or '')
+    return normalize_encoding(match.group(1)) if match else None
+
+
+def meta_encoding(content):
+    """Charset declared by a <meta> tag in the first KB of the document"""
+    match = META_CHARSET.search(content[:META_SCAN_BYTES])
+    if not match:
+        return None
+    encoding = normalize_encoding(match.group(1).decode('ascii', 'ignore'))
+    # A UTF-16 page without a BOM cannot contain an ASCII meta tag; browsers read it as UTF-8
+    if encoding and encoding.startswith('utf-16'):
+        return 'utf-8'
+    return encoding
+
+
+def is_utf8(content):
+    try:
+        content.decode('utf-8')
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def detect_encoding(content):
+    """Guess an undeclared, non-UTF-8 encoding with charset_normalizer on a sample"""
+    from charset_normalizer import from_bytes
+
+    matches = from_bytes(content[:DETECT_SAMPLE_BYTES])
+    best = matches.best()
+    if best is None:
+        return None
+
+    tied = [match.encoding for match in matches
+            if abs(match.chaos - best.chaos) < 0.005 and abs(match.coherence - best.coherence) < 0.005]
+    tied.sort(key=lambda name: WEB_PREVALENCE.index(name) if name in WEB_PREVALENCE else len(WEB_PREVALENCE))
+    return normalize_encoding(tied[0] if tied else best.encoding)
+
+
+def resolve_encoding(content, content_type=None, url=None):
+    """Return (encoding, source) for an HTML document
+
+    The order is BOM, HTTP Content-Type charset, <meta> charset in the first KB,
+    a strict UTF-8 check (a C-speed pass that settles most of the web), the
+    charset earlier pages of the same host resolved to, then charset_normalizer.
+    The BOM wins over the header, as in browsers. source names the deciding step.
+    """
+    encoding = sniff_bom(content)
+    if encoding:
+        return encoding, 'bom'
+
+    host = get_host(url) if url else None
+    for source, encoding in (('header', header_encoding(content_type)), ('meta', meta_encoding(content))):
+        if encoding:
+            if host:
+                _host_charsets.set(host, encoding)
+            return encoding, source
+
+    if is_utf8(content):
+        return 'utf-8', 'utf-8'
+
+    if host:
+        encoding = _host_charsets.get(host)
+        if encoding:
+            return encoding, 'host'
+
+    encoding = detect_encoding(content) or 'windows-1252'
+    if host:
+        _host_charsets.set(host, encoding)
+    return encoding, 'detected'
+
+
+def decode_html(content, content_type=None, url=None):
+    """Decode HTML bytes to str once, so parsers never have to sniff the encoding themselves"""
+    if isinstance(content, str):
+        return content
+    encoding, source = resolve_encoding(content, content_type, url)
+    if source == 'bom':
+        content = content[len(codecs.BOM_UTF8) if encoding == 'utf-8' else 2:]
+    return content.decode(encoding, errors='replace')
+
+
+def decode_response(response):
+    """Decode a requests response body as HTML"""
+    return decode_html(response.content, response.headers.get('Content-Type'), getattr(response, 'url', None))
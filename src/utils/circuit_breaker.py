@@ -0,0 +1,122 @@
+import threading
+import time
+
+from utils.rate_limiter import get_host
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of fetching from a host whose circuit is open"""
+
+
+class Circuit:
+    """Failure bookkeeping for a single host"""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.open_until = 0.0
+        self.probe_until = 0.0
+        self.last_error = None
+
+
+class HostCircuitBreaker:
+    """Per-host circuit breaker shared by every fetch in the process
+
+    After failure_threshold consecutive connection errors, timeouts or 5xx
+    responses a host's circuit opens and fetches to it fail at once with
+    CircuitOpenError. Once reset_timeout has passed the circuit is half-open:
+    a single probe request is let through, and its outcome closes the circuit
+    or opens it again for twice as long (capped at max_reset_timeout). A probe
+    that never reports back frees the slot after probe_timeout.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, max_reset_timeout=300.0, probe_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.probe_timeout = probe_timeout
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, host):
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = Circuit()
+        return circuit
+
+    def allow(self, url):
+        """Raise CircuitOpenError unless a request to url's host may be sent now"""
+        host = get_host(url)
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.state == CLOSED:
+                return
+            now = time.monotonic()
+            if circuit.state == OPEN and now >= circuit.open_until:
+                circuit.state = HALF_OPEN
+            if circuit.state == HALF_OPEN and now >= circuit.probe_until:
+                circuit.probe_until = now + self.probe_timeout
+                return
+            retry_in = max(circuit.open_until - now, circuit.probe_until - now, 0.0)
+            raise CircuitOpenError(f"{host} is failing ({circuit.last_error}); "
+                                   f"not retrying for {retry_in:.0f}s")
+
+    def record_success(self, url):
+        host = get_host(url)
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is not None:
+                del self._circuits[host]
+
+    def record_failure(self, url, error):
+        host = get_host(url)
+        with self._lock:
+            circuit = self._circuit(host)
+            circuit.failures += 1
+            circuit.last_error = str(error)
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                # Each failed probe doubles the wait before the next one
+                delay = min(self.max_reset_timeout, self.reset_timeout * 2 ** circuit.opened)
+                circuit.state = OPEN
+                circuit.opened += 1
+                circuit.open_until = time.monotonic() + delay
+                circuit.probe_until = 0.0
+
+    def record_response(self, url, status_code):
+        """Count a 5xx answer as a failure and anything else as a sign of health"""
+        if status_code >= 500:
+            self.record_failure(url, f"HTTP {status_code}")
+        else:
+            self.record_success(url)
+
+    def host_stats(self):
+        """Return the state of every host that has recent failures"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: {
+                    'state': circuit.state,
+                    'failures': circuit.failures,
+                    'retry_in': round(max(0.0, circuit.open_until - now), 3),
+                    'last_error': circuit.last_error
+                }
+                for host, circuit in self._circuits.items()
+            }
+
+
+_default_breaker = HostCircuitBreaker()
+
+
+def get_default_breaker():
+    """Return the process-wide circuit breaker shared by all fetchers"""
+    return _default_breaker
+
+
+def configure_default_breaker(**settings):
+    """Replace the process-wide circuit breaker with one using the given settings"""
+    global _default_breaker
+    _default_breaker = HostCircuitBreaker(**settings)
+    return _default_breaker
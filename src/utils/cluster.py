@@ -0,0 +1,211 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.batch_runner import PageScraper
+from utils.deadline import submit_in_context
+from utils.near_duplicate import flag_near_duplicate
+
+# /scrape type -> extractors, so cluster results have the same shape as /scrape results
+SCRAPE_KINDS = {
+    'images_videos': ('images', 'videos'),
+    'content': ('content',),
+    'urls': ('urls',)
+}
+
+# 4xx answers that may succeed later
+RETRYABLE_STATUSES = (408, 425, 429)
+
+
+def is_retryable(error):
+    """False for errors a retry cannot fix (4xx answers); the scrapers wrap the cause in a plain Exception"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+        if status is not None:
+            return not (400 <= status < 500) or status in RETRYABLE_STATUSES
+        error = error.__cause__ or error.__context__
+    return True
+
+
+def build_payload(url, scrape_type, parsed, near_duplicates=None):
+    """The /scrape payload for a page's extractor results, without per-request options
+
+    Content is flagged against near_duplicates (a NearDuplicateIndex) when one
+    is given, as /scrape does. Options a /scrape request can add (render,
+    probe, dedupe, resolve_videos) are not part of a queued task.
+    """
+    payload = {'type': scrape_type}
+    payload.update(parsed)
+    payload['url'] = url
+    if near_duplicates is not None and 'content' in payload:
+        flag_near_duplicate(near_duplicates, payload['content'])
+    return payload
+
+
+def new_batch_id():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.urandom(3).hex()}"
+
+
+class Coordinator:
+    """Splits a batch of URLs into queue tasks and follows its progress
+
+    Workers in any process sharing the queue pick the tasks up. Results are
+    written by the workers to the shared results store; the coordinator only
+    reads them back.
+    """
+
+    def __init__(self, queue, store=None):
+        self.queue = queue
+        self.store = store
+
+    def submit(self, urls, scrape_type='content', max_attempts=3, batch=None):
+        """Queue urls (any iterable, read lazily) and return {'batch', 'queued'}"""
+        if scrape_type not in SCRAPE_KINDS:
+            raise ValueError(f"Unknown scrape type: {scrape_type}")
+        batch = batch or new_batch_id()
+        queued = self.queue.submit(batch, urls, scrape_type, max_attempts=max_attempts)
+        return {'batch': batch, 'queued': queued}
+
+    def status(self, batch):
+        return self.queue.batch_status(batch)
+
+    def wait(self, batch, poll_interval=1.0, timeout=None, on_progress=None):
+        """Block until every task of batch is done or failed; returns the final status"""
+        started = time.monotonic()
+        while True:
+            status = self.status(batch)
+            if on_progress is not None:
+                on_progress(status)
+            if status['finished'] or status['total'] == 0:
+                return status
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise TimeoutError(f"Batch {batch} not finished after {timeout:g}s")
+            time.sleep(poll_interval)
+
+    def results(self, batch, page_size=500):
+        """Yield one record per finished task: the stored payload, or the error of a failed task"""
+        after = 0
+        while True:
+            tasks = self.queue.tasks(batch, after=after, limit=page_size)
+            if not tasks:
+                return
+            for task in tasks:
+                after = task['id']
+                record = {'task': task['id'], 'url': task['url'], 'attempts': task['attempts']}
+                if task['state'] == 'done':
+                    snapshot = self.store.snapshot(task['result_id']) if self.store is not None else None
+                    record['result_id'] = task['result_id']
+                    if snapshot is not None:
+                        record['result'] = snapshot
+                elif task['state'] == 'failed':
+                    record['error'] = task['error']
+                else:
+                    continue
+                yield record
+
+    def requeue_failed(self, batch):
+        return self.queue.requeue_failed(batch)
+
+
+class Worker:
+    """Leases tasks from the shared queue, scrapes them and saves the results
+
+    Up to concurrency tasks run at once; while they run their leases are
+    renewed every lease_seconds / 3, so a live worker keeps its tasks and a
+    dead one loses them to the others once the lease runs out. Failures are
+    retried with exponential backoff (retry_delay, doubling per attempt)
+    unless the site answered with a 4xx that a retry cannot change.
+
+    Payloads match a plain /scrape of the same type. With a near_duplicates
+    index, content is flagged like /scrape does, but only against pages this
+    worker has seen: the index lives in the worker's process.
+    """
+
+    def __init__(self, queue, store, name=None, concurrency=8, lease_seconds=120, retry_delay=30.0,
+                 deadline=None, parse_pool=None, fetch_stylesheets=True, poll_interval=1.0,
+                 near_duplicates=None):
+        self.queue = queue
+        self.store = store
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}-{os.urandom(2).hex()}"
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.near_duplicates = near_duplicates
+        self.scrapers = {
+            scrape_type: PageScraper(kinds, parse_pool=parse_pool, deadline=deadline,
+                                     fetch_stylesheets=fetch_stylesheets)
+            for scrape_type, kinds in SCRAPE_KINDS.items()
+        }
+        self.stats = {'completed': 0, 'retried': 0, 'failed': 0, 'lost': 0}
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Finish the running tasks and return from run()"""
+        self._stop.set()
+
+    def process(self, task):
+        """Scrape one task and save its /scrape payload; returns the results store id"""
+        parsed = self.scrapers[task.scrape_type].scrape(task.url)
+        payload = build_payload(task.url, task.scrape_type, parsed, self.near_duplicates)
+        return self.store.save(task.url, task.scrape_type, payload)
+
+    def run(self, max_tasks=None, idle_timeout=None):
+        """Work until stop(), max_tasks finished, or idle_timeout seconds without any task"""
+        running = {}
+        handled = 0
+        idle_since = time.monotonic()
+        renewed = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='cluster-worker')
+        try:
+            while True:
+                wanted = self.concurrency - len(running)
+                if max_tasks is not None:
+                    wanted = min(wanted, max_tasks - handled - len(running))
+                if wanted > 0 and not self._stop.is_set():
+                    for task in self.queue.lease(self.name, wanted, self.lease_seconds):
+                        running[submit_in_context(executor, self.process, task)] = task
+
+                if not running:
+                    if self._stop.is_set() or (max_tasks is not None and handled >= max_tasks):
+                        return self.stats
+                    if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                        return self.stats
+                    self._stop.wait(self.poll_interval)
+                    continue
+                idle_since = time.monotonic()
+
+                done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._report(running.pop(future), future)
+                    handled += 1
+
+                if running and time.monotonic() - renewed >= self.lease_seconds / 3:
+                    # Tasks whose lease was already lost are counted when they finish
+                    self.queue.renew(list(running.values()), self.lease_seconds)
+                    renewed = time.monotonic()
+        finally:
+            executor.shutdown(wait=True)
+
+    def _report(self, task, future):
+        """Tell the queue how a task ended"""
+        try:
+            result_id = future.result()
+        except Exception as e:
+            retry = is_retryable(e)
+            state = self.queue.fail(task, e, self.retry_delay * 2 ** (task.attempts - 1), retry=retry)
+            if state is None:
+                self.stats['lost'] += 1
+            else:
+                self.stats['retried' if state == 'queued' else 'failed'] += 1
+            return
+        if self.queue.complete(task, result_id):
+            self.stats['completed'] += 1
+        else:
+            # The lease ran out and another worker has the task; its result will win
+            self.stats['lost'] += 1
@@ -0,0 +1,99 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Media types worth compressing; images, videos and archives are already compressed
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+    'text/'
+)
+
+
+def accepted_encodings(header):
+    """Parse Accept-Encoding into {coding: q}, dropping codings refused with q=0"""
+    encodings = {}
+    for part in (header or '').lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            encodings[coding.strip()] = q
+    return encodings
+
+
+def choose_encoding(header):
+    """Pick br or gzip from an Accept-Encoding header, or None for identity"""
+    encodings = accepted_encodings(header)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_q = None, 0
+    for coding in candidates:
+        q = encodings.get(coding, encodings.get('*', 0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data, encoding, gzip_level=5, brotli_quality=5):
+    """Compress bytes with gzip or brotli"""
+    if encoding == 'br':
+        # Quality 5 keeps brotli within gzip's CPU range; qualities above 6 are many times slower
+        return brotli.compress(data, quality=brotli_quality, mode=brotli.MODE_TEXT)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class ResponseCompressor:
+    """after_request hook that compresses large text responses
+
+    The encoding is negotiated from Accept-Encoding (brotli when the brotli
+    package is installed, otherwise gzip). Responses below min_size, streamed
+    or file responses, and already encoded responses are left untouched.
+    """
+
+    def __init__(self, app=None, min_size=1024, gzip_level=5, brotli_quality=5):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', self.gzip_level)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', self.brotli_quality)
+        app.after_request(self.after_request)
+
+    def after_request(self, response):
+        from flask import request
+
+        if (response.direct_passthrough or response.is_streamed or
+                'Content-Encoding' in response.headers or
+                not 200 <= response.status_code < 300 or
+                not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        response.set_data(compress(data, encoding, self.gzip_level, self.brotli_quality))
+        response.headers['Content-Encoding'] = encoding
+        if response.headers.get('ETag'):
+            # The compressed body is a different representation of the same resource
+            etag, weak = response.get_etag()
+            response.set_etag(f'{etag}-{encoding}', weak=weak)
+        return response
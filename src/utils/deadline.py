@@ -0,0 +1,108 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+
+class DeadlineExceeded(Exception):
+    """Raised when work is started or waited on after its deadline has passed"""
+
+
+class Deadline:
+    """A point in time by which an API request's work must finish
+
+    Fetches clamp their timeouts to remaining() and loops call check() between
+    steps, so an expired request stops at the next fetch or wait instead of
+    running every remaining step to its own full timeout.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded(f"Request deadline of {self.seconds:g}s exceeded")
+
+    def timeout(self, timeout=None):
+        """Clamp a requests-style timeout (seconds or a (connect, read) tuple) to the time left"""
+        self.check()
+        remaining = self.remaining()
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+        return min(timeout, remaining)
+
+
+_current = ContextVar('deadline', default=None)
+
+
+def current_deadline():
+    """Return the Deadline of the work running in this context, or None"""
+    return _current.get()
+
+
+def set_deadline(seconds):
+    """Start a deadline for the current context and return the token for reset_deadline()
+
+    An enclosing deadline that ends sooner is kept, so nested work can only
+    shorten the budget.
+    """
+    deadline = Deadline(seconds)
+    outer = _current.get()
+    if outer is not None and outer.expires < deadline.expires:
+        deadline = outer
+    return _current.set(deadline)
+
+
+def reset_deadline(token):
+    _current.reset(token)
+
+
+@contextmanager
+def deadline_scope(seconds):
+    """Run the enclosed block under a deadline of seconds (None means no deadline)"""
+    if seconds is None:
+        yield current_deadline()
+        return
+    token = set_deadline(seconds)
+    try:
+        yield current_deadline()
+    finally:
+        reset_deadline(token)
+
+
+def is_deadline_error(error):
+    """True if error, or an exception it was raised from, is DeadlineExceeded"""
+    # Scrapers re-raise failures as plain Exceptions; the original is kept in the chain
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, DeadlineExceeded):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def check_deadline():
+    """Raise DeadlineExceeded if the current context's deadline has passed"""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def clamp_timeout(timeout):
+    """Return timeout limited to the current deadline (unchanged when there is none)"""
+    deadline = _current.get()
+    return deadline.timeout(timeout) if deadline is not None else timeout
+
+
+def submit_in_context(executor, func, *args, **kwargs):
+    """executor.submit() that carries the caller's deadline into the worker thread"""
+    return executor.submit(copy_context().run, func, *args, **kwargs)
@@ -0,0 +1,139 @@
+import functools
+import threading
+import weakref
+
+import requests
+
+from utils.circuit_breaker import get_default_breaker
+from utils.deadline import DeadlineExceeded, clamp_timeout, current_deadline
+from utils.rate_limiter import BACKOFF_STATUSES, get_default_scheduler
+from utils.warc import get_replay_archive, get_warc_recorder
+from utils.warc_adapters import RecordingAdapter, ReplayAdapter
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Errors that say something about the host's health (counted by the circuit breaker)
+HOST_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+               requests.exceptions.ChunkedEncodingError)
+
+def release_when_done(response, release):
+    """Call release once a streamed response is closed, fully read or garbage collected"""
+    lock = threading.Lock()
+    released = []
+
+    def release_once():
+        with lock:
+            if released:
+                return
+            released.append(True)
+        release()
+
+    # Weak reference: the hooks live on the response and must not keep it alive
+    response_ref = weakref.ref(response)
+
+    def close():
+        try:
+            requests.Response.close(response_ref())
+        finally:
+            release_once()
+
+    response.close = close
+    raw_release = getattr(response.raw, 'release_conn', None)
+    if raw_release is not None:
+        # urllib3 hands the connection back as soon as the body has been read to the end
+        def release_conn():
+            try:
+                raw_release()
+            finally:
+                release_once()
+
+        response.raw.release_conn = release_conn
+    weakref.finalize(response, release_once)
+
+class Fetcher:
+    """Shared fetch path for the scrapers
+
+    Every request waits for a slot from the per-host politeness scheduler
+    (held until the body is read or the response closed for stream=True) and
+    is retried with backoff when the host answers 429 or 503. Hosts that keep
+    failing are cut off by the circuit breaker, and timeouts are clamped to
+    the deadline of the API request being served. With a WARC recorder
+    configured responses are archived as they arrive; with a replay archive
+    they are served from disk instead of the network.
+    """
+
+    def __init__(self, scheduler=None, max_retries=3, recorder=None, archive=None, breaker=None):
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': USER_AGENT
+        })
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+        self.breaker = breaker
+        self.archive = archive or get_replay_archive()
+        self.recorder = None if self.archive else recorder or get_warc_recorder()
+
+        if self.archive is not None:
+            adapter = ReplayAdapter(self.archive)
+        elif self.recorder is not None:
+            adapter = RecordingAdapter(self.recorder)
+        else:
+            adapter = None
+        if adapter is not None:
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+    def get(self, url, **kwargs):
+        """GET a URL through the scheduler, retrying throttled responses"""
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        """HEAD a URL through the scheduler"""
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('HEAD', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the scheduler, retrying throttled responses"""
+        if self.archive is not None:
+            # Replayed responses come from disk, so politeness limits do not apply
+            return self.session.request(method, url, **kwargs)
+
+        scheduler = self.scheduler or get_default_scheduler()
+        breaker = self.breaker or get_default_breaker()
+        deadline = current_deadline()
+        timeout = kwargs.get('timeout')
+        breaker.allow(url)
+
+        for attempt in range(self.max_retries + 1):
+            kwargs['timeout'] = clamp_timeout(timeout)
+            scheduler.acquire(url)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except HOST_ERRORS as e:
+                scheduler.release(url)
+                if deadline is not None and deadline.expired():
+                    # Our own budget ran out; that says nothing about the host
+                    raise DeadlineExceeded(f"Request deadline of {deadline.seconds:g}s exceeded fetching {url}")
+                breaker.record_failure(url, e)
+                raise
+            except BaseException:
+                scheduler.release(url)
+                raise
+            if kwargs.get('stream'):
+                # The caller reads the body after we return; it still counts against the host
+                release_when_done(response, functools.partial(scheduler.release, url))
+            else:
+                scheduler.release(url)
+            breaker.record_response(url, response.status_code)
+
+            retry_after = response.headers.get('Retry-After')
+            scheduler.record_response(url, response.status_code, retry_after)
+
+            if response.status_code not in BACKOFF_STATUSES or attempt == self.max_retries:
+                return response
+
+            # The scheduler now blocks the host until Retry-After (or an
+            # exponential backoff) has passed, so the retry simply waits its turn
+            response.close()
+
+        return response
@@ -1,22 +1,21 @@
 import os
-import requests
 from urllib.parse import urlparse
 from datetime import datetime
-import shutil
+
+from utils.deadline import check_deadline
+from utils.fetcher import Fetcher
 
 class FileHandler:
     def __init__(self):
         self.downloads_folder = 'downloads'
         os.makedirs(self.downloads_folder, exist_ok=True)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.fetcher = Fetcher()
+        self.session = self.fetcher.session
     
     def download_image(self, image_url, index=0):
         """Download an image from URL"""
         try:
-            response = self.session.get(image_url, timeout=30, stream=True)
+            response = self.fetcher.get(image_url, timeout=30, stream=True)
             response.raise_for_status()
             
             # Get filename
@@ -24,18 +23,24 @@ class FileHandler:
             filepath = os.path.join(self.downloads_folder, filename)
             
             # Download and save
-            with open(filepath, 'wb') as f:
-                shutil.copyfileobj(response.raw, f)
+            self._save(response, filepath)
             
             return filepath
         
         except Exception as e:
             raise Exception(f"Error downloading image: {str(e)}")
     
-    def download_video(self, video_url, index=0):
-        """Download a video from URL"""
+    def download_video(self, video_url, index=0, resolver=None, format_id=None):
+        """Download a video from URL
+        
+        Platform pages and embeds (YouTube, Vimeo, ...) are handed to the
+        yt-dlp based resolver when one is given.
+        """
+        if resolver is not None and resolver.is_supported(video_url):
+            return resolver.download(video_url, self.downloads_folder, format_id)
+        
         try:
-            response = self.session.get(video_url, timeout=60, stream=True)
+            response = self.fetcher.get(video_url, timeout=60, stream=True)
             response.raise_for_status()
             
             # Get filename
@@ -43,8 +48,7 @@ class FileHandler:
             filepath = os.path.join(self.downloads_folder, filename)
             
             # Download and save
-            with open(filepath, 'wb') as f:
-                shutil.copyfileobj(response.raw, f)
+            self._save(response, filepath)
             
             return filepath
         
@@ -54,7 +58,7 @@ class FileHandler:
     def download_file(self, file_url, index=0):
         """Download any file from URL"""
         try:
-            response = self.session.get(file_url, timeout=60, stream=True)
+            response = self.fetcher.get(file_url, timeout=60, stream=True)
             response.raise_for_status()
             
             # Get filename
@@ -62,14 +66,49 @@ class FileHandler:
             filepath = os.path.join(self.downloads_folder, filename)
             
             # Download and save
-            with open(filepath, 'wb') as f:
-                shutil.copyfileobj(response.raw, f)
+            self._save(response, filepath)
             
             return filepath
         
         except Exception as e:
             raise Exception(f"Error downloading file: {str(e)}")
     
+    def fetch_bytes(self, url, max_bytes=20 * 1024 * 1024):
+        """Fetch a URL into memory, refusing bodies larger than max_bytes"""
+        try:
+            response = self.fetcher.get(url, timeout=30, stream=True)
+            response.raise_for_status()
+            
+            chunks = []
+            received = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                check_deadline()
+                received += len(chunk)
+                if received > max_bytes:
+                    response.close()
+                    raise Exception(f"File is larger than {max_bytes} bytes")
+                chunks.append(chunk)
+            
+            return b''.join(chunks)
+        
+        except Exception as e:
+            raise Exception(f"Error fetching file: {str(e)}")
+    
+    def _save(self, response, filepath):
+        """Stream a response body to disk, giving up (and removing the partial file) at the request deadline"""
+        try:
+            with open(filepath, 'wb') as f:
+                for chunk in iter(lambda: response.raw.read(64 * 1024), b''):
+                    check_deadline()
+                    f.write(chunk)
+        except BaseException:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            raise
+        finally:
+            # Hands the per-host slot back to the scheduler
+            response.close()
+    
     def _get_safe_filename(self, url, default_name, extension):
         """Generate a safe filename from URL or default name"""
         try:
@@ -0,0 +1,250 @@
+import threading
+from functools import lru_cache
+from itertools import combinations
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+
+from utils.cache import TTLCache
+from utils.deadline import submit_in_context
+from utils.near_duplicate import hamming_distance
+
+PHASH_SIZE = 32  # pixels per side fed to the DCT
+HASH_SIZE = 8  # 8x8 bits = 64-bit hashes
+
+
+def _dct_matrix(n):
+    """Unnormalised DCT-II basis; the uniform scale does not change which coefficients beat the median"""
+    k = np.arange(n)[:, None]
+    samples = np.arange(n)[None, :]
+    return np.cos(np.pi * (2 * samples + 1) * k / (2 * n)).astype(np.float32)
+
+
+DCT = _dct_matrix(PHASH_SIZE)
+
+
+def _pack(bits):
+    """(N, 64) boolean rows -> list of 64-bit ints, first bit most significant"""
+    packed = np.packbits(bits.astype(np.uint8), axis=1)
+    return [int.from_bytes(row.tobytes(), 'big') for row in packed]
+
+
+def phash_batch(pixels):
+    """pHash of a (N, 32, 32) stack of grayscale images, computed as two batched matrix products"""
+    coefficients = DCT @ pixels @ DCT.T
+    low = coefficients[:, :HASH_SIZE, :HASH_SIZE].reshape(len(pixels), -1)
+    return _pack(low > np.median(low, axis=1, keepdims=True))
+
+
+def dhash_batch(pixels):
+    """dHash of a (N, 8, 9) stack of grayscale images: is each pixel brighter than its left neighbour"""
+    return _pack((pixels[:, :, 1:] > pixels[:, :, :-1]).reshape(len(pixels), -1))
+
+
+def load_pixels(data):
+    """Decode image bytes into (pixels_32x32, pixels_8x9, (width, height)) grayscale float arrays"""
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        size = image.size
+        # JPEGs decode straight to a fraction of their size; far cheaper than a full decode
+        image.draft('L', (PHASH_SIZE * 4, PHASH_SIZE * 4))
+        gray = image.convert('L')
+    large = gray.resize((PHASH_SIZE, PHASH_SIZE), Image.Resampling.LANCZOS)
+    small = gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    return np.asarray(large, dtype=np.float32), np.asarray(small, dtype=np.float32), size
+
+
+def hash_pixels(decoded):
+    """Return [(phash, dhash)] for a list of load_pixels() results, hashed as one batch"""
+    if not decoded:
+        return []
+    phashes = phash_batch(np.stack([large for large, _, _ in decoded]))
+    dhashes = dhash_batch(np.stack([small for _, small, _ in decoded]))
+    return list(zip(phashes, dhashes))
+
+
+def hash_images(datas):
+    """Return [(phash, dhash)] for a list of image byte strings"""
+    return hash_pixels([load_pixels(data) for data in datas])
+
+
+def format_hash(value):
+    return f"{value:016x}"
+
+
+class HashIndex:
+    """Multi-index hash table over 64-bit hashes for Hamming-radius queries
+
+    Each hash is filed under its four 16-bit chunks. Two hashes within r bits
+    of each other must agree to within r // 4 bits on at least one chunk
+    (pigeonhole), so a query only probes the buckets of chunk values that
+    close to its own and checks the full distance of what it finds there.
+    A BK-tree barely prunes at the radii used for near-duplicate images.
+    """
+
+    CHUNKS = 4
+    CHUNK_BITS = 16
+
+    def __init__(self):
+        self._tables = [{} for _ in range(self.CHUNKS)]
+        self._entries = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _chunks(self, value):
+        mask = (1 << self.CHUNK_BITS) - 1
+        return [(value >> (self.CHUNK_BITS * i)) & mask for i in range(self.CHUNKS)]
+
+    def add(self, value, item):
+        """Index item under hash value"""
+        entry = (value, item)
+        with self._lock:
+            self._entries.append(entry)
+            for table, chunk in zip(self._tables, self._chunks(value)):
+                table.setdefault(chunk, []).append(entry)
+
+    def search(self, value, max_distance):
+        """Return [(item, distance)] for indexed hashes within max_distance bits, nearest first"""
+        flips = _flip_masks(self.CHUNK_BITS, max_distance // self.CHUNKS)
+        with self._lock:
+            if len(flips) * self.CHUNKS >= len(self._entries):
+                # Probing would cost more than comparing against everything
+                candidates = self._entries
+            else:
+                seen = set()
+                candidates = []
+                for table, chunk in zip(self._tables, self._chunks(value)):
+                    for flip in flips:
+                        for entry in table.get(chunk ^ flip, ()):
+                            if id(entry) not in seen:
+                                seen.add(id(entry))
+                                candidates.append(entry)
+            matches = [(item, distance) for stored, item in candidates
+                       for distance in (hamming_distance(value, stored),) if distance <= max_distance]
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(bits, radius):
+    """Every bits-wide mask with at most radius bits set"""
+    return tuple(sum(1 << bit for bit in positions)
+                 for count in range(min(radius, bits) + 1)
+                 for positions in combinations(range(bits), count))
+
+
+def _pixel_count(item):
+    try:
+        return int(item.get('actual_width') or 0) * int(item.get('actual_height') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def collapse_duplicates(items, max_distance=8):
+    """Keep one image per group of perceptually identical ones
+
+    Items need a 'phash' (see ImageHasher.hash_items). The largest image of
+    each group is kept, in the position of the group's first image, and lists
+    the URLs it stands for under 'duplicates'. Unhashed items are kept as is.
+    """
+    index = HashIndex()
+    kept = []
+    for item in items:
+        if not item.get('phash'):
+            kept.append(item)
+            continue
+        value = int(item['phash'], 16)
+        matches = index.search(value, max_distance)
+        if not matches:
+            index.add(value, len(kept))
+            kept.append(item)
+            continue
+
+        position = matches[0][0]
+        keeper = kept[position]
+        if _pixel_count(item) > _pixel_count(keeper):
+            keeper, item = item, keeper
+        duplicates = item.pop('duplicates', [])
+        keeper['duplicates'] = keeper.get('duplicates', []) + [item['src']] + duplicates
+        kept[position] = keeper
+    return kept
+
+
+class ImageHasher:
+    """Perceptual hashes (pHash and dHash) of scraped images
+
+    Images are fetched concurrently through the shared fetch path, decoded to
+    small grayscale thumbnails (JPEG draft mode) and hashed in one vectorised
+    batch. Hashes are cached per URL. Images whose pHashes differ in a few
+    bits out of 64 are the same picture at another size, format or quality.
+    """
+
+    def __init__(self, max_workers=8, max_bytes=10 * 1024 * 1024, cache_ttl=24 * 3600, cache_size=20000):
+        self.max_bytes = max_bytes
+        self.cache = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-hash')
+        self._local = threading.local()
+
+    def _file_handler(self):
+        """Each pool thread keeps its own FileHandler (and requests.Session)"""
+        from utils.file_handler import FileHandler
+
+        handler = getattr(self._local, 'file_handler', None)
+        if handler is None:
+            handler = self._local.file_handler = FileHandler()
+        return handler
+
+    def _load(self, url):
+        """Fetch and decode one image in a pool thread (Pillow releases the GIL while decoding)"""
+        data = self._file_handler().fetch_bytes(url, max_bytes=self.max_bytes)
+        try:
+            return len(data), load_pixels(data)
+        except Exception as e:
+            raise Exception(f"Error decoding image: {str(e)}")
+
+    def hash_url(self, url):
+        """Return {'phash', 'dhash', 'actual_width', 'actual_height', 'bytes'} for one image URL"""
+        return self.hash_items([{'src': url}])[0]
+
+    def hash_items(self, items):
+        """Attach 'phash' and 'dhash' (16 hex digits) to image results, or 'hash_error'
+
+        Real dimensions and byte size are filled in too, unless a media probe
+        already supplied them.
+        """
+        pending = []
+        for item in items:
+            cached = self.cache.get(item['src'])
+            if cached is not None:
+                self._apply(item, cached)
+            else:
+                pending.append((item, submit_in_context(self._executor, self._load, item['src'])))
+
+        loaded = []
+        for item, future in pending:
+            try:
+                loaded.append((item, future.result()))
+            except Exception as e:
+                item['hash_error'] = str(e)
+
+        hashes = hash_pixels([pixels for _, (_, pixels) in loaded])
+        for (item, (size, pixels)), (phash, dhash) in zip(loaded, hashes):
+            info = {
+                'phash': format_hash(phash),
+                'dhash': format_hash(dhash),
+                'actual_width': pixels[2][0],
+                'actual_height': pixels[2][1],
+                'bytes': size
+            }
+            self.cache.set(item['src'], info)
+            self._apply(item, info)
+        return items
+
+    def _apply(self, item, info):
+        for key, value in info.items():
+            if key in ('phash', 'dhash') or item.get(key) is None:
+                item[key] = value
@@ -0,0 +1,222 @@
+import hashlib
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+
+from utils.cache import TTLCache
+from utils.deadline import submit_in_context
+
+ANALYSIS_SIZE = 256  # pixels per side of the sharpness thumbnail and the blockiness crop
+BLOCK_SIZE = 8  # JPEG block grid
+
+# Resolution scores 0 at 64x64 and 100 at 1920x1080 (log scale in between)
+MIN_PIXELS = 64 * 64
+FULL_PIXELS = 1920 * 1080
+
+WEIGHTS = {'resolution': 0.35, 'sharpness': 0.35, 'compression': 0.3}
+
+# libjpeg's baseline luminance table, which encoders scale by quality
+STANDARD_LUMINANCE_SUM = sum((
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99
+))
+
+
+def estimate_jpeg_quality(quantization):
+    """Estimate the 1-100 encoder quality of a JPEG from its luminance quantization table"""
+    table = quantization.get(0) if quantization else None
+    if not table:
+        return None
+    scale = 100.0 * sum(table) / STANDARD_LUMINANCE_SUM
+    quality = 100 - scale / 2 if scale <= 100 else 5000 / scale
+    return int(round(min(100, max(1, quality))))
+
+
+def load_analysis(data):
+    """Decode image bytes into the arrays the quality metrics need
+
+    Returns (thumbnail, crop, (width, height), jpeg_quality). The thumbnail is
+    the whole image resampled to 256x256 grayscale; the crop is a 256x256
+    block-aligned piece of the centre at full resolution, where JPEG block
+    edges have not been smoothed away (None for JPEGs, whose quantization
+    tables are read instead, and for smaller images).
+    """
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        size = image.size
+        jpeg_quality = None
+        if image.format == 'JPEG':
+            jpeg_quality = estimate_jpeg_quality(getattr(image, 'quantization', None))
+            if jpeg_quality is not None:
+                # The quantization table already tells how hard it was compressed, so
+                # skip the full decode the crop needs and decode at 1/2-1/8 scale
+                image.draft('L', (ANALYSIS_SIZE * 2, ANALYSIS_SIZE * 2))
+        gray = image.convert('L')
+
+    width, height = size
+    crop = None
+    if jpeg_quality is None and width >= ANALYSIS_SIZE and height >= ANALYSIS_SIZE:
+        left = (width - ANALYSIS_SIZE) // 2 // BLOCK_SIZE * BLOCK_SIZE
+        top = (height - ANALYSIS_SIZE) // 2 // BLOCK_SIZE * BLOCK_SIZE
+        crop = np.asarray(gray.crop((left, top, left + ANALYSIS_SIZE, top + ANALYSIS_SIZE)))
+    thumbnail = gray.resize((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    return np.asarray(thumbnail), crop, size, jpeg_quality
+
+
+def laplacian_variance(thumbnail):
+    """Variance of the 4-neighbour Laplacian of a grayscale image: low means blurred"""
+    pixels = thumbnail.astype(np.float32)
+    laplacian = (4 * pixels[1:-1, 1:-1] - pixels[:-2, 1:-1] - pixels[2:, 1:-1]
+                 - pixels[1:-1, :-2] - pixels[1:-1, 2:])
+    return float(laplacian.var())
+
+
+def blockiness(crop):
+    """Mean pixel step across 8x8 block edges over the mean step inside blocks
+
+    About 1 for images without compression artefacts; heavy JPEG compression
+    leaves visible block edges and pushes it towards 2 and beyond.
+    """
+    pixels = crop.astype(np.float32)
+    ratios = []
+    for steps in (np.abs(np.diff(pixels, axis=1)), np.abs(np.diff(pixels, axis=0)).T):
+        # steps[:, j] lies between pixels j and j + 1; block edges are at j = 7, 15, ...
+        edge = (np.arange(steps.shape[1]) + 1) % BLOCK_SIZE == 0
+        # The offset keeps smooth (blurred or flat) regions from reading as blocky
+        ratios.append((steps[:, edge].mean() + 2.0) / (steps[:, ~edge].mean() + 2.0))
+    return float(sum(ratios) / 2)
+
+
+def _clamp(value):
+    return min(100.0, max(0.0, value))
+
+
+def resolution_score(width, height):
+    pixels = max(width * height, 1)
+    return _clamp(100 * math.log(pixels / MIN_PIXELS) / math.log(FULL_PIXELS / MIN_PIXELS))
+
+
+def sharpness_score(variance):
+    """0 for a flat image, about 67 at variance 100 (soft) and 100 from 1000 (crisp)"""
+    return _clamp(100 * math.log10(1 + variance) / 3)
+
+
+def compression_score(block_ratio, jpeg_quality):
+    """The lower of the blockiness and encoder-quality estimates; None when neither applies"""
+    scores = []
+    if block_ratio is not None:
+        scores.append(_clamp(100 * (1 - (block_ratio - 1) / 2)))
+    if jpeg_quality is not None:
+        scores.append(float(jpeg_quality))
+    return min(scores) if scores else None
+
+
+def score_analysis(analysis):
+    """Quality report for a load_analysis() result"""
+    thumbnail, crop, (width, height), jpeg_quality = analysis
+    variance = laplacian_variance(thumbnail)
+    ratio = None if crop is None else blockiness(crop)
+    components = {
+        'resolution': resolution_score(width, height),
+        'sharpness': sharpness_score(variance),
+        'compression': compression_score(ratio, jpeg_quality)
+    }
+    # Weights are renormalised over the components that could be measured
+    measured = {name: value for name, value in components.items() if value is not None}
+    total = sum(WEIGHTS[name] * value for name, value in measured.items()) / sum(WEIGHTS[name] for name in measured)
+    return {
+        'quality_score': int(round(total)),
+        'quality': {
+            **{name: None if value is None else int(round(value)) for name, value in components.items()},
+            'laplacian_variance': round(variance, 1),
+            'blockiness': None if ratio is None else round(ratio, 3),
+            'jpeg_quality': jpeg_quality
+        },
+        'actual_width': width,
+        'actual_height': height
+    }
+
+
+def score_image(data):
+    """Quality report for image bytes"""
+    return score_analysis(load_analysis(data))
+
+
+class ImageQualityAnalyzer:
+    """Measured quality scores (0-100) for scraped images
+
+    Each image is scored on resolution, sharpness (variance of the Laplacian
+    of a 256x256 thumbnail) and compression artefacts (JPEG block-edge
+    strength on a full-resolution centre crop, or for JPEGs the quality the
+    encoder used). Each pool thread fetches, decodes and scores one image with
+    whole-array NumPy operations; Pillow and NumPy release the GIL, so the
+    work spreads over cores. Reports are cached by the SHA-1 of the image
+    bytes, so a picture served under several URLs is analysed once, and each
+    URL remembers its digest so repeat scrapes skip the download.
+    """
+
+    def __init__(self, max_workers=8, max_bytes=20 * 1024 * 1024, cache_ttl=24 * 3600, cache_size=20000):
+        self.max_bytes = max_bytes
+        self.reports = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self.digests = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-quality')
+        self._local = threading.local()
+
+    def _file_handler(self):
+        """Each pool thread keeps its own FileHandler (and requests.Session)"""
+        from utils.file_handler import FileHandler
+
+        handler = getattr(self._local, 'file_handler', None)
+        if handler is None:
+            handler = self._local.file_handler = FileHandler()
+        return handler
+
+    def _score(self, url):
+        """Fetch and score one image in a pool thread; bytes analysed before reuse their report"""
+        data = self._file_handler().fetch_bytes(url, max_bytes=self.max_bytes)
+        digest = hashlib.sha1(data).hexdigest()
+        report = self.reports.get(digest)
+        if report is None:
+            try:
+                report = score_image(data)
+            except Exception as e:
+                raise Exception(f"Error decoding image: {str(e)}")
+            report['bytes'] = len(data)
+            self.reports.set(digest, report)
+        self.digests.set(url, digest)
+        return report
+
+    def score_items(self, items):
+        """Attach 'quality_score' and a 'quality' breakdown to image results, or 'quality_error'"""
+        pending = []
+        for item in items:
+            report = self.reports.get(self.digests.get(item['src']))
+            if report is not None:
+                self._apply(item, report)
+            else:
+                pending.append((item, submit_in_context(self._executor, self._score, item['src'])))
+
+        for item, future in pending:
+            try:
+                self._apply(item, future.result())
+            except Exception as e:
+                item['quality_error'] = str(e)
+        return items
+
+    def _apply(self, item, report):
+        for key, value in report.items():
+            if key in ('quality_score', 'quality') or item.get(key) is None:
+                item[key] = value
+
+
+def rank_by_quality(items, min_quality=None):
+    """Best first; with min_quality, drop images scored below it (and those that could not be scored)"""
+    if min_quality is not None:
+        items = [item for item in items if item.get('quality_score') is not None and item['quality_score'] >= min_quality]
+    return sorted(items, key=lambda item: -1 if item.get('quality_score') is None else item['quality_score'], reverse=True)
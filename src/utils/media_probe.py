@@ -0,0 +1,176 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from utils.cache import TTLCache
+from utils.circuit_breaker import CircuitOpenError
+from utils.deadline import DeadlineExceeded, submit_in_context
+from utils.fetcher import Fetcher
+
+class MediaProbe:
+    """Read size, MIME type and real dimensions of media without downloading it
+
+    Each URL gets a HEAD request; images additionally get a small ranged GET
+    whose bytes are handed to Pillow, which only parses the file header.
+    Results are cached per URL and probes run concurrently in a thread pool.
+    """
+
+    def __init__(self, max_workers=8, header_bytes=64 * 1024, cache_ttl=3600, cache_size=10000, timeout=10,
+                 failure_ttl=60):
+        self.header_bytes = header_bytes
+        self.timeout = timeout
+        self.failure_ttl = failure_ttl
+        self.cache = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='media-probe')
+        self._local = threading.local()
+
+    def _fetcher(self):
+        """Each pool thread keeps its own Fetcher and requests.Session"""
+        fetcher = getattr(self._local, 'fetcher', None)
+        if fetcher is None:
+            fetcher = self._local.fetcher = Fetcher()
+        return fetcher
+
+    def probe(self, url, read_dimensions=True):
+        """Probe a single URL, using the cache when possible"""
+        key = (url, read_dimensions)
+        info = self.cache.get(key)
+        if info is None:
+            info, transient = self._probe(url, read_dimensions)
+            # Failures are remembered briefly; a request's own deadline or an open
+            # circuit says nothing about the URL, so those are not cached at all
+            if 'probe_error' not in info:
+                self.cache.set(key, info)
+            elif not transient:
+                self.cache.set(key, info, ttl=self.failure_ttl)
+        return info
+
+    def probe_items(self, items, read_dimensions=True):
+        """Probe a list of image/video results concurrently and attach the results
+
+        Each item gains 'bytes', 'mime_type', 'actual_width' and 'actual_height'
+        (None when unknown) and 'probe_error' if the probe failed.
+        """
+        futures = [submit_in_context(self._executor, self.probe, item['src'], read_dimensions) for item in items]
+        for item, future in zip(items, futures):
+            item.update(future.result())
+        return items
+
+    def _probe(self, url, read_dimensions):
+        """Return (info, transient): transient is True when the probe failed for reasons unrelated to the URL"""
+        info = {
+            'bytes': None,
+            'mime_type': None,
+            'actual_width': None,
+            'actual_height': None
+        }
+        fetcher = self._fetcher()
+
+        try:
+            response = fetcher.head(url, timeout=self.timeout)
+            if response.ok:
+                info['bytes'] = self._content_length(response)
+                info['mime_type'] = self._content_type(response)
+
+            if read_dimensions and (info['mime_type'] or 'image/').startswith('image/'):
+                self._read_header(fetcher, url, info)
+        except Exception as e:
+            info['probe_error'] = str(e)
+            return info, isinstance(e, (DeadlineExceeded, CircuitOpenError))
+
+        return info, False
+
+    def _read_header(self, fetcher, url, info):
+        """Fetch the first bytes of an image and let Pillow parse the dimensions"""
+        response = fetcher.get(
+            url,
+            headers={'Range': f'bytes=0-{self.header_bytes - 1}'},
+            timeout=self.timeout,
+            stream=True
+        )
+        try:
+            response.raise_for_status()
+            # Servers that ignore Range send the whole file; only read what we need
+            data = response.raw.read(self.header_bytes, decode_content=True)
+        finally:
+            response.close()
+
+        if info['bytes'] is None:
+            info['bytes'] = self._content_length(response)
+        if info['mime_type'] is None:
+            info['mime_type'] = self._content_type(response)
+
+        from PIL import Image
+        try:
+            with Image.open(BytesIO(data)) as image:
+                info['actual_width'], info['actual_height'] = image.size
+                if info['mime_type'] is None and image.format:
+                    info['mime_type'] = Image.MIME.get(image.format)
+        except Exception:
+            # Truncated or unsupported headers (e.g. SVG) simply leave dimensions unknown
+            pass
+
+    def _content_length(self, response):
+        """Total size from Content-Range (ranged responses) or Content-Length"""
+        content_range = response.headers.get('Content-Range', '')
+        if '/' in content_range:
+            total = content_range.rsplit('/', 1)[1]
+            if total.isdigit():
+                return int(total)
+        if response.status_code == 200:
+            length = response.headers.get('Content-Length', '')
+            if length.isdigit():
+                return int(length)
+        return None
+
+    def _content_type(self, response):
+        content_type = response.headers.get('Content-Type')
+        return content_type.split(';')[0].strip().lower() if content_type else None
+
+
+FILTER_KEYS = ('min_width', 'max_width', 'min_height', 'max_height', 'min_bytes', 'max_bytes')
+
+
+def parse_filters(filters):
+    """Return the size filters with every limit as a number; raises ValueError for anything else"""
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+    parsed = {}
+    for key in FILTER_KEYS:
+        value = filters.get(key)
+        if value is None:
+            continue
+        try:
+            if isinstance(value, bool):
+                raise TypeError
+            parsed[key] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"filters.{key} must be a number")
+    return parsed
+
+
+def filter_probed(items, filters):
+    """Drop probed items outside the min/max width, height and byte limits
+
+    Items whose value is unknown are kept so a failed probe never hides results.
+    """
+    filters = parse_filters(filters)
+    limits = [
+        ('actual_width', filters.get('min_width'), filters.get('max_width')),
+        ('actual_height', filters.get('min_height'), filters.get('max_height')),
+        ('bytes', filters.get('min_bytes'), filters.get('max_bytes'))
+    ]
+
+    kept = []
+    for item in items:
+        keep = True
+        for field, minimum, maximum in limits:
+            value = item.get(field)
+            if value is None:
+                continue
+            if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+                keep = False
+                break
+        if keep:
+            kept.append(item)
+    return kept
@@ -0,0 +1,177 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Odd 64-bit constants for combining word hashes into shingle hashes
+SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX_2 = np.uint64(0x94D049BB133111EB)
+BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+
+
+def _mix64(values):
+    """splitmix64 finaliser applied element-wise, spreads entropy over all 64 bits"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * MIX_1
+    values = values ^ (values >> np.uint64(27))
+    values = values * MIX_2
+    return values ^ (values >> np.uint64(31))
+
+
+class SimHasher:
+    """64-bit SimHash over word shingles, vectorised with NumPy
+
+    Each distinct word is hashed once (blake2b, stable across processes and
+    machines); shingle hashes are then combined and bit-counted as arrays.
+    """
+
+    def __init__(self, shingle_size=4, vocabulary_limit=500000):
+        self.shingle_size = shingle_size
+        self.vocabulary_limit = vocabulary_limit
+        self._word_hashes = {}
+        self._lock = threading.Lock()
+
+    def _hash_words(self, words):
+        cache = self._word_hashes
+        hashes = np.empty(len(words), dtype=np.uint64)
+        for i, word in enumerate(words):
+            value = cache.get(word)
+            if value is None:
+                value = int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+                if len(cache) < self.vocabulary_limit:
+                    with self._lock:
+                        cache[word] = value
+            hashes[i] = value
+        return hashes
+
+    def fingerprint(self, text):
+        """Return the 64-bit SimHash of text as a Python int (0 for empty text)"""
+        words = TOKEN_PATTERN.findall(text.lower())
+        if not words:
+            return 0
+
+        word_hashes = self._hash_words(words)
+        size = min(self.shingle_size, len(words))
+        count = len(words) - size + 1
+
+        with np.errstate(over='ignore'):
+            shingles = np.zeros(count, dtype=np.uint64)
+            for offset in range(size):
+                shingles = shingles * SHINGLE_MULTIPLIER + word_hashes[offset:offset + count]
+            shingles = _mix64(shingles)
+
+        # (count, 64) matrix of bits; a fingerprint bit is set when most shingles set it
+        bits = (shingles[:, None] >> BIT_POSITIONS) & np.uint64(1)
+        votes = bits.sum(axis=0, dtype=np.int64) * 2 > count
+        return int(np.sum(votes.astype(np.uint64) << BIT_POSITIONS, dtype=np.uint64))
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """In-process LSH index that finds fingerprints within max_distance bits
+
+    The 64-bit fingerprint is split into max_distance + 1 bands; by the
+    pigeonhole principle two fingerprints within max_distance bits share at
+    least one identical band, so only documents sharing a band are compared.
+    At most max_entries documents are kept; the least recently indexed or
+    matched one is evicted first.
+    """
+
+    def __init__(self, max_distance=6, shingle_size=4, max_entries=100000):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.hasher = SimHasher(shingle_size)
+        self.bands = max_distance + 1
+        self.band_bits = 64 // self.bands
+        self._band_mask = (1 << self.band_bits) - 1
+        self._tables = [dict() for _ in range(self.bands)]
+        self._fingerprints = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def _band_keys(self, fingerprint):
+        return [(fingerprint >> (band * self.band_bits)) & self._band_mask for band in range(self.bands)]
+
+    def add(self, doc_id, fingerprint):
+        """Index a fingerprint under doc_id"""
+        with self._lock:
+            self._add(doc_id, fingerprint)
+
+    def _add(self, doc_id, fingerprint):
+        previous = self._fingerprints.get(doc_id)
+        if previous == fingerprint:
+            self._fingerprints.move_to_end(doc_id)
+            return
+        if previous is not None:
+            # The page changed since it was indexed; drop its old band entries
+            self._remove_bands(doc_id, previous)
+        self._fingerprints[doc_id] = fingerprint
+        self._fingerprints.move_to_end(doc_id)
+        for table, key in zip(self._tables, self._band_keys(fingerprint)):
+            table.setdefault(key, []).append(doc_id)
+        while len(self._fingerprints) > self.max_entries:
+            evicted, evicted_fingerprint = self._fingerprints.popitem(last=False)
+            self._remove_bands(evicted, evicted_fingerprint)
+
+    def _remove_bands(self, doc_id, fingerprint):
+        for table, key in zip(self._tables, self._band_keys(fingerprint)):
+            bucket = table[key]
+            bucket.remove(doc_id)
+            if not bucket:
+                del table[key]
+
+    def query(self, fingerprint):
+        """Return [(doc_id, distance)] for indexed documents within max_distance, nearest first"""
+        with self._lock:
+            return self._query(fingerprint)
+
+    def _query(self, fingerprint):
+        candidates = set()
+        for table, key in zip(self._tables, self._band_keys(fingerprint)):
+            candidates.update(table.get(key, ()))
+
+        matches = []
+        for doc_id in candidates:
+            distance = hamming_distance(fingerprint, self._fingerprints[doc_id])
+            if distance <= self.max_distance:
+                matches.append((doc_id, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+    def check(self, doc_id, text):
+        """Fingerprint text, index it and return (fingerprint, duplicate_of or None)
+
+        duplicate_of is the closest previously indexed document; near
+        duplicates are not added themselves so the index keeps one original.
+        """
+        fingerprint = self.hasher.fingerprint(text)
+        if not fingerprint:
+            # Empty pages would all collide; never treat them as duplicates
+            return fingerprint, None
+
+        with self._lock:
+            matches = [match for match in self._query(fingerprint) if match[0] != doc_id]
+            if matches:
+                # An original that keeps being copied stays in the index
+                self._fingerprints.move_to_end(matches[0][0])
+                return fingerprint, matches[0][0]
+            self._add(doc_id, fingerprint)
+        return fingerprint, None
+
+
+def flag_near_duplicate(index, content):
+    """Add 'fingerprint' and 'near_duplicate_of' to a scrape_content() result using index"""
+    fingerprint, duplicate_of = index.check(content['url'], content['full_text'])
+    content['fingerprint'] = f"{fingerprint:016x}"
+    content['near_duplicate_of'] = duplicate_of
+    return content
@@ -0,0 +1,163 @@
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.deadline import DeadlineExceeded, current_deadline
+
+# kind -> (module, class, method, constructor options) run inside the worker processes.
+# Workers never touch the network: linked stylesheets are reported back, not fetched.
+PARSERS = {
+    'images': ('scraper.image_scraper', 'ImageScraper', 'scrape_images', {}),
+    'videos': ('scraper.video_scraper', 'VideoScraper', 'scrape_videos', {}),
+    'content': ('scraper.content_scraper', 'ContentScraper', 'scrape_content', {}),
+    'urls': ('scraper.url_scraper', 'URLScraper', 'scrape_urls', {})
+}
+
+_worker_scrapers = {}
+
+
+def _resident_memory():
+    """Current resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _parse_in_worker(kind, url, html):
+    """Run one extractor in a worker process; returns (result, extra, resident bytes)"""
+    scraper = _worker_scrapers.get(kind)
+    if scraper is None:
+        import importlib
+        module_name, class_name, _, options = PARSERS[kind]
+        scraper = _worker_scrapers[kind] = getattr(importlib.import_module(module_name), class_name)(**options)
+
+    method = getattr(scraper, PARSERS[kind][2])
+    if kind == 'images':
+        stylesheet_links = []
+        result = method(url, html, stylesheet_links=stylesheet_links)
+        return result, stylesheet_links, _resident_memory()
+    return method(url, html), None, _resident_memory()
+
+
+class ParsePool:
+    """Persistent process pool that runs the CPU-bound HTML extraction off the GIL
+
+    Callers fetch pages in their own threads and hand the raw HTML to parse()
+    or parse_many(); results come back as the same dicts the scrapers return.
+    Each worker is replaced after max_tasks_per_child pages, and the whole
+    pool is recycled when a worker reports more than max_memory_mb resident,
+    so lxml/BeautifulSoup memory growth stays bounded.
+    """
+
+    def __init__(self, max_workers=None, max_tasks_per_child=200, max_memory_mb=512, timeout=60):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_memory = max_memory_mb * 1024 * 1024
+        self.timeout = timeout
+        self.recycled = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        atexit.register(self.close)
+
+    def _new_executor(self):
+        # fork is unsafe in a threaded web worker; forkserver/spawn start clean processes
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        try:
+            return ProcessPoolExecutor(self.max_workers, mp_context=context,
+                                       max_tasks_per_child=self.max_tasks_per_child)
+        except TypeError:
+            # Python < 3.11 has no max_tasks_per_child; the memory cap still recycles the pool
+            return ProcessPoolExecutor(self.max_workers, mp_context=context)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            return self._executor
+
+    def _recycle(self, executor, kill=False):
+        """Replace executor with a fresh pool; running tasks of the old one finish unless kill is set"""
+        with self._lock:
+            current = self._executor is executor
+            if current:
+                self._executor = None
+                self.recycled += 1
+        if not current and not kill:
+            return
+        if kill:
+            # A parse stuck past its timeout would otherwise pin a core until the process exits
+            for process in list((getattr(executor, '_processes', None) or {}).values()):
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reap_later(self, executor, futures, started):
+        """Kill executor's workers if futures a caller gave up on are still running timeout seconds after started"""
+        def reap():
+            if any(not future.done() for future in futures):
+                self._recycle(executor, kill=True)
+
+        timer = threading.Timer(max(0.0, started + self.timeout - time.monotonic()), reap)
+        timer.daemon = True
+        timer.start()
+
+    def parse(self, kind, url, html):
+        """Extract one page in the pool and return what the scraper's scrape_* method returns"""
+        return self.parse_many([(kind, url, html)])[0]
+
+    def parse_many(self, jobs):
+        """Extract several (kind, url, html) jobs in parallel, results in job order
+
+        images jobs return (images, stylesheet_links); other kinds return the
+        scraper result itself. A job that fails raises its exception here.
+        """
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                started = time.monotonic()
+                futures = [executor.submit(_parse_in_worker, kind, url, html) for kind, url, html in jobs]
+                deadline = current_deadline()
+                timeout = self.timeout if deadline is None else min(self.timeout, deadline.remaining())
+                done, pending = wait(futures, timeout=timeout)
+                if pending and timeout < self.timeout:
+                    # The request ran out of budget first: drop the jobs that have not
+                    # started, and kill the workers later if the rest outlive the parse timeout
+                    running = [future for future in pending if not future.cancel()]
+                    if running:
+                        self._reap_later(executor, running, started)
+                    raise DeadlineExceeded(f"Request deadline of {deadline.seconds:g}s exceeded while parsing")
+                if pending:
+                    self._recycle(executor, kill=True)
+                    raise TimeoutError()
+
+                results, oversized = [], False
+                for (kind, _, _), future in zip(jobs, futures):
+                    result, extra, resident = future.result()
+                    oversized = oversized or resident > self.max_memory
+                    results.append((result, extra) if kind == 'images' else result)
+                if oversized:
+                    self._recycle(executor)
+                return results
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a fresh pool and retry once
+                self._recycle(executor)
+                if attempt:
+                    raise Exception("Error parsing page: parse worker crashed")
+            except TimeoutError:
+                raise Exception(f"Error parsing page: no result within {self.timeout}s")
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,131 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+
+# Frames that mean the scrape was blocked waiting on the network
+NETWORK_FRAMES = ('socket.py:', 'ssl.py:', 'selectors.py:', 'connection.py:create_connection')
+
+# tracemalloc is process-wide: concurrent profiles would reset each other's peak
+# or stop tracing under one another, so profiled runs take turns
+_profile_lock = threading.Lock()
+
+
+class ScrapeProfiler:
+    """Run a single scrape under cProfile, a stack sampler and tracemalloc
+
+    Only one profiled run measures at a time; others wait for it. Stored
+    profiles are reported as /profiles/<name> download URLs.
+    """
+
+    def __init__(self, output_folder='downloads/profiles', sample_interval=0.005, top_n=25):
+        self.output_folder = output_folder
+        self.sample_interval = sample_interval
+        self.top_n = top_n
+        os.makedirs(self.output_folder, exist_ok=True)
+
+    def profile(self, func, *args, **kwargs):
+        """Call func(*args, **kwargs) and return (result, profile_report)"""
+        profile_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        samples = Counter()
+        stop_event = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample_stacks,
+            args=(threading.get_ident(), samples, stop_event),
+            daemon=True
+        )
+
+        with _profile_lock:
+            tracing_memory = tracemalloc.is_tracing()
+            if not tracing_memory:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            sampler.start()
+            profiler.enable()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                wall_time = time.perf_counter() - started
+                stop_event.set()
+                sampler.join()
+                current_memory, peak_memory = tracemalloc.get_traced_memory()
+                if not tracing_memory:
+                    tracemalloc.stop()
+
+        pstats_path = os.path.join(self.output_folder, f"{profile_id}.pstats")
+        collapsed_path = os.path.join(self.output_folder, f"{profile_id}.collapsed")
+        profiler.dump_stats(pstats_path)
+        self._write_collapsed(collapsed_path, samples)
+
+        report = {
+            'profile_id': profile_id,
+            'wall_time': round(wall_time, 4),
+            'peak_memory_bytes': peak_memory,
+            'samples': sum(samples.values()),
+            'time_breakdown': self._time_breakdown(samples),
+            'top_functions': self._top_functions(profiler),
+            'pstats_url': f"/profiles/{os.path.basename(pstats_path)}",
+            'collapsed_url': f"/profiles/{os.path.basename(collapsed_path)}"
+        }
+        return result, report
+
+    def _sample_stacks(self, thread_id, samples, stop_event):
+        """Periodically record the target thread's stack in collapsed form"""
+        while not stop_event.wait(self.sample_interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            samples[';'.join(reversed(stack))] += 1
+
+    def _write_collapsed(self, path, samples):
+        """Write samples in the collapsed-stack format used by flamegraph tools"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _time_breakdown(self, samples):
+        """Split sampled time into network wait and everything else"""
+        total = sum(samples.values())
+        if not total:
+            return {'network': 0.0, 'cpu': 0.0}
+
+        network = 0
+        for stack, count in samples.items():
+            if any(marker in stack for marker in NETWORK_FRAMES):
+                network += count
+
+        return {
+            'network': round(network / total, 3),
+            'cpu': round((total - network) / total, 3)
+        }
+
+    def _top_functions(self, profiler):
+        """Return the most expensive functions by cumulative time"""
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        entries = []
+        for (filename, line, name), (cc, nc, tottime, cumtime, callers) in stats.stats.items():
+            entries.append({
+                'function': f"{os.path.basename(filename)}:{line}({name})",
+                'calls': nc,
+                'total_time': round(tottime, 4),
+                'cumulative_time': round(cumtime, 4)
+            })
+
+        entries.sort(key=lambda entry: entry['cumulative_time'], reverse=True)
+        return entries[:self.top_n]
@@ -0,0 +1,235 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from utils.deadline import DeadlineExceeded, current_deadline, submit_in_context
+
+# Status codes that mean the host wants us to slow down
+BACKOFF_STATUSES = (429, 503)
+
+
+def get_host(url):
+    """Return the lower-cased host:port a URL points at"""
+    return urlparse(url).netloc.lower()
+
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Classic token bucket refilled at `rate` tokens per second"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now):
+        """Take a token and return 0, or return the seconds until one is available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class HostState:
+    """Rate, concurrency and backoff bookkeeping for a single host"""
+
+    def __init__(self, rate, burst, max_concurrency):
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.failures = 0
+
+
+class HostScheduler:
+    """Politeness scheduler shared by every fetch in the process
+
+    Each host gets a token bucket (requests per second plus a burst allowance)
+    and a cap on concurrent requests. 429/503 responses halve the host's rate
+    and honour Retry-After; successful responses slowly restore it.
+    """
+
+    def __init__(self, rate=2.0, burst=5, max_concurrency=4, min_rate=0.1, max_backoff=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_rate = min_rate
+        self.max_backoff = max_backoff
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = HostState(self.rate, self.burst, self.max_concurrency)
+            return state
+
+    def acquire(self, url):
+        """Block until a request to url's host is allowed
+
+        Under a request deadline the wait is given up (DeadlineExceeded) as
+        soon as it is clear the slot would come too late.
+        """
+        state = self._state(get_host(url))
+        deadline = current_deadline()
+        if deadline is None:
+            state.slots.acquire()
+        elif not state.slots.acquire(timeout=deadline.remaining()):
+            raise DeadlineExceeded(f"Request deadline of {deadline.seconds:g}s exceeded waiting for {get_host(url)}")
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    delay = state.blocked_until - now
+                    if delay <= 0:
+                        delay = self._take_token(state, now)
+                    if delay <= 0:
+                        state.in_flight += 1
+                        return
+                if deadline is not None and delay > deadline.remaining():
+                    raise DeadlineExceeded(f"Request deadline of {deadline.seconds:g}s exceeded waiting for {get_host(url)}")
+                time.sleep(delay)
+        except BaseException:
+            state.slots.release()
+            raise
+
+    def _take_token(self, state, now):
+        """Take a request token from the host's bucket; returns 0 or the seconds to wait (lock held)"""
+        return state.bucket.try_take(now)
+
+    def release(self, url):
+        """Give back the concurrency slot taken by acquire()"""
+        state = self._state(get_host(url))
+        with self._lock:
+            state.in_flight -= 1
+        state.slots.release()
+
+    @contextmanager
+    def slot(self, url):
+        """Context manager wrapping acquire()/release()"""
+        self.acquire(url)
+        try:
+            yield
+        finally:
+            self.release(url)
+
+    def record_response(self, url, status_code, retry_after=None):
+        """Adapt the host's rate to the response it just gave"""
+        state = self._state(get_host(url))
+        with self._lock:
+            bucket = state.bucket
+            if status_code in BACKOFF_STATUSES:
+                state.failures += 1
+                bucket.rate = max(self.min_rate, bucket.rate / 2)
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = min(self.max_backoff, 2 ** state.failures)
+                state.blocked_until = max(state.blocked_until, time.monotonic() + min(delay, self.max_backoff))
+            else:
+                state.failures = 0
+                # Additive increase back towards the configured rate
+                bucket.rate = min(self.rate, bucket.rate + self.rate * 0.1)
+
+    def host_stats(self):
+        """Return the current rate and in-flight count for every known host"""
+        with self._lock:
+            return {
+                host: {
+                    'rate': round(state.bucket.rate, 3),
+                    'in_flight': state.in_flight,
+                    'blocked_for': round(max(0.0, state.blocked_until - time.monotonic()), 3)
+                }
+                for host, state in self._hosts.items()
+            }
+
+    def fair_order(self, urls):
+        """Interleave URLs round-robin by host so no host is hit back to back"""
+        queues = {}
+        for url in urls:
+            queues.setdefault(get_host(url), deque()).append(url)
+
+        ordered = []
+        while queues:
+            for host in list(queues):
+                ordered.append(queues[host].popleft())
+                if not queues[host]:
+                    del queues[host]
+        return ordered
+
+    def run_batch(self, func, urls, max_workers=8):
+        """Run func(url) for every URL and yield (url, result, error) as they finish
+
+        URLs are fair-queued per host: a worker is only handed a URL whose host
+        has a free concurrency slot, so a slow or throttled host never ties up
+        the whole pool while other hosts sit idle.
+        """
+        queues = {}
+        for url in urls:
+            queues.setdefault(get_host(url), deque()).append(url)
+        hosts = deque(queues)
+        running = {}
+        per_host = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while hosts or running:
+                # Hand out work round-robin across hosts with spare capacity
+                checked = 0
+                while hosts and len(running) < max_workers and checked < len(hosts):
+                    host = hosts[0]
+                    hosts.rotate(-1)
+                    checked += 1
+                    if per_host.get(host, 0) >= self.max_concurrency:
+                        continue
+                    url = queues[host].popleft()
+                    if not queues[host]:
+                        del queues[host]
+                        hosts.remove(host)
+                    per_host[host] = per_host.get(host, 0) + 1
+                    running[submit_in_context(executor, func, url)] = (url, host)
+                    checked = 0
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, host = running.pop(future)
+                    per_host[host] -= 1
+                    error = future.exception()
+                    yield url, (None if error else future.result()), error
+
+
+_default_scheduler = HostScheduler()
+
+
+def get_default_scheduler():
+    """Return the process-wide scheduler shared by all fetchers"""
+    return _default_scheduler
+
+
+def configure_default_scheduler(scheduler=None, **settings):
+    """Replace the process-wide scheduler with scheduler, or with one using the given settings"""
+    global _default_scheduler
+    _default_scheduler = scheduler or HostScheduler(**settings)
+    return _default_scheduler
@@ -0,0 +1,136 @@
+import base64
+import json
+
+# Response keys that are always returned, whatever fields were asked for
+ALWAYS_INCLUDED = ('type', 'url', 'result_id', 'from_store', 'fetched_at', 'profile')
+
+
+def parse_fields(fields):
+    """Turn 'images.src,urls.totals' (or a list of paths) into a nested field tree
+
+    An empty subtree means 'the whole value'. Returns None when no fields were given.
+    """
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+
+    paths = [[part for part in path.strip().split('.') if part] for path in fields]
+    tree = {}
+    # Shorter paths first, so a field selected whole is never narrowed by a longer path
+    for parts in sorted(paths, key=len):
+        node = tree
+        for part in parts:
+            if part in node:
+                node = node[part]
+                if not node:
+                    break
+            else:
+                node = node.setdefault(part, {})
+    return tree or None
+
+
+def select_fields(value, tree, top_level=True):
+    """Return a copy of value keeping only the fields in tree; lists are filtered per item"""
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [select_fields(item, tree, False) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    selected = {}
+    for key, subtree in tree.items():
+        if key in value:
+            selected[key] = select_fields(value[key], subtree, False)
+    if top_level:
+        for key in ALWAYS_INCLUDED:
+            if key in value:
+                selected[key] = value[key]
+    return selected
+
+
+def subtree(tree, path):
+    """The part of a field tree that applies below path ('images' -> {'src': {}})"""
+    node = tree
+    for part in path.split('.'):
+        if not node:
+            return None
+        node = node.get(part)
+        if node is None:
+            return None
+    return node or None
+
+
+def encode_cursor(token, path, offset, page_size, fields=None):
+    """Opaque cursor for the next page of one array in a cached result"""
+    state = {'t': token, 'p': path, 'o': offset, 'n': page_size}
+    if fields:
+        state['f'] = fields
+    raw = json.dumps(state, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        state = json.loads(raw)
+        return state['t'], state['p'], int(state['o']), int(state['n']), state.get('f')
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def paginate(payload, page_size, token, fields=None, path=''):
+    """Cut every array longer than page_size down to its first page
+
+    Returns (payload, pages) where pages maps each cut array's dotted path to
+    {'total': n, 'next_cursor': cursor}. Arrays inside list items are left
+    alone; only arrays reachable through dicts (images, content.paragraphs,
+    urls.internal_links, ...) are paged.
+    """
+    pages = {}
+    if not isinstance(payload, dict):
+        return payload, pages
+
+    shaped = {}
+    for key, value in payload.items():
+        child_path = f'{path}.{key}' if path else key
+        if isinstance(value, list) and len(value) > page_size:
+            shaped[key] = value[:page_size]
+            pages[child_path] = {
+                'total': len(value),
+                'next_cursor': encode_cursor(token, child_path, page_size, page_size, fields)
+            }
+        elif isinstance(value, dict):
+            shaped[key], child_pages = paginate(value, page_size, token, fields, child_path)
+            pages.update(child_pages)
+        else:
+            shaped[key] = value
+    return shaped, pages
+
+
+def page_of(payload, cursor):
+    """Return the page of a full (unshaped) result that cursor points at"""
+    token, path, offset, page_size, fields = decode_cursor(cursor)
+
+    value = payload
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            raise ValueError("Invalid cursor")
+        value = value[part]
+    if not isinstance(value, list):
+        raise ValueError("Invalid cursor")
+
+    items = value[offset:offset + page_size]
+    tree = subtree(parse_fields(fields), path) if fields else None
+    if tree:
+        items = select_fields(items, tree, False)
+
+    next_offset = offset + page_size
+    return {
+        'path': path,
+        'items': items,
+        'offset': offset,
+        'total': len(value),
+        'next_cursor': encode_cursor(token, path, next_offset, page_size, fields) if next_offset < len(value) else None
+    }
@@ -0,0 +1,366 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.rate_limiter import get_host
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    host TEXT NOT NULL,
+    scrape_type TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    latest INTEGER NOT NULL DEFAULT 1,
+    title TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_url ON pages (url, scrape_type, fetched_at);
+CREATE INDEX IF NOT EXISTS pages_host ON pages (host, scrape_type, latest);
+
+CREATE TABLE IF NOT EXISTS links (
+    id INTEGER PRIMARY KEY,
+    page_id INTEGER NOT NULL REFERENCES pages (id) ON DELETE CASCADE,
+    host TEXT NOT NULL,
+    category TEXT NOT NULL,
+    url TEXT NOT NULL,
+    text TEXT,
+    file_type TEXT
+);
+CREATE INDEX IF NOT EXISTS links_page ON links (page_id);
+CREATE INDEX IF NOT EXISTS links_host ON links (host, category, file_type);
+CREATE INDEX IF NOT EXISTS links_file_type ON links (file_type) WHERE file_type IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS media (
+    id INTEGER PRIMARY KEY,
+    page_id INTEGER NOT NULL REFERENCES pages (id) ON DELETE CASCADE,
+    host TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    alt TEXT,
+    phash TEXT
+);
+CREATE INDEX IF NOT EXISTS media_page ON media (page_id);
+CREATE INDEX IF NOT EXISTS media_host ON media (host, kind);
+"""
+
+# Paragraph search; page_id and position are stored but not tokenised
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS paragraphs USING fts5 (
+    text, page_id UNINDEXED, position UNINDEXED, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Paragraph rowids are page_id << 20 | position, so one page's paragraphs are a rowid range
+PARAGRAPH_ID_BITS = 20
+
+LINK_CATEGORIES = {
+    'internal_links': 'internal',
+    'external_links': 'external',
+    'email_links': 'email',
+    'tel_links': 'tel',
+    'file_links': 'file',
+    'social_links': 'social'
+}
+
+
+class ResultsStore:
+    """SQLite store of scrape results keyed by URL, scrape type and fetch time
+
+    Every scrape is kept as a JSON snapshot; the newest snapshot per URL and
+    type is also broken out into indexed link, media and full-text paragraph
+    tables for site-wide queries. Each thread uses its own connection and the
+    database runs in WAL mode, so readers never block the writer.
+    """
+
+    def __init__(self, path='downloads/results.db', keep_snapshots=5):
+        self.path = path
+        self.keep_snapshots = keep_snapshots
+        self._local = threading.local()
+        self._image_index = None
+        self._image_index_last_id = 0
+        self._image_index_lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.has_fts = self._create_schema(self._connection())
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            self._local.connection = connection
+        return connection
+
+    def _create_schema(self, connection):
+        with connection:
+            connection.executescript(SCHEMA)
+            # Databases created before image hashes were stored
+            if 'phash' not in [row['name'] for row in connection.execute('PRAGMA table_info(media)')]:
+                connection.execute('ALTER TABLE media ADD COLUMN phash TEXT')
+        try:
+            with connection:
+                connection.executescript(FTS_SCHEMA)
+            return True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; search falls back to LIKE
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS paragraphs (text TEXT, page_id INTEGER, position INTEGER)')
+            return False
+
+    # Writing
+
+    def save(self, url, scrape_type, payload, fetched_at=None):
+        """Store a /scrape payload and index it; returns the snapshot id"""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        host = get_host(url)
+        title = (payload.get('content') or {}).get('title') if scrape_type == 'content' else None
+        document = json.dumps(payload, separators=(',', ':'))
+
+        connection = self._connection()
+        try:
+            with connection:
+                # Take the write lock before reading, so concurrent saves of one URL
+                # never both see the same latest rows and leave two snapshots latest
+                connection.execute('BEGIN IMMEDIATE')
+                previous = [row['id'] for row in connection.execute(
+                    'SELECT id FROM pages WHERE url = ? AND scrape_type = ? AND latest = 1', (url, scrape_type))]
+                if previous:
+                    # Only the newest snapshot stays broken out into the query tables
+                    self._drop_details(connection, previous)
+                    connection.executemany('UPDATE pages SET latest = 0 WHERE id = ?', [(i,) for i in previous])
+
+                page_id = connection.execute(
+                    'INSERT INTO pages (url, host, scrape_type, fetched_at, latest, title, payload) '
+                    'VALUES (?, ?, ?, ?, 1, ?, ?)',
+                    (url, host, scrape_type, fetched_at, title, document)
+                ).lastrowid
+                self._index(connection, page_id, host, scrape_type, payload)
+                self._prune(connection, url, scrape_type)
+        except Exception as e:
+            raise Exception(f"Error saving results: {str(e)}")
+        return page_id
+
+    def _index(self, connection, page_id, host, scrape_type, payload):
+        if scrape_type == 'urls':
+            rows = []
+            for key, category in LINK_CATEGORIES.items():
+                for link in (payload.get('urls') or {}).get(key, []):
+                    rows.append((page_id, host, category, link.get('url'), link.get('text'), link.get('file_type')))
+            connection.executemany(
+                'INSERT INTO links (page_id, host, category, url, text, file_type) VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+        elif scrape_type == 'images_videos':
+            rows = [(page_id, host, 'image', item.get('src'), item.get('alt'), item.get('phash'))
+                    for item in payload.get('images', [])]
+            rows.extend((page_id, host, 'video', item.get('src'), None, None) for item in payload.get('videos', []))
+            connection.executemany(
+                'INSERT INTO media (page_id, host, kind, url, alt, phash) VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+        elif scrape_type == 'content':
+            paragraphs = (payload.get('content') or {}).get('paragraphs', [])
+            base = page_id << PARAGRAPH_ID_BITS
+            connection.executemany(
+                'INSERT INTO paragraphs (rowid, text, page_id, position) VALUES (?, ?, ?, ?)',
+                [(base + i, text, page_id, i) for i, text in enumerate(paragraphs[:1 << PARAGRAPH_ID_BITS]) if text])
+
+    def _drop_details(self, connection, page_ids):
+        ids = [(page_id,) for page_id in page_ids]
+        connection.executemany('DELETE FROM links WHERE page_id = ?', ids)
+        connection.executemany('DELETE FROM media WHERE page_id = ?', ids)
+        # A rowid range delete; filtering FTS5 on an UNINDEXED column would scan the table
+        connection.executemany(
+            'DELETE FROM paragraphs WHERE rowid BETWEEN ? AND ?',
+            [(page_id << PARAGRAPH_ID_BITS, ((page_id + 1) << PARAGRAPH_ID_BITS) - 1) for page_id in page_ids])
+
+    def _prune(self, connection, url, scrape_type):
+        """Delete snapshots beyond keep_snapshots for one URL and type"""
+        connection.execute(
+            'DELETE FROM pages WHERE id IN (SELECT id FROM pages WHERE url = ? AND scrape_type = ? '
+            'ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)',
+            (url, scrape_type, self.keep_snapshots))
+
+    # Reading
+
+    def latest(self, url, scrape_type, max_age=None):
+        """Return the newest stored payload (with fetched_at) or None if missing or older than max_age"""
+        row = self._connection().execute(
+            'SELECT id, payload, fetched_at FROM pages WHERE url = ? AND scrape_type = ? '
+            'ORDER BY fetched_at DESC LIMIT 1', (url, scrape_type)).fetchone()
+        if row is None or (max_age is not None and time.time() - row['fetched_at'] > max_age):
+            return None
+        return self._payload(row)
+
+    def snapshot(self, page_id):
+        """Return one stored payload by snapshot id"""
+        row = self._connection().execute('SELECT id, payload, fetched_at FROM pages WHERE id = ?', (page_id,)).fetchone()
+        if row is None:
+            return None
+        return self._payload(row)
+
+    def _payload(self, row):
+        payload = json.loads(row['payload'])
+        payload['result_id'] = row['id']
+        payload['fetched_at'] = row['fetched_at']
+        return payload
+
+    def pages(self, host=None, scrape_type=None, url=None, limit=50, cursor=None):
+        """List stored snapshots, newest first; url returns that URL's history"""
+        clauses, params = [], []
+        if url:
+            clauses.append('url = ?')
+            params.append(url)
+        else:
+            clauses.append('latest = 1')
+        if host:
+            clauses.append('host = ?')
+            params.append(host.lower())
+        if scrape_type:
+            clauses.append('scrape_type = ?')
+            params.append(scrape_type)
+        return self._page(
+            'SELECT id, url, host, scrape_type, fetched_at, title FROM pages', clauses, params, limit, cursor, desc=True)
+
+    def links(self, host=None, category=None, file_type=None, limit=100, cursor=None):
+        """Links from the newest snapshot of every stored page, e.g. all PDFs on a site"""
+        clauses, params = [], []
+        if host:
+            clauses.append('links.host = ?')
+            params.append(host.lower())
+        if category:
+            clauses.append('category = ?')
+            params.append(category)
+        if file_type:
+            clauses.append('file_type = ?')
+            params.append(file_type.lower().lstrip('.'))
+        return self._page(
+            'SELECT links.id, links.url, text, category, file_type, pages.url AS page_url '
+            'FROM links JOIN pages ON pages.id = links.page_id',
+            clauses, params, limit, cursor, id_column='links.id')
+
+    def media(self, host=None, kind=None, limit=100, cursor=None):
+        """Images and videos from the newest snapshot of every stored page"""
+        clauses, params = [], []
+        if host:
+            clauses.append('media.host = ?')
+            params.append(host.lower())
+        if kind:
+            clauses.append('kind = ?')
+            params.append(kind)
+        return self._page(
+            'SELECT media.id, media.url, kind, alt, pages.url AS page_url '
+            'FROM media JOIN pages ON pages.id = media.page_id',
+            clauses, params, limit, cursor, id_column='media.id')
+
+    def similar_media(self, phash, max_distance=12, host=None, limit=50):
+        """Stored images whose perceptual hash is within max_distance bits of phash, nearest first
+
+        Hashes are held in an in-process hash index that picks up newly stored
+        images on each query; hits are looked up in the database, so images
+        from superseded snapshots are never returned.
+        """
+        connection = self._connection()
+        with self._image_index_lock:
+            self._refresh_image_index(connection)
+            matches = self._image_index.search(int(phash, 16), max_distance)
+
+        distances = dict(matches)
+        ids = list(distances)
+        items = []
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            sql = ('SELECT media.id, media.url, alt, phash, pages.url AS page_url '
+                   'FROM media JOIN pages ON pages.id = media.page_id '
+                   f'WHERE pages.latest = 1 AND media.id IN ({",".join("?" * len(chunk))})')
+            if host:
+                sql += ' AND media.host = ?'
+                chunk = chunk + [host.lower()]
+            items.extend(dict(row) for row in connection.execute(sql, chunk))
+
+        for item in items:
+            item['distance'] = distances[item['id']]
+        items.sort(key=lambda item: (item['distance'], item['id']))
+        return items[:limit]
+
+    def _refresh_image_index(self, connection):
+        """Add images stored since the last query; rebuild once deleted rows dominate the index"""
+        from utils.image_hash import HashIndex
+
+        if self._image_index is None:
+            self._image_index, self._image_index_last_id = HashIndex(), 0
+        rows = connection.execute('SELECT id, phash FROM media WHERE id > ? AND phash IS NOT NULL ORDER BY id',
+                                  (self._image_index_last_id,)).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            self._image_index.add(int(row['phash'], 16), row['id'])
+        self._image_index_last_id = rows[-1]['id']
+
+        # Rescrapes replace a page's media rows, leaving their old ids in the index
+        live = connection.execute('SELECT COUNT(*) FROM media WHERE phash IS NOT NULL').fetchone()[0]
+        if len(self._image_index) > 2 * live + 1000:
+            self._image_index = None
+            self._refresh_image_index(connection)
+
+    def search(self, query, host=None, limit=20, offset=0):
+        """Full-text search over stored paragraphs, best matches first"""
+        params = []
+        if self.has_fts:
+            sql = ('SELECT pages.url, pages.title, paragraphs.position, '
+                   "snippet(paragraphs, 0, '[', ']', '...', 24) AS snippet "
+                   'FROM paragraphs JOIN pages ON pages.id = paragraphs.page_id '
+                   'WHERE paragraphs MATCH ?')
+            params.append(self._fts_query(query))
+        else:
+            sql = ('SELECT pages.url, pages.title, paragraphs.position, paragraphs.text AS snippet '
+                   'FROM paragraphs JOIN pages ON pages.id = paragraphs.page_id WHERE paragraphs.text LIKE ?')
+            params.append(f'%{query}%')
+        if host:
+            sql += ' AND pages.host = ?'
+            params.append(host.lower())
+        sql += (' ORDER BY rank' if self.has_fts else '') + ' LIMIT ? OFFSET ?'
+        params.extend([limit + 1, offset])
+
+        try:
+            rows = [dict(row) for row in self._connection().execute(sql, params)]
+        except sqlite3.OperationalError as e:
+            raise Exception(f"Error searching results: {str(e)}")
+        has_more = len(rows) > limit
+        return {'items': rows[:limit], 'next_offset': offset + limit if has_more else None}
+
+    def _fts_query(self, query):
+        """Quote each term so user input is never parsed as FTS5 syntax"""
+        terms = [term.replace('"', '""') for term in query.split()]
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def _page(self, sql, clauses, params, limit, cursor, id_column='id', desc=False):
+        """Keyset pagination on the row id: cost stays flat however deep the client pages"""
+        clauses = list(clauses)
+        params = list(params)
+        if cursor is not None:
+            clauses.append(f'{id_column} {"<" if desc else ">"} ?')
+            params.append(int(cursor))
+        if 'JOIN pages' in sql:
+            clauses.append('pages.latest = 1')
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += f' ORDER BY {id_column} {"DESC" if desc else "ASC"} LIMIT ?'
+        params.append(limit + 1)
+
+        rows = [dict(row) for row in self._connection().execute(sql, params)]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {'items': rows, 'next_cursor': rows[-1]['id'] if has_more else None}
+
+    def close(self):
+        """Close this thread's connection"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,65 @@
+import importlib
+import threading
+
+class ScraperRegistry:
+    """Hand out scraper instances per thread so requests.Session objects are never shared"""
+
+    def __init__(self):
+        self._factories = {}
+        self._options = {}
+        self._shared = {}
+        self._shared_names = set()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def register(self, name, factory, shared=False, **options):
+        """Register a factory under a name, called with **options on first use
+
+        factory may be a class or a 'module.path:ClassName' string; strings are
+        imported on first use so heavy dependencies (bs4, requests, python-docx)
+        are only loaded by workers that actually need them. shared=True makes a
+        single process-wide instance for thread-safe services such as worker pools.
+        """
+        self._factories[name] = factory
+        self._options[name] = options
+        if shared:
+            self._shared_names.add(name)
+
+    def _resolve(self, name):
+        """Import a lazily registered factory the first time it is needed"""
+        factory = self._factories[name]
+        if isinstance(factory, str):
+            with self._lock:
+                factory = self._factories[name]
+                if isinstance(factory, str):
+                    module_name, class_name = factory.split(':')
+                    factory = getattr(importlib.import_module(module_name), class_name)
+                    self._factories[name] = factory
+        return factory
+
+    def get(self, name):
+        """Return this thread's instance for name, creating it on first use"""
+        if name in self._shared_names:
+            return self._get_shared(name)
+
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = {}
+
+        instance = instances.get(name)
+        if instance is None:
+            if name not in self._factories:
+                raise KeyError(f"No scraper registered as '{name}'")
+            instance = instances[name] = self._resolve(name)(**self._options[name])
+        return instance
+
+    def _get_shared(self, name):
+        """Return the process-wide instance for a shared service"""
+        instance = self._shared.get(name)
+        if instance is None:
+            factory = self._resolve(name)
+            with self._lock:
+                instance = self._shared.get(name)
+                if instance is None:
+                    instance = self._shared[name] = factory(**self._options[name])
+        return instance
@@ -0,0 +1,81 @@
+import threading
+
+from utils.cache import TTLCache
+from utils.deadline import DeadlineExceeded, current_deadline, is_deadline_error
+
+_MISSING = object()
+
+
+class _Call:
+    """One in-flight computation and the outcome its waiters share"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into a single execution
+
+    The first caller for a key runs the function; callers that arrive while it
+    is running wait and receive the same result, or the same exception. A
+    successful result is also handed to callers arriving within grace seconds
+    of completion, which covers bursts that straddle the end of a call.
+    Failures are never kept beyond the callers already waiting, and a leader
+    that ran out of its own deadline is not blamed on the others: they run
+    the call again within their own budgets.
+    """
+
+    def __init__(self, grace=2.0, wait_timeout=120, max_entries=1024):
+        self.grace = grace
+        self.wait_timeout = wait_timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._recent = TTLCache(max_entries=max_entries, ttl=grace)
+
+    def do(self, key, func, *args, **kwargs):
+        """Return func(*args, **kwargs), sharing one execution among concurrent callers of key"""
+        while True:
+            with self._lock:
+                if self.grace > 0:
+                    result = self._recent.get(key, _MISSING)
+                    if result is not _MISSING:
+                        return result
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+            if leader:
+                return self._lead(key, call, func, args, kwargs)
+
+            deadline = current_deadline()
+            wait_timeout = self.wait_timeout if deadline is None else min(self.wait_timeout, deadline.remaining())
+            if not call.event.wait(wait_timeout):
+                if wait_timeout < self.wait_timeout:
+                    raise DeadlineExceeded(f"Request deadline of {deadline.seconds:g}s exceeded waiting for an identical request")
+                raise Exception("Timed out waiting for an identical in-flight request")
+            if call.error is None:
+                return call.result
+            if not is_deadline_error(call.error):
+                raise call.error
+            # The leader ran out of its own budget; try again within ours
+
+    def _lead(self, key, call, func, args, kwargs):
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.grace > 0:
+                    self._recent.set(key, call.result)
+            call.event.set()
+        return call.result
+
+    def in_flight(self):
+        """Number of keys currently being computed"""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from io import BytesIO
+
+from utils.deadline import DeadlineExceeded, current_deadline
+from utils.file_handler import FileHandler
+
+# Thumbnail widths the service will produce; requests are snapped to these so
+# the cache cannot be flooded with arbitrary sizes
+THUMBNAIL_SIZES = (64, 128, 256, 320, 480, 640)
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg')
+}
+
+class ThumbnailService:
+    """Fetch, downscale and re-encode scraped images into a size-bounded disk cache"""
+
+    def __init__(self, cache_folder='downloads/thumbnails', max_cache_bytes=200 * 1024 * 1024,
+                 max_workers=4, max_source_bytes=20 * 1024 * 1024, quality=80):
+        self.cache_folder = cache_folder
+        self.max_cache_bytes = max_cache_bytes
+        self.max_source_bytes = max_source_bytes
+        self.quality = quality
+        os.makedirs(self.cache_folder, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnail')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._cache_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(self.cache_folder) if entry.is_file()
+        )
+
+    def get_thumbnail(self, url, size=320, fmt='webp'):
+        """Return (path, mimetype, etag) for a thumbnail, generating it if needed"""
+        size = min(THUMBNAIL_SIZES, key=lambda s: abs(s - int(size)))
+        fmt = fmt if fmt in THUMBNAIL_FORMATS else 'jpeg'
+        etag = hashlib.sha1(f"{url}|{size}|{fmt}".encode('utf-8')).hexdigest()
+        path = os.path.join(self.cache_folder, f"{etag}.{fmt}")
+        mimetype = THUMBNAIL_FORMATS[fmt][1]
+
+        if os.path.exists(path):
+            # Touch the file so eviction treats it as recently used
+            os.utime(path)
+            return path, mimetype, etag
+
+        # Concurrent requests for the same thumbnail share one generation job
+        with self._lock:
+            future = self._in_flight.get(etag)
+            if future is None:
+                future = self._executor.submit(self._generate, url, size, fmt, path)
+                self._in_flight[etag] = future
+                future.add_done_callback(lambda f: self._forget(etag))
+
+        # Generation is shared, so a caller out of time stops waiting but the job still finishes
+        deadline = current_deadline()
+        try:
+            future.result(timeout=deadline.remaining() if deadline is not None else None)
+        except TimeoutError:
+            raise DeadlineExceeded(f"Request deadline of {deadline.seconds:g}s exceeded creating a thumbnail")
+        return path, mimetype, etag
+
+    def _forget(self, etag):
+        with self._lock:
+            self._in_flight.pop(etag, None)
+
+    def _file_handler(self):
+        """Each pool thread keeps its own FileHandler (and requests.Session)"""
+        handler = getattr(self._local, 'file_handler', None)
+        if handler is None:
+            handler = self._local.file_handler = FileHandler()
+        return handler
+
+    def _generate(self, url, size, fmt, path):
+        from PIL import Image, ImageOps
+
+        data = self._file_handler().fetch_bytes(url, max_bytes=self.max_source_bytes)
+        try:
+            with Image.open(BytesIO(data)) as image:
+                # Let the JPEG decoder downscale while decoding instead of after
+                image.draft('RGB', (size, size))
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((size, size))
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+                if fmt == 'jpeg' and image.mode == 'RGBA':
+                    image = image.convert('RGB')
+
+                buffer = BytesIO()
+                image.save(buffer, THUMBNAIL_FORMATS[fmt][0], quality=self.quality)
+        except Exception as e:
+            raise Exception(f"Error creating thumbnail: {str(e)}")
+
+        # Write atomically so readers never see a half-written file
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._cache_bytes += buffer.tell()
+        self._evict(keep=path)
+
+    def _evict(self, keep=None):
+        """Delete least recently used thumbnails until the cache fits its budget, sparing keep"""
+        with self._lock:
+            if self._cache_bytes <= self.max_cache_bytes:
+                return
+
+            entries = sorted(
+                (entry for entry in os.scandir(self.cache_folder) if entry.is_file()),
+                key=lambda entry: entry.stat().st_mtime
+            )
+            total = sum(entry.stat().st_size for entry in entries)
+            for entry in entries:
+                if total <= self.max_cache_bytes * 0.9:
+                    break
+                if entry.path == keep:
+                    # The thumbnail just written is about to be served
+                    continue
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                    total -= size
+                except OSError:
+                    continue
+            self._cache_bytes = total
@@ -0,0 +1,128 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, urljoin
+
+# Query parameters that only track the visitor and never change the resource
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'ref_src', 'spm'
+}
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def is_tracking_param(name):
+    """Check whether a query parameter name is a known tracking parameter"""
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url):
+    """Return a canonical form of url for de-duplication
+
+    Lower-cases scheme and host, drops default ports, fragments and tracking
+    parameters, and sorts the remaining query string.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        host = f"{parts.username}@{host}"
+
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not is_tracking_param(k)]
+    query.sort()
+
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+def parse_srcset(srcset):
+    """Parse a srcset attribute into a list of (url, value, unit) tuples
+
+    unit is 'w' for width descriptors and 'x' for pixel density; candidates
+    without a descriptor count as 1x. Follows the HTML srcset algorithm: a URL
+    runs to the next whitespace, so commas inside it (as in CDN transform
+    URLs like /w_400,h_300/) are kept, and only a comma after it ends the
+    candidate.
+    """
+    candidates = []
+    position, length = 0, len(srcset)
+    while position < length:
+        while position < length and (srcset[position].isspace() or srcset[position] == ','):
+            position += 1
+        start = position
+        while position < length and not srcset[position].isspace():
+            position += 1
+        url = srcset[start:position]
+        if not url:
+            break
+
+        descriptors = []
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            # Descriptors run to the next comma outside parentheses
+            start, depth = position, 0
+            while position < length and (srcset[position] != ',' or depth):
+                if srcset[position] == '(':
+                    depth += 1
+                elif srcset[position] == ')' and depth:
+                    depth -= 1
+                position += 1
+            descriptors = srcset[start:position].split()
+            position += 1
+
+        if not url or url.startswith('data:'):
+            continue
+
+        value, unit = 1.0, 'x'
+        if descriptors:
+            descriptor = descriptors[0].lower()
+            try:
+                value, unit = float(descriptor[:-1]), descriptor[-1]
+            except ValueError:
+                continue
+            if unit not in ('w', 'x'):
+                continue
+        candidates.append((url, value, unit))
+    return candidates
+
+
+def best_srcset_candidate(srcset, base_url):
+    """Return (absolute_url, width_or_None) for the highest resolution candidate"""
+    candidates = parse_srcset(srcset)
+    if not candidates:
+        return None, None
+
+    widths = [c for c in candidates if c[2] == 'w']
+    url, value, unit = max(widths or candidates, key=lambda c: c[1])
+    return urljoin(base_url, url), int(value) if unit == 'w' else None
+
+
+class MediaInventory:
+    """Ordered collection of media items keyed by normalized URL"""
+
+    def __init__(self):
+        self._items = {}
+
+    def __contains__(self, url):
+        return normalize_url(url) in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, url, item):
+        """Add item under url; return False if an equivalent URL is already present"""
+        key = normalize_url(url)
+        if key in self._items:
+            return False
+        self._items[key] = item
+        return True
+
+    def items(self):
+        """Return the stored items in insertion order"""
+        return list(self._items.values())
@@ -0,0 +1,155 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from utils.cache import TTLCache
+from utils.circuit_breaker import get_default_breaker
+from utils.deadline import DeadlineExceeded, clamp_timeout, current_deadline
+
+# Platforms whose embed/watch URLs need yt-dlp rather than a plain HTTP download
+SUPPORTED_PLATFORMS = [
+    'youtube.com', 'youtu.be', 'youtube-nocookie.com', 'vimeo.com', 'dailymotion.com',
+    'twitch.tv', 'facebook.com', 'instagram.com'
+]
+
+class VideoResolver:
+    """Turn embed URLs into format lists and downloads using yt-dlp
+
+    Metadata extraction runs in a thread pool and is cached for cache_ttl
+    seconds; direct stream URLs expire upstream, so the TTL is kept short.
+    """
+
+    def __init__(self, max_workers=4, cache_ttl=1800, cache_size=2000, fragment_concurrency=4,
+                 max_height=1080, timeout=30):
+        self.cache = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self.fragment_concurrency = fragment_concurrency
+        self.max_height = max_height
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='video-resolver')
+
+    def is_supported(self, url):
+        """Check if url belongs to a platform that needs resolving"""
+        try:
+            host = urlparse(url).hostname
+        except ValueError:
+            return False
+        if not host:
+            return False
+        # Match the platform domain or its subdomains, never a lookalike such as notyoutube.com
+        return any(host == platform or host.endswith('.' + platform) for platform in SUPPORTED_PLATFORMS)
+
+    def resolve(self, url):
+        """Return title, duration and the available formats for a video page or embed"""
+        info = self.cache.get(url)
+        if info is None:
+            info = self._summarize(self._extract_info(url))
+            self.cache.set(url, info)
+        return info
+
+    def resolve_items(self, videos):
+        """Resolve every platform video in a VideoScraper result list concurrently
+
+        Resolved items gain a 'resolved' dict; failures are reported in
+        'resolve_error' so one private or removed video never fails the scrape.
+        """
+        pending = [(video, self._executor.submit(self.resolve, video['src']))
+                   for video in videos if self.is_supported(video['src'])]
+        deadline = current_deadline()
+        for video, future in pending:
+            try:
+                video['resolved'] = future.result(timeout=deadline.remaining() if deadline else None)
+            except Exception as e:
+                # yt-dlp cannot be interrupted; a late result still lands in the cache for next time
+                video['resolve_error'] = str(e) if future.done() else 'Not resolved before the request deadline'
+        return videos
+
+    def download(self, url, downloads_folder='downloads', format_id=None, max_height=None):
+        """Download a platform video with parallel fragment fetching and return the file path
+
+        The download stops with DeadlineExceeded once the request deadline
+        passes, and is refused while the platform's circuit is open.
+        """
+        import yt_dlp
+
+        get_default_breaker().allow(url)
+        deadline = current_deadline()
+
+        def check_progress(progress):
+            # yt-dlp calls hooks from its fragment threads too, so check the captured deadline
+            if deadline is not None:
+                deadline.check()
+
+        max_height = max_height or self.max_height
+        # Progressive formats avoid needing ffmpeg to merge separate audio/video streams
+        selector = format_id or f'best[height<={max_height}][acodec!=none][vcodec!=none]/best'
+        options = {
+            'quiet': True,
+            'no_warnings': True,
+            'noplaylist': True,
+            'format': selector,
+            'outtmpl': os.path.join(downloads_folder, '%(title).80s_%(id)s.%(ext)s'),
+            'restrictfilenames': True,
+            'concurrent_fragment_downloads': self.fragment_concurrency,
+            'socket_timeout': clamp_timeout(self.timeout),
+            'progress_hooks': [check_progress]
+        }
+
+        try:
+            with yt_dlp.YoutubeDL(options) as ydl:
+                info = ydl.extract_info(url, download=True)
+                downloads = info.get('requested_downloads') or []
+                if downloads and downloads[0].get('filepath'):
+                    return downloads[0]['filepath']
+                return ydl.prepare_filename(info)
+        except Exception as e:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(f"Request deadline of {deadline.seconds:g}s exceeded downloading {url}") from e
+            raise Exception(f"Error downloading video: {str(e)}")
+
+    def _extract_info(self, url):
+        import yt_dlp
+
+        options = {
+            'quiet': True,
+            'no_warnings': True,
+            'noplaylist': True,
+            'skip_download': True,
+            'socket_timeout': self.timeout
+        }
+        try:
+            with yt_dlp.YoutubeDL(options) as ydl:
+                return ydl.extract_info(url, download=False)
+        except Exception as e:
+            raise Exception(f"Error resolving video: {str(e)}")
+
+    def _summarize(self, info):
+        """Keep only the metadata clients need from yt-dlp's (very large) info dict"""
+        formats = []
+        for fmt in info.get('formats') or []:
+            if not fmt.get('url') or fmt.get('protocol') in ('mhtml',):
+                continue
+            formats.append({
+                'format_id': fmt.get('format_id'),
+                'ext': fmt.get('ext'),
+                'resolution': fmt.get('resolution') or (
+                    f"{fmt['width']}x{fmt['height']}" if fmt.get('width') and fmt.get('height') else None),
+                'width': fmt.get('width'),
+                'height': fmt.get('height'),
+                'fps': fmt.get('fps'),
+                'vcodec': fmt.get('vcodec'),
+                'acodec': fmt.get('acodec'),
+                'filesize': fmt.get('filesize') or fmt.get('filesize_approx'),
+                'bitrate': fmt.get('tbr'),
+                'protocol': fmt.get('protocol'),
+                'url': fmt.get('url')
+            })
+
+        return {
+            'id': info.get('id'),
+            'title': info.get('title'),
+            'duration': info.get('duration'),
+            'thumbnail': info.get('thumbnail'),
+            'platform': info.get('extractor_key'),
+            'webpage_url': info.get('webpage_url'),
+            'formats': formats
+        }
@@ -0,0 +1,350 @@
+import base64
+import gzip
+import hashlib
+import os
+import threading
+import uuid
+import zlib
+from datetime import datetime, timezone
+from urllib.parse import urldefrag, urlsplit
+
+# Bodies are archived decoded, so these headers would no longer describe them
+DROPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+ORIGINAL_HEADER_PREFIX = 'X-Archive-Orig-'
+
+READ_CHUNK = 64 * 1024
+
+
+def _warc_date():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _record_id():
+    return f'<urn:uuid:{uuid.uuid4()}>'
+
+
+def _digest(data):
+    return 'sha1:' + base64.b32encode(hashlib.sha1(data).digest()).decode('ascii')
+
+
+def _header_items(headers):
+    """Header pairs with repeated headers (Set-Cookie, Link) kept as separate lines"""
+    return list(getattr(headers, 'iteritems', headers.items)())
+
+
+def _target_uri(url):
+    return urldefrag(url)[0]
+
+
+def _warc_record(warc_type, target_uri, content_type, block, record_id=None, extra=()):
+    lines = [
+        'WARC/1.1',
+        f'WARC-Type: {warc_type}',
+        f'WARC-Record-ID: {record_id or _record_id()}',
+        f'WARC-Date: {_warc_date()}',
+        f'WARC-Target-URI: {target_uri}',
+        f'Content-Type: {content_type}',
+        f'WARC-Block-Digest: {_digest(block)}',
+        f'Content-Length: {len(block)}'
+    ]
+    lines.extend(f'{name}: {value}' for name, value in extra)
+    return '\r\n'.join(lines).encode('utf-8') + b'\r\n\r\n' + block + b'\r\n\r\n'
+
+
+def http_response_block(response, body=None):
+    """The HTTP message of a requests response, with its decoded body"""
+    version = {10: 'HTTP/1.0', 11: 'HTTP/1.1'}.get(getattr(response.raw, 'version', 11), 'HTTP/1.1')
+    body = (response.content if body is None else body) or b''
+    lines = [f'{version} {response.status_code} {response.reason or ""}'.rstrip()]
+    raw_headers = getattr(response.raw, 'headers', None) or response.headers
+    for name, value in _header_items(raw_headers):
+        if name.lower() in DROPPED_HEADERS:
+            if name.lower() == 'content-encoding':
+                lines.append(f'{ORIGINAL_HEADER_PREFIX}{name}: {value}')
+            continue
+        lines.append(f'{name}: {value}')
+    lines.append(f'Content-Length: {len(body)}')
+    return '\r\n'.join(lines).encode('latin-1', 'replace') + b'\r\n\r\n' + body, body
+
+
+def http_request_block(request):
+    """The HTTP message of a prepared request"""
+    parts = urlsplit(request.url)
+    target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+    lines = [f'{request.method} {target} HTTP/1.1', f'Host: {parts.netloc}']
+    lines.extend(f'{name}: {value}' for name, value in request.headers.items() if name.lower() != 'host')
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    elif not isinstance(body, bytes):
+        body = b''  # streamed upload bodies are not archived
+    return '\r\n'.join(lines).encode('latin-1', 'replace') + b'\r\n\r\n' + body
+
+
+class WarcWriter:
+    """Append request/response pairs to size-rotated WARC 1.1 files
+
+    Each record is a separate gzip member (the usual .warc.gz layout), so files
+    can be read from any record offset and a file that is still being written
+    is readable up to its last complete record. A new file is started once the
+    current one reaches max_bytes. Streamed responses are only archived when
+    their body fits in max_record_bytes. One writer is safe to share between
+    threads; give each process its own (file names include the pid).
+    """
+
+    def __init__(self, directory, prefix='scrape', max_bytes=1024 * 1024 * 1024, compress=True,
+                 max_record_bytes=10 * 1024 * 1024):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_record_bytes = max_record_bytes
+        self.compress = compress
+        self.records = 0
+        self.failures = 0
+        self.last_error = None
+        self._file = None
+        self._path = None
+        self._serial = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def current_path(self):
+        return self._path
+
+    def _open(self):
+        self._serial += 1
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+        suffix = '.warc.gz' if self.compress else '.warc'
+        self._path = os.path.join(self.directory, f'{self.prefix}-{stamp}-{os.getpid()}-{self._serial:05d}{suffix}')
+        self._file = open(self._path, 'ab')
+        info = f'software: web-scraper\r\nformat: WARC File Format 1.1\r\nhostname: {os.uname().nodename}\r\n'
+        self._file.write(self._pack(_warc_record('warcinfo', os.path.basename(self._path),
+                                                 'application/warc-fields', info.encode('utf-8'))))
+
+    def _pack(self, record):
+        return gzip.compress(record, compresslevel=6) if self.compress else record
+
+    def write_exchange(self, response, body=None):
+        """Archive a requests response and the request that produced it (body: the decoded body, if already read)"""
+        response_id = _record_id()
+        target = _target_uri(response.request.url if response.request is not None else response.url)
+        block, body = http_response_block(response, body)
+        # Compress outside the lock so concurrent fetches only serialise on the file write
+        data = self._pack(_warc_record('response', target, 'application/http; msgtype=response', block,
+                                       response_id, [('WARC-Payload-Digest', _digest(body))]))
+        if response.request is not None:
+            data += self._pack(_warc_record('request', target, 'application/http; msgtype=request',
+                                            http_request_block(response.request),
+                                            extra=[('WARC-Concurrent-To', response_id)]))
+
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._file.write(data)
+            self._file.flush()
+            self.records += 1
+            if self._file.tell() >= self.max_bytes:
+                self._file.close()
+                self._file = None
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _gzip_members(f):
+    """Yield (offset, data) for every gzip member of a file; a truncated last member is skipped"""
+    offset = f.tell()
+    buffer = b''
+    while True:
+        if not buffer:
+            buffer = f.read(READ_CHUNK)
+            if not buffer:
+                return
+        start = offset
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        chunks = []
+        while True:
+            chunks.append(decompressor.decompress(buffer))
+            if decompressor.eof:
+                offset += len(buffer) - len(decompressor.unused_data)
+                buffer = decompressor.unused_data
+                break
+            offset += len(buffer)
+            buffer = f.read(READ_CHUNK)
+            if not buffer:
+                return
+        yield start, b''.join(chunks)
+
+
+def _parse_records(data):
+    """Yield (headers, block) for the WARC records in a byte string"""
+    position = 0
+    while position < len(data):
+        end = data.find(b'\r\n\r\n', position)
+        if end < 0:
+            return
+        lines = data[position:end].decode('utf-8', 'replace').split('\r\n')
+        if not lines[0].startswith('WARC/'):
+            return
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        block = data[end + 4:end + 4 + length]
+        if len(block) < length:
+            return
+        yield headers, block
+        position = end + 4 + length + 4
+
+
+def iter_records(path):
+    """Yield (location, headers, block) for each record in a .warc or .warc.gz file
+
+    location is (path, member_offset, index) and can be passed to read_record.
+    WARC header names are lower-cased.
+    """
+    with open(path, 'rb') as f:
+        if f.read(2) == b'\x1f\x8b':
+            f.seek(0)
+            members = _gzip_members(f)
+        else:
+            f.seek(0)
+            members = [(0, f.read())]
+        for offset, data in members:
+            for index, (headers, block) in enumerate(_parse_records(data)):
+                yield (path, offset, index), headers, block
+
+
+def read_record(location):
+    """Read one record back from the location iter_records reported"""
+    path, offset, index = location
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        if f.read(2) == b'\x1f\x8b':
+            f.seek(offset)
+            data = next(_gzip_members(f))[1]
+        else:
+            f.seek(offset)
+            data = f.read()
+    for position, (headers, block) in enumerate(_parse_records(data)):
+        if position == index:
+            return headers, block
+    raise Exception(f"Error reading WARC record: nothing at {path}:{offset}")
+
+
+def parse_http_response(block):
+    """Split an archived HTTP response into (status, reason, headers, body)"""
+    from requests.structures import CaseInsensitiveDict
+
+    head, _, body = block.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ', 2)
+    headers = CaseInsensitiveDict()
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        name, value = name.strip(), value.strip()
+        # Repeated headers are folded the way requests folds them for live responses
+        headers[name] = f'{headers[name]}, {value}' if name in headers else value
+    return int(parts[1]), (parts[2] if len(parts) > 2 else ''), headers, body
+
+
+class WarcArchive:
+    """Index of the responses in one or more WARC files, for replaying scrapes offline
+
+    path may be a .warc/.warc.gz file or a directory of them. Only the record
+    locations are kept in memory; bodies are read from disk on demand. When a
+    URL was captured more than once the newest capture wins.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = self._find_files(path)
+        self._index = {}
+        self._lock = threading.Lock()
+        for file_path in self.files:
+            self._index_file(file_path)
+
+    @staticmethod
+    def _find_files(path):
+        if os.path.isdir(path):
+            return sorted(os.path.join(path, name) for name in os.listdir(path)
+                          if name.endswith(('.warc', '.warc.gz')))
+        if os.path.exists(path):
+            return [path]
+        raise Exception(f"Error opening WARC archive: {path} does not exist")
+
+    def _index_file(self, file_path):
+        responses, methods = [], {}
+        for location, headers, block in iter_records(file_path):
+            warc_type = headers.get('warc-type')
+            if warc_type == 'response':
+                responses.append((headers.get('warc-record-id'), headers.get('warc-target-uri'), location))
+            elif warc_type == 'request':
+                methods[headers.get('warc-concurrent-to')] = block[:block.find(b' ')].decode('ascii', 'replace')
+        for record_id, url, location in responses:
+            if url:
+                self._index[(methods.get(record_id, 'GET'), _target_uri(url))] = location
+
+    def __len__(self):
+        return len(self._index)
+
+    def urls(self, method='GET'):
+        """Archived URLs for a request method, in capture order"""
+        return [url for (record_method, url) in self._index if record_method == method]
+
+    def lookup(self, method, url):
+        """Return (status, reason, headers, body) for a request, or None if it was not captured"""
+        url = _target_uri(url)
+        location = self._index.get((method, url))
+        if location is None and method == 'HEAD':
+            location = self._index.get(('GET', url))
+        if location is None:
+            return None
+        _, block = read_record(location)
+        status, reason, headers, body = parse_http_response(block)
+        return status, reason, headers, b'' if method == 'HEAD' else body
+
+
+_recorder = None
+_replay_archive = None
+
+
+def get_warc_recorder():
+    """Return the process-wide WarcWriter new fetchers record to, or None"""
+    return _recorder
+
+
+def get_replay_archive():
+    """Return the process-wide WarcArchive new fetchers replay from, or None"""
+    return _replay_archive
+
+
+def configure_warc(record_dir=None, replay=None, max_bytes=1024 * 1024 * 1024, max_record_bytes=10 * 1024 * 1024):
+    """Set up recording to record_dir and/or replaying from the archive at replay
+
+    Fetchers created afterwards pick the settings up; replay takes precedence.
+    """
+    global _recorder, _replay_archive
+    if _recorder is not None and (not record_dir or _recorder.directory != record_dir):
+        _recorder.close()
+        _recorder = None
+    if record_dir and _recorder is None:
+        _recorder = WarcWriter(record_dir, max_bytes=max_bytes, max_record_bytes=max_record_bytes)
+    elif _recorder is not None:
+        _recorder.max_bytes = max_bytes
+        _recorder.max_record_bytes = max_record_bytes
+    if not replay:
+        _replay_archive = None
+    elif _replay_archive is None or _replay_archive.path != replay:
+        _replay_archive = WarcArchive(replay)
+    return _recorder, _replay_archive
@@ -0,0 +1,133 @@
+import io
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import ConnectionError
+from requests.models import Response
+from requests.utils import get_encoding_from_headers
+from urllib3 import HTTPResponse
+from urllib3._collections import HTTPHeaderDict
+
+from utils.deadline import check_deadline
+from utils.warc import DROPPED_HEADERS, READ_CHUNK, _header_items
+
+# Transport adapters for recording to and replaying from WARC archives. They
+# live apart from utils.warc so configuring archives does not import requests.
+
+
+def buffered_raw(body, headers, status=200, reason=None, rest=None):
+    """A urllib3 response serving an already decoded body, so raw.read(n, decode_content=True) keeps working
+
+    rest, when given, is the original raw response; it is read (and closed)
+    once the buffered part runs out.
+    """
+    headers = HTTPHeaderDict([(name, value) for name, value in _header_items(headers)
+                              if name.lower() not in DROPPED_HEADERS])
+    if rest is None:
+        headers['Content-Length'] = str(len(body))
+        stream = io.BytesIO(body)
+    else:
+        stream = _ChainedStream(body, rest)
+    return HTTPResponse(body=stream, headers=headers, status=status, reason=reason, preload_content=False,
+                        decode_content=False)
+
+
+class _ChainedStream(io.RawIOBase):
+    """Read a buffered prefix, then the rest of a (decoding) urllib3 response"""
+
+    def __init__(self, prefix, raw):
+        self._prefix = io.BytesIO(prefix)
+        self._raw = raw
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._prefix.read(len(buffer)) or self._raw.read(len(buffer), decode_content=True)
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Transport adapter that archives every response it sends
+
+    Streamed responses (stylesheets, sitemaps, media probes) are read up to
+    the writer's max_record_bytes, archived, and handed back with the
+    buffered body as their raw stream, so callers stream them as before.
+    Larger bodies (video and file downloads) are not archived: the caller
+    streams the buffered part and then the rest straight from the network,
+    so memory stays bounded by max_record_bytes. A failing archive write
+    never fails the fetch.
+    """
+
+    def __init__(self, writer, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = writer
+
+    def send(self, request, stream=False, **kwargs):
+        response = super().send(request, stream=stream, **kwargs)
+        if not stream:
+            response.content  # read the body now, as Session.send would
+            self._archive(response)
+            return response
+
+        raw = response.raw
+        limit = self.writer.max_record_bytes
+        chunks, received = [], 0
+        while request.method != 'HEAD' and received <= limit:
+            check_deadline()
+            chunk = raw.read(min(READ_CHUNK, limit + 1 - received), decode_content=True)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+        body = b''.join(chunks)
+        if received <= limit:
+            self._archive(response, body)
+            raw.release_conn()
+            response.raw = buffered_raw(body, raw.headers, raw.status, raw.reason)
+        else:
+            response.raw = buffered_raw(body, raw.headers, raw.status, raw.reason, rest=raw)
+        return response
+
+    def _archive(self, response, body=None):
+        try:
+            self.writer.write_exchange(response, body)
+        except Exception as e:
+            self.writer.record_failure(e)
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter that answers requests from a WarcArchive instead of the network
+
+    Redirects replay as captured (requests follows the archived 3xx), and a
+    URL that was never captured raises ConnectionError like an unreachable host.
+    """
+
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        captured = self.archive.lookup(request.method, request.url)
+        if captured is None:
+            raise ConnectionError(f"{request.url} is not in the replay archive", request=request)
+
+        status, reason, headers, body = captured
+        response = Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        response.raw = buffered_raw(body, headers, status, reason)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,360 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.deadline import DeadlineExceeded, current_deadline
+from utils.rate_limiter import BACKOFF_STATUSES, HostScheduler, get_host
+
+QUEUED, LEASED, DONE, FAILED = 'queued', 'leased', 'done', 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL,
+    url TEXT NOT NULL,
+    scrape_type TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    result_id INTEGER,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (state, available_at);
+CREATE INDEX IF NOT EXISTS tasks_batch ON tasks (batch, state);
+
+CREATE TABLE IF NOT EXISTS hosts (
+    host TEXT PRIMARY KEY,
+    tat REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    seen REAL NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class Task:
+    """One leased URL; (id, owner, attempts) identifies the lease when reporting back"""
+
+    def __init__(self, id, batch, url, scrape_type, attempts, max_attempts, owner):
+        self.id = id
+        self.batch = batch
+        self.url = url
+        self.scrape_type = scrape_type
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.owner = owner
+
+    def __repr__(self):
+        return f"Task({self.id}, {self.url!r}, attempt {self.attempts}/{self.max_attempts})"
+
+
+class WorkQueue:
+    """Shared task queue and per-host rate limit behind cluster coordinators and workers
+
+    Backends implement every method below so that they hold across every
+    worker process sharing the queue: leases expire (a crashed worker's tasks go back to the queue), a lease
+    that expired and was handed to another worker can no longer be completed
+    by the first, and host rate reservations are atomic. Lease expiry and
+    reservations are stamped with the worker's clock, so a backend shared
+    between machines has to keep time on the server side instead.
+    """
+
+    def submit(self, batch, urls, scrape_type, max_attempts=3):
+        """Queue every URL under batch; returns how many were queued"""
+        raise NotImplementedError
+
+    def lease(self, worker, limit, lease_seconds):
+        """Hand up to limit ready tasks to worker for lease_seconds; returns [Task]"""
+        raise NotImplementedError
+
+    def renew(self, tasks, lease_seconds):
+        """Extend the leases of tasks still running; returns the ids of leases already lost"""
+        raise NotImplementedError
+
+    def complete(self, task, result_id=None):
+        """Mark a leased task done; False when the lease was lost to another worker"""
+        raise NotImplementedError
+
+    def fail(self, task, error, retry_delay=0.0, retry=True):
+        """Requeue a failed task after retry_delay, or fail it for good; returns its new state or None"""
+        raise NotImplementedError
+
+    def batch_status(self, batch):
+        raise NotImplementedError
+
+    def tasks(self, batch, state=None, after=0, limit=1000):
+        """Tasks of a batch in id order, for paging with after=<last id>"""
+        raise NotImplementedError
+
+    def requeue_failed(self, batch):
+        raise NotImplementedError
+
+    def workers(self):
+        raise NotImplementedError
+
+    def reserve_host(self, host, interval, burst=1, max_wait=None):
+        """Reserve the next request slot for host; returns seconds to wait for it, or None past max_wait"""
+        raise NotImplementedError
+
+    def block_host(self, host, seconds, interval, burst=1):
+        """Hold every worker's requests to host for seconds (429/503 backoff)"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue in one SQLite database shared by every process on a machine
+
+    The database must sit on a local disk: WAL mode relies on shared memory
+    that network filesystems do not provide, and every process has to read
+    the same clock for leases and host reservations to line up.
+
+    Writes run in BEGIN IMMEDIATE transactions, which SQLite serialises across
+    processes, so a task is never leased twice and host reservations never
+    overlap. For leased tasks available_at holds the lease expiry, letting one
+    index serve both ready and expired-lease lookups. Host limits use GCRA:
+    the stored theoretical arrival time (tat) advances by 1/rate per request
+    and a request may start once it is within burst intervals of it.
+    """
+
+    def __init__(self, path='downloads/queue.db'):
+        self.path = path
+        self._local = threading.local()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _write(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def submit(self, batch, urls, scrape_type, max_attempts=3, chunk_size=1000):
+        now = time.time()
+        count = 0
+        rows = []
+        for url in urls:
+            rows.append((batch, url, scrape_type, QUEUED, max_attempts, now, now))
+            if len(rows) >= chunk_size:
+                count += self._insert(rows)
+                rows = []
+        if rows:
+            count += self._insert(rows)
+        return count
+
+    def _insert(self, rows):
+        with self._write() as connection:
+            connection.executemany(
+                'INSERT INTO tasks (batch, url, scrape_type, state, max_attempts, available_at, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def lease(self, worker, limit, lease_seconds):
+        now = time.time()
+        with self._write() as connection:
+            # Leases that ran out belong to workers that died or stalled
+            connection.execute(
+                "UPDATE tasks SET state = ?, lease_owner = NULL, error = 'Lease expired', updated = ? "
+                'WHERE state = ? AND available_at < ? AND attempts >= max_attempts', (FAILED, now, LEASED, now))
+            connection.execute(
+                'UPDATE tasks SET state = ?, lease_owner = NULL, updated = ? WHERE state = ? AND available_at < ?',
+                (QUEUED, now, LEASED, now))
+
+            ids = [row['id'] for row in connection.execute(
+                'SELECT id FROM tasks WHERE state = ? AND available_at <= ? ORDER BY available_at, id LIMIT ?',
+                (QUEUED, now, limit))]
+            connection.executemany(
+                'UPDATE tasks SET state = ?, lease_owner = ?, attempts = attempts + 1, available_at = ?, updated = ? '
+                'WHERE id = ?', [(LEASED, worker, now + lease_seconds, now, task_id) for task_id in ids])
+            connection.execute(
+                'INSERT INTO workers (name, seen) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET seen = excluded.seen',
+                (worker, now))
+            rows = connection.execute(
+                f'SELECT id, batch, url, scrape_type, attempts, max_attempts FROM tasks '
+                f'WHERE id IN ({",".join("?" * len(ids))}) ORDER BY id', ids).fetchall() if ids else []
+        return [Task(row['id'], row['batch'], row['url'], row['scrape_type'], row['attempts'], row['max_attempts'],
+                     worker) for row in rows]
+
+    def _owned(self):
+        return 'id = ? AND state = ? AND lease_owner = ? AND attempts = ?'
+
+    def renew(self, tasks, lease_seconds):
+        now = time.time()
+        lost = []
+        with self._write() as connection:
+            for task in tasks:
+                cursor = connection.execute(f'UPDATE tasks SET available_at = ?, updated = ? WHERE {self._owned()}',
+                                            (now + lease_seconds, now, task.id, LEASED, task.owner, task.attempts))
+                if cursor.rowcount == 0:
+                    lost.append(task.id)
+        return lost
+
+    def complete(self, task, result_id=None):
+        now = time.time()
+        with self._write() as connection:
+            cursor = connection.execute(
+                f'UPDATE tasks SET state = ?, result_id = ?, error = NULL, lease_owner = NULL, updated = ? '
+                f'WHERE {self._owned()}', (DONE, result_id, now, task.id, LEASED, task.owner, task.attempts))
+            connection.execute('UPDATE workers SET completed = completed + 1, seen = ? WHERE name = ?',
+                               (now, task.owner))
+        return cursor.rowcount == 1
+
+    def fail(self, task, error, retry_delay=0.0, retry=True):
+        now = time.time()
+        state = QUEUED if retry and task.attempts < task.max_attempts else FAILED
+        with self._write() as connection:
+            cursor = connection.execute(
+                f'UPDATE tasks SET state = ?, error = ?, lease_owner = NULL, available_at = ?, updated = ? '
+                f'WHERE {self._owned()}',
+                (state, str(error), now + retry_delay, now, task.id, LEASED, task.owner, task.attempts))
+            if state == FAILED:
+                connection.execute('UPDATE workers SET failed = failed + 1, seen = ? WHERE name = ?',
+                                   (now, task.owner))
+        return state if cursor.rowcount == 1 else None
+
+    def batch_status(self, batch):
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for row in self._connection().execute(
+                'SELECT state, COUNT(*) AS n FROM tasks WHERE batch = ? GROUP BY state', (batch,)):
+            counts[row['state']] = row['n']
+        total = sum(counts.values())
+        return {
+            'batch': batch,
+            'total': total,
+            **counts,
+            'finished': total > 0 and counts[QUEUED] + counts[LEASED] == 0
+        }
+
+    def tasks(self, batch, state=None, after=0, limit=1000):
+        sql = ('SELECT id, url, scrape_type, state, attempts, result_id, error, updated FROM tasks '
+               'WHERE batch = ? AND id > ?')
+        params = [batch, after]
+        if state:
+            sql += ' AND state = ?'
+            params.append(state)
+        sql += ' ORDER BY id LIMIT ?'
+        params.append(limit)
+        return [dict(row) for row in self._connection().execute(sql, params)]
+
+    def requeue_failed(self, batch):
+        now = time.time()
+        with self._write() as connection:
+            return connection.execute(
+                'UPDATE tasks SET state = ?, attempts = 0, error = NULL, available_at = ?, updated = ? '
+                'WHERE batch = ? AND state = ?', (QUEUED, now, now, batch, FAILED)).rowcount
+
+    def workers(self):
+        now = time.time()
+        return [dict(row, idle_for=round(now - row['seen'], 1)) for row in self._connection().execute(
+            'SELECT name, seen, completed, failed FROM workers ORDER BY name')]
+
+    def reserve_host(self, host, interval, burst=1, max_wait=None):
+        now = time.time()
+        with self._write() as connection:
+            row = connection.execute('SELECT tat FROM hosts WHERE host = ?', (host,)).fetchone()
+            tat = max(row['tat'] if row else now, now)
+            start = max(now, tat - (burst - 1) * interval)
+            if max_wait is not None and start - now > max_wait:
+                return None
+            connection.execute('INSERT OR REPLACE INTO hosts (host, tat) VALUES (?, ?)', (host, tat + interval))
+        return start - now
+
+    def block_host(self, host, seconds, interval, burst=1):
+        now = time.time()
+        # The first request allowed again is the one whose start (tat - (burst - 1) * interval) is now + seconds
+        blocked_tat = now + seconds + (burst - 1) * interval
+        with self._write() as connection:
+            connection.execute(
+                'INSERT INTO hosts (host, tat) VALUES (?, ?) ON CONFLICT (host) DO UPDATE SET tat = MAX(tat, excluded.tat)',
+                (host, blocked_tat))
+
+    def close(self):
+        """Close this thread's connection"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def open_queue(url='sqlite:///downloads/queue.db'):
+    """Open the WorkQueue a queue URL names (sqlite:///relative/path, sqlite:////absolute/path or a bare path)"""
+    if '://' not in url:
+        return SQLiteWorkQueue(url)
+    if url.startswith('sqlite:///') and len(url) > len('sqlite:///'):
+        return SQLiteWorkQueue(url[len('sqlite:///'):])
+    raise ValueError(f"Unsupported queue URL: {url}")
+
+
+class SharedHostScheduler(HostScheduler):
+    """HostScheduler whose per-host rate holds across every worker sharing a WorkQueue
+
+    Concurrency caps and 429/503 adaptation still run per process, but the
+    shared per-host reservation in the queue replaces the local token
+    bucket, so N workers together stay under the configured rate instead of
+    N times it (and one worker is not held to it twice). The bucket's rate
+    still adapts to 429/503 and sets the reservation interval. Backoffs are
+    published to the other workers too.
+    """
+
+    def __init__(self, queue, **settings):
+        super().__init__(**settings)
+        self.queue = queue
+
+    def _take_token(self, state, now):
+        # The shared reservation below is the rate authority
+        return 0.0
+
+    def acquire(self, url):
+        super().acquire(url)
+        try:
+            host = get_host(url)
+            state = self._state(host)
+            deadline = current_deadline()
+            max_wait = None if deadline is None else deadline.remaining()
+            delay = self.queue.reserve_host(host, 1.0 / state.bucket.rate, self.burst, max_wait)
+            if delay is None:
+                raise DeadlineExceeded(f"Request deadline of {deadline.seconds:g}s exceeded waiting for {host}")
+            if delay > 0:
+                time.sleep(delay)
+        except BaseException:
+            self.release(url)
+            raise
+
+    def record_response(self, url, status_code, retry_after=None):
+        super().record_response(url, status_code, retry_after)
+        if status_code not in BACKOFF_STATUSES:
+            return
+        host = get_host(url)
+        state = self._state(host)
+        blocked = state.blocked_until - time.monotonic()
+        if blocked > 0:
+            self.queue.block_host(host, blocked, 1.0 / state.bucket.rate, self.burst)
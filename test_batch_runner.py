@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the command-line batch runner
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import cli
+from testutils import restore_defaults, serve_directory, write_site
+from utils.batch_runner import read_urls, run_unordered
+
+def test_read_urls_skips_blanks_and_comments():
+    lines = [b'https://a.example.com/\n', b'\n', b'# a comment\n', '  https://b.example.com/x  \n']
+    assert list(read_urls(lines)) == ['https://a.example.com/', 'https://b.example.com/x']
+
+def test_run_unordered_keeps_a_bounded_window():
+    consumed = []
+    finished = []
+    window = []
+
+    def items():
+        for i in range(200):
+            window.append(len(consumed) - len(finished))
+            consumed.append(i)
+            yield i
+
+    def work(i):
+        time.sleep(0.001)
+        return i * 2
+
+    results = []
+    for item, result, error in run_unordered(work, items(), concurrency=4, max_pending=8):
+        finished.append(item)
+        results.append((item, result, error))
+    assert sorted(item for item, _, _ in results) == list(range(200))
+    assert all(result == item * 2 and error is None for item, result, error in results)
+    assert max(window) <= 8
+
+    def fail(i):
+        raise ValueError(f"bad {i}")
+    errors = [str(error) for _, _, error in run_unordered(fail, [1, 2], concurrency=2)]
+    assert sorted(errors) == ['bad 1', 'bad 2']
+
+def test_cli_streams_one_line_per_url_to_a_file():
+    with tempfile.TemporaryDirectory() as directory:
+        write_site(directory, 12)
+        server, base = serve_directory(directory)
+        urls_path = os.path.join(directory, 'urls.txt')
+        output_path = os.path.join(directory, 'out.jsonl')
+        with open(urls_path, 'w') as f:
+            f.write('# pages\n' + ''.join(f'{base}/page-{i}.html\n' for i in range(12)) + f'{base}/missing.html\n')
+        stderr = io.StringIO()
+        try:
+            code = cli.main([urls_path, '-o', output_path, '-e', 'content,urls', '-c', '4', '--rate', '1000',
+                             '--per-host', '8'], stderr=stderr)
+        finally:
+            server.shutdown()
+            restore_defaults()
+        with open(output_path) as f:
+            records = [json.loads(line) for line in f]
+
+    assert code == 0
+    assert sorted(record['index'] for record in records) == list(range(13))
+    by_index = {record['index']: record for record in records}
+    assert by_index[3]['content']['title'] == 'Page 3' and 'elapsed' in by_index[3]
+    assert by_index[3]['urls']['totals']['internal'] >= 1
+    assert by_index[12]['url'].endswith('/missing.html') and '404' in by_index[12]['error']
+    assert 'done: 13 pages, 1 failed' in stderr.getvalue()
+
+def test_cli_pipes_stdin_to_stdout():
+    with tempfile.TemporaryDirectory() as directory:
+        write_site(directory, 3)
+        server, base = serve_directory(directory)
+        stdin = io.BytesIO(''.join(f'{base}/page-{i}.html\n' for i in range(3)).encode())
+        stdout = io.BytesIO()
+        try:
+            code = cli.main(['-', '-e', 'images', '-q', '--no-stylesheets', '--rate', '1000'],
+                            stdin=stdin, stdout=stdout, stderr=io.StringIO())
+        finally:
+            server.shutdown()
+            restore_defaults()
+
+    records = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert code == 0 and len(records) == 3
+    assert all(record['images'][0]['src'].endswith(f"photo-{record['index']}.jpg") for record in records)
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
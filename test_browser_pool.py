@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the headless browser pool, using a fake driver so no browser is needed
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import pytest
+
+from utils.browser_pool import BrowserPool
+from utils.circuit_breaker import CircuitOpenError, configure_default_breaker
+from utils.deadline import DeadlineExceeded, deadline_scope
+
+class FakeDriver:
+    started = 0
+
+    def __init__(self):
+        FakeDriver.started += 1
+        self.quit_called = False
+        self.page_timeouts = []
+
+    def set_page_load_timeout(self, timeout):
+        self.page_timeouts.append(timeout)
+
+    def get(self, url):
+        if 'broken' in url:
+            raise RuntimeError('page crashed')
+        if 'slow' in url:
+            time.sleep(self.page_timeouts[-1])
+            raise RuntimeError('page load timed out')
+        self.url = url
+
+    @property
+    def page_source(self):
+        return f"<html><body><img src='/rendered.jpg'>{self.url}</body></html>"
+
+    def quit(self):
+        self.quit_called = True
+
+def test_browsers_are_reused_and_recycled():
+    FakeDriver.started = 0
+    pool = BrowserPool(size=2, max_pages=3, driver_factory=FakeDriver)
+
+    for i in range(3):
+        assert 'rendered.jpg' in pool.render(f'http://a.example/{i}')
+    assert FakeDriver.started == 1  # one browser served all three pages
+
+    pool.render('http://a.example/4')
+    assert FakeDriver.started == 2  # the first was retired after max_pages
+
+def test_broken_browser_is_replaced():
+    FakeDriver.started = 0
+    pool = BrowserPool(size=1, driver_factory=FakeDriver)
+    with pytest.raises(Exception, match='Error rendering page'):
+        pool.render('http://a.example/broken')
+    pool.render('http://a.example/ok')
+    assert FakeDriver.started == 2
+
+def test_pool_size_is_respected_under_concurrency():
+    FakeDriver.started = 0
+    pool = BrowserPool(size=2, driver_factory=FakeDriver)
+    threads = [threading.Thread(target=pool.render, args=(f'http://h{i}.example/',)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert FakeDriver.started <= 2
+
+def test_rendered_dom_reaches_extractors():
+    from scraper.image_scraper import ImageScraper
+    pool = BrowserPool(size=1, driver_factory=FakeDriver)
+    images = ImageScraper().scrape_images('http://a.example/', pool.render('http://a.example/'))
+    assert [img['src'] for img in images] == ['http://a.example/rendered.jpg']
+
+def test_render_honours_the_deadline_and_breaker():
+    FakeDriver.started = 0
+    pool = BrowserPool(size=1, page_timeout=20, driver_factory=FakeDriver)
+    with deadline_scope(0.2):
+        with pytest.raises(DeadlineExceeded):
+            pool.render('http://a.example/slow')
+    assert FakeDriver.started == 1
+
+    breaker = configure_default_breaker(failure_threshold=1)
+    try:
+        breaker.record_failure('http://down.example/', 'timed out')
+        with pytest.raises(CircuitOpenError):
+            pool.render('http://down.example/page')
+        # Refused before a browser was taken, and other hosts still render
+        assert FakeDriver.started == 1
+        pool.render('http://a.example/ok')
+        driver = pool._idle.get_nowait()['driver']
+        assert driver.page_timeouts == [20]
+    finally:
+        configure_default_breaker()
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
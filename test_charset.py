@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for charset resolution and decoding of fetched pages
+"""
+
+import codecs
+import os
+import sys
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.charset import decode_html, resolve_encoding
+
+FRENCH = 'Le café était très réputé à Montréal, où les élèves déjeunaient ensemble. ' * 10
+
+class FakeResponse:
+    def __init__(self, content, content_type):
+        self.content = content
+        self.headers = {'Content-Type': content_type}
+        self.url = 'http://fr.example.com/article'
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+def test_declarations_in_priority_order():
+    meta_page = b'<html><head><meta charset="windows-1251"></head><body>x</body></html>'
+    assert resolve_encoding(meta_page, 'text/html; charset=UTF-8') == ('utf-8', 'header')
+    assert resolve_encoding(meta_page, 'text/html') == ('cp1251', 'meta')
+    assert resolve_encoding(codecs.BOM_UTF8 + meta_page, 'text/html; charset=latin1') == ('utf-8', 'bom')
+    http_equiv = b'<meta http-equiv="Content-Type" content="text/html; charset=ISO-8859-1">'
+    assert resolve_encoding(http_equiv) == ('cp1252', 'meta')  # decoded as windows-1252, like browsers
+    assert resolve_encoding(b' ' * 2000 + meta_page)[1] != 'meta'  # only the first KB is scanned
+
+def test_undeclared_pages_are_detected_and_cached_per_host():
+    assert resolve_encoding('<p>naïve</p>'.encode('utf-8'), None, 'http://a.example.com/') == ('utf-8', 'utf-8')
+    page = f'<p>{FRENCH}</p>'.encode('cp1252')
+    assert resolve_encoding(page, None, 'http://b.example.com/1') == ('cp1252', 'detected')
+    assert resolve_encoding('<p>Déjà vu</p>'.encode('cp1252'), None, 'http://b.example.com/2') == ('cp1252', 'host')
+    assert decode_html(codecs.BOM_UTF8 + 'é'.encode('utf-8')) == 'é'
+
+def test_scrapers_parse_decoded_text():
+    from scraper.content_scraper import ContentScraper
+
+    # The header says cp1252 while a stale meta tag claims UTF-8
+    html = f'<html><head><meta charset="utf-8"><title>Café</title></head><body><article><p>{FRENCH}</p></article></body></html>'
+    scraper = ContentScraper()
+    with mock.patch.object(scraper.fetcher, 'get', return_value=FakeResponse(html.encode('cp1252'), 'text/html; charset=windows-1252')):
+        content = scraper.scrape_content('http://fr.example.com/article')
+    assert content['title'] == 'Café'
+    assert 'très réputé à Montréal' in content['full_text']
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
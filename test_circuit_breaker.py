@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for request deadlines and the per-host circuit breaker
+"""
+
+import os
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.circuit_breaker import CircuitOpenError, HostCircuitBreaker
+from utils.deadline import DeadlineExceeded, deadline_scope
+from utils.fetcher import Fetcher
+from utils.rate_limiter import HostScheduler
+
+def hanging_server():
+    """A socket that accepts connections (via the backlog) but never answers"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+    return server, f"http://127.0.0.1:{server.getsockname()[1]}"
+
+def closed_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{probe.getsockname()[1]}"
+
+def test_breaker_opens_and_recovers_through_half_open_probe():
+    breaker = HostCircuitBreaker(failure_threshold=3, reset_timeout=0.05, max_reset_timeout=1)
+    url = 'http://flaky.example.com/page'
+    for _ in range(3):
+        breaker.allow(url)
+        breaker.record_failure(url, 'timed out')
+    try:
+        breaker.allow(url)
+        assert False, "an open circuit must fail fast"
+    except CircuitOpenError as e:
+        assert 'flaky.example.com' in str(e)
+    breaker.allow('http://healthy.example.com/')  # other hosts are unaffected
+
+    time.sleep(0.06)
+    breaker.allow(url)  # the half-open probe
+    try:
+        breaker.allow(url)
+        assert False, "only one probe at a time"
+    except CircuitOpenError:
+        pass
+    breaker.record_failure(url, 'timed out')  # failed probe: open again, for twice as long
+    assert breaker.host_stats()['flaky.example.com']['retry_in'] > 0.05
+
+    time.sleep(0.11)
+    breaker.allow(url)
+    breaker.record_response(url, 200)
+    breaker.allow(url)
+    assert breaker.host_stats() == {}
+
+def test_fetch_stops_at_deadline_without_blaming_host():
+    server, base = hanging_server()
+    breaker = HostCircuitBreaker(failure_threshold=1)
+    fetcher = Fetcher(scheduler=HostScheduler(rate=100), breaker=breaker)
+    try:
+        started = time.monotonic()
+        with deadline_scope(0.3):
+            try:
+                fetcher.get(base + '/slow', timeout=30)
+                assert False, "the fetch must give up at the deadline"
+            except DeadlineExceeded:
+                pass
+            try:
+                fetcher.get(base + '/next', timeout=30)
+                assert False, "no new fetch starts once the budget is spent"
+            except DeadlineExceeded:
+                pass
+        assert time.monotonic() - started < 2
+        assert breaker.host_stats() == {}
+    finally:
+        server.close()
+
+def test_unreachable_host_is_cut_off():
+    url = closed_port() + '/'
+    breaker = HostCircuitBreaker(failure_threshold=2, reset_timeout=60)
+    fetcher = Fetcher(scheduler=HostScheduler(rate=100), breaker=breaker)
+    errors = []
+    for _ in range(4):
+        try:
+            fetcher.get(url, timeout=5)
+        except Exception as e:
+            errors.append(type(e).__name__)
+    assert errors == ['ConnectionError', 'ConnectionError', 'CircuitOpenError', 'CircuitOpenError']
+
+def test_scheduler_gives_up_waits_that_outlast_the_deadline():
+    scheduler = HostScheduler(rate=0.2, burst=1)
+    scheduler.acquire('http://slow.example.com/a')
+    scheduler.release('http://slow.example.com/a')
+    started = time.monotonic()
+    with deadline_scope(1):
+        try:
+            scheduler.acquire('http://slow.example.com/b')  # next token in 5s
+            assert False, "waiting past the deadline is pointless"
+        except DeadlineExceeded:
+            pass
+    assert time.monotonic() - started < 0.5
+
+def test_scrape_endpoint_answers_504_at_client_deadline():
+    import app as app_module
+
+    server, base = hanging_server()
+    with tempfile.TemporaryDirectory() as folder:
+        class TestConfig(app_module.Config):
+            RESULTS_DB_PATH = os.path.join(folder, 'results.db')
+            RATE_LIMIT_PER_HOST = 100.0
+
+        app = app_module.create_app(TestConfig)
+        try:
+            started = time.monotonic()
+            response = app.test_client().post('/scrape', json={'url': base + '/', 'type': 'content', 'deadline': 0.5})
+            elapsed = time.monotonic() - started
+        finally:
+            server.close()
+            app_module.create_app()  # restore the default scheduler and breaker
+
+    assert response.status_code == 504 and 'deadline' in response.get_json()['error']
+    assert elapsed < 3
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
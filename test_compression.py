@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the orjson JSON provider and negotiated response compression
+"""
+
+import gzip
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import brotli
+from flask import Flask, jsonify
+
+from utils.compression import ResponseCompressor, choose_encoding
+from utils.json_provider import FastJSONProvider
+
+def make_app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    ResponseCompressor(app, min_size=1024)
+
+    @app.route('/big')
+    def big():
+        return jsonify({'links': [{'url': f'http://x.com/{i}', 'text': 'café'} for i in range(500)], 2: 'x'})
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    return app
+
+def test_choose_encoding_honours_q_values():
+    assert choose_encoding('gzip, deflate, br') == 'br'
+    assert choose_encoding('br;q=0, gzip') == 'gzip'
+    assert choose_encoding('gzip;q=0.5, br;q=0.8') == 'br'
+    assert choose_encoding('identity') is None
+    assert choose_encoding(None) is None
+
+def test_large_json_is_compressed_small_is_not():
+    client = make_app().test_client()
+
+    plain = client.get('/big')
+    body = json.loads(plain.data)
+    assert body['links'][0]['text'] == 'café' and body['2'] == 'x'
+    assert 'Content-Encoding' not in plain.headers
+
+    br = client.get('/big', headers={'Accept-Encoding': 'gzip, br'})
+    assert br.headers['Content-Encoding'] == 'br' and 'Accept-Encoding' in br.headers['Vary']
+    assert json.loads(brotli.decompress(br.data)) == body
+    assert len(br.data) < len(plain.data) / 5
+
+    gz = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert json.loads(gzip.decompress(gz.data)) == body
+
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+
+def test_request_json_is_parsed_by_provider():
+    app = make_app()
+
+    @app.route('/echo', methods=['POST'])
+    def echo():
+        from flask import request
+        return jsonify(request.get_json())
+
+    response = app.test_client().post('/echo', json={'url': 'http://x.com', 'type': 'urls'})
+    assert response.get_json() == {'url': 'http://x.com', 'type': 'urls'}
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for CSS image extraction from inline styles, <style> blocks and stylesheets
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from bs4 import BeautifulSoup
+
+from scraper.css_assets import CSSAssetExtractor, find_css_urls
+from testutils import serve_directory
+
+def test_find_css_urls_skips_fonts_and_data():
+    css = """
+    .a { background: url(img/a.png) no-repeat; }
+    .b { background-image: url( "img/b.jpg" ); }
+    @font-face { src: url('fonts/x.woff2') format('woff2'); }
+    .c { background: url(data:image/png;base64,AAAA); }
+    """
+    assert find_css_urls(css, 'http://x.com/css/site.css') == [
+        'http://x.com/css/img/a.png', 'http://x.com/css/img/b.jpg'
+    ]
+
+def test_extract_reads_all_css_sources_and_caches_stylesheets():
+    with tempfile.TemporaryDirectory() as site:
+        with open(os.path.join(site, 'main.css'), 'w') as f:
+            f.write("@import url('extra.css'); .hero { background: url(/hero.jpg) }")
+        with open(os.path.join(site, 'extra.css'), 'w') as f:
+            f.write(".icon { background-image: url(icons/star.svg) }")
+        server, base = serve_directory(site)
+        html = f"""
+        <html><head>
+          <link rel="stylesheet" href="{base}/main.css">
+          <style>.banner {{ background: url('/banner.png') }}</style>
+        </head><body><div style="background-image: url(/inline.gif)"></div></body></html>
+        """
+        try:
+            extractor = CSSAssetExtractor()
+            found = extractor.extract(BeautifulSoup(html, 'html.parser'), base + '/')
+            assert sorted((url.replace(base, ''), source) for url, source, _ in found) == [
+                ('/banner.png', 'style'), ('/hero.jpg', 'stylesheet'),
+                ('/icons/star.svg', 'stylesheet'), ('/inline.gif', 'inline')
+            ]
+            assert f'{base}/main.css' in extractor.cache
+            assert f'{base}/extra.css' in extractor.cache
+        finally:
+            server.shutdown()
+
+def test_extract_without_css_images_fetches_nothing():
+    extractor = CSSAssetExtractor()
+    soup = BeautifulSoup('<div style="color: red"><p>Hello</p></div>', 'html.parser')
+    assert extractor.extract(soup, 'http://x.com/') == []
+    assert len(extractor.cache) == 0
+
+def test_stylesheet_deadline_is_not_cached():
+    from utils.deadline import deadline_scope
+
+    with tempfile.TemporaryDirectory() as site:
+        with open(os.path.join(site, 'main.css'), 'w') as f:
+            f.write(".hero { background: url(/hero.jpg) }")
+        server, base = serve_directory(site)
+        try:
+            extractor = CSSAssetExtractor()
+            with deadline_scope(0):
+                assert extractor._stylesheet_urls(f'{base}/main.css') == ([], [])
+            assert f'{base}/main.css' not in extractor.cache
+            # A later page with time left fetches the stylesheet for real
+            assert extractor.fetch_stylesheet_images([f'{base}/main.css']) == [f'{base}/hero.jpg']
+
+            assert extractor._stylesheet_urls(f'{base}/missing.css') == ([], [])
+            assert f'{base}/missing.css' in extractor.cache
+        finally:
+            server.shutdown()
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
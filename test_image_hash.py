@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for perceptual image hashing, duplicate collapsing and similar-image search
+"""
+
+import os
+import random
+import sys
+import tempfile
+from io import BytesIO
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+from PIL import Image
+
+from testutils import serve_directory
+from utils.image_hash import HashIndex, ImageHasher, collapse_duplicates, hash_images
+from utils.near_duplicate import hamming_distance
+from utils.results_store import ResultsStore
+
+def picture(seed, size=(400, 300)):
+    """A smooth random picture: upscaled noise, so resizing keeps its structure"""
+    rng = np.random.default_rng(seed)
+    base = Image.fromarray(rng.integers(0, 256, (6, 8, 3), dtype=np.uint8))
+    return base.resize(size, Image.Resampling.BICUBIC)
+
+def encode(image, fmt='PNG', **options):
+    buffer = BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+def test_variants_hash_close_and_different_pictures_far():
+    original = picture(1)
+    variants = [
+        encode(original),
+        encode(original.resize((200, 150)), 'JPEG', quality=60),
+        encode(original.resize((800, 600)), 'JPEG', quality=90),
+        encode(original.convert('L')),
+    ]
+    others = [encode(picture(seed)) for seed in range(2, 8)]
+    hashes = hash_images(variants + others)
+    phashes = [phash for phash, _ in hashes]
+    dhashes = [dhash for _, dhash in hashes]
+
+    for phash, dhash in zip(phashes[1:4], dhashes[1:4]):
+        assert hamming_distance(phash, phashes[0]) <= 8
+        assert hamming_distance(dhash, dhashes[0]) <= 12
+    for phash in phashes[4:]:
+        assert hamming_distance(phash, phashes[0]) > 12
+
+def test_hash_index_matches_linear_scan():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(2000)]
+    # Plant near copies of a few values
+    values += [value ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for value in values[:50]]
+    index = HashIndex()
+    for position, value in enumerate(values):
+        index.add(value, position)
+    assert len(index) == len(values)
+
+    for query in values[:60] + [rng.getrandbits(64) for _ in range(20)]:
+        for radius in (0, 4, 12, 40):
+            expected = sorted(position for position, value in enumerate(values)
+                              if hamming_distance(query, value) <= radius)
+            found = index.search(query, radius)
+            assert sorted(position for position, _ in found) == expected
+            assert [distance for _, distance in found] == sorted(distance for _, distance in found)
+
+def test_hasher_collapses_duplicates_keeping_largest():
+    with tempfile.TemporaryDirectory() as directory:
+        original = picture(3)
+        original.resize((120, 90)).save(os.path.join(directory, 'thumb.jpg'), quality=70)
+        original.resize((600, 450)).save(os.path.join(directory, 'full.png'))
+        picture(4).save(os.path.join(directory, 'other.png'))
+        with open(os.path.join(directory, 'broken.png'), 'wb') as f:
+            f.write(b'not an image')
+        server, base = serve_directory(directory)
+        try:
+            hasher = ImageHasher(max_workers=2)
+            items = [{'src': f'{base}/{name}'} for name in ('thumb.jpg', 'other.png', 'full.png', 'broken.png')]
+            hasher.hash_items(items)
+            assert items[2]['actual_width'] == 600 and len(items[2]['phash']) == 16
+            assert 'hash_error' in items[3]
+
+            kept = collapse_duplicates(items, max_distance=8)
+            assert [item['src'] for item in kept] == [f'{base}/full.png', f'{base}/other.png', f'{base}/broken.png']
+            assert kept[0]['duplicates'] == [f'{base}/thumb.jpg']
+            assert hasher.cache.get(f'{base}/full.png')['phash'] == items[2]['phash']
+        finally:
+            server.shutdown()
+
+def test_store_finds_similar_images():
+    with tempfile.TemporaryDirectory() as folder:
+        store = ResultsStore(os.path.join(folder, 'results.db'))
+        near = f"{0x0123456789abcdef ^ 0b101:016x}"
+        store.save('https://a.example.com/', 'images_videos', {'images': [
+            {'src': 'https://a.example.com/cat.jpg', 'phash': '0123456789abcdef'},
+            {'src': 'https://a.example.com/dog.jpg', 'phash': 'fedcba9876543210'},
+            {'src': 'https://a.example.com/logo.svg'}
+        ], 'videos': []})
+        store.save('https://b.example.com/', 'images_videos', {'images': [
+            {'src': 'https://b.example.com/cat-small.jpg', 'phash': near}
+        ], 'videos': []})
+
+        found = store.similar_media('0123456789abcdef', max_distance=4)
+        assert [(item['url'], item['distance']) for item in found] == [
+            ('https://a.example.com/cat.jpg', 0), ('https://b.example.com/cat-small.jpg', 2)]
+        assert [item['url'] for item in store.similar_media(near, 4, host='b.example.com')] == [
+            'https://b.example.com/cat-small.jpg']
+
+        # A rescrape replaces the page's images; the old ones stop matching
+        store.save('https://b.example.com/', 'images_videos', {'images': [], 'videos': []})
+        assert [item['url'] for item in store.similar_media(near, 4)] == ['https://a.example.com/cat.jpg']
+        store.close()
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
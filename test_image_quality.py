@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for measured image quality scores
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from io import BytesIO
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from testutils import serve_directory
+from utils.image_quality import ImageQualityAnalyzer, rank_by_quality, score_image
+
+def scene(size=(1200, 900), seed=1):
+    """A detailed picture: smooth colour fields, sharp outlines and fine texture"""
+    rng = np.random.default_rng(seed)
+    image = Image.fromarray(rng.integers(0, 256, (9, 12, 3), dtype=np.uint8)).resize(size, Image.Resampling.BICUBIC)
+    draw = ImageDraw.Draw(image)
+    for _ in range(60):
+        x, y, side = rng.integers(0, size[0]), rng.integers(0, size[1]), rng.integers(10, 120)
+        draw.rectangle((x, y, x + side, y + side // 2), outline=tuple(int(v) for v in rng.integers(0, 256, 3)), width=2)
+    texture = Image.fromarray(rng.integers(0, 256, (size[1], size[0]), dtype=np.uint8)).filter(ImageFilter.GaussianBlur(1))
+    return Image.blend(image, Image.merge('RGB', [texture] * 3), 0.2)
+
+def encode(image, fmt='PNG', **options):
+    buffer = BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+def test_metrics_rank_sharpness_compression_and_resolution():
+    picture = scene()
+    crisp = score_image(encode(picture, 'JPEG', quality=95))
+    blurred = score_image(encode(picture.filter(ImageFilter.GaussianBlur(4)), 'JPEG', quality=95))
+    blocky = score_image(encode(picture, 'JPEG', quality=10))
+    small = score_image(encode(picture.resize((160, 120)), 'JPEG', quality=95))
+
+    assert crisp['quality']['jpeg_quality'] == 95 and blocky['quality']['jpeg_quality'] <= 20
+    assert crisp['quality']['sharpness'] > blurred['quality']['sharpness'] + 20
+    assert crisp['quality']['compression'] > blocky['quality']['compression'] + 50
+    assert small['quality']['resolution'] < 40
+    assert crisp['quality_score'] > max(blurred['quality_score'], blocky['quality_score'], small['quality_score'])
+    assert (crisp['actual_width'], crisp['actual_height']) == (1200, 900)
+
+    # A JPEG re-saved as PNG has no quantization table but keeps its block edges
+    lossless = score_image(encode(picture))
+    resaved = score_image(encode(Image.open(BytesIO(encode(picture, 'JPEG', quality=10)))))
+    assert resaved['quality']['jpeg_quality'] is None
+    assert resaved['quality']['blockiness'] > lossless['quality']['blockiness'] + 0.5
+    assert lossless['quality']['compression'] > 95 and resaved['quality']['compression'] < 60
+
+def test_analyzer_scores_each_picture_once_and_ranks():
+    with tempfile.TemporaryDirectory() as directory:
+        picture = scene(seed=2)
+        picture.save(os.path.join(directory, 'best.png'))
+        shutil.copy(os.path.join(directory, 'best.png'), os.path.join(directory, 'mirror.png'))
+        picture.save(os.path.join(directory, 'worst.jpg'), quality=8)
+        server, base = serve_directory(directory)
+        try:
+            analyzer = ImageQualityAnalyzer(max_workers=2)
+            items = [{'src': f'{base}/{name}'} for name in ('worst.jpg', 'best.png', 'mirror.png', 'missing.png')]
+            analyzer.score_items(items)
+            assert items[1]['quality_score'] == items[2]['quality_score'] > items[0]['quality_score']
+            assert 'quality_error' in items[3]
+            assert len(analyzer.reports) == 2  # the mirror has the same bytes as best.png
+
+            # Known URLs are answered from the cache without a fetch
+            server.shutdown()
+            again = [{'src': f'{base}/best.png'}]
+            analyzer.score_items(again)
+            assert again[0]['quality_score'] == items[1]['quality_score']
+        finally:
+            server.shutdown()
+
+    ranked = rank_by_quality(items, min_quality=items[1]['quality_score'])
+    assert [item['src'] for item in ranked] == [f'{base}/best.png', f'{base}/mirror.png']
+    assert rank_by_quality(items)[-1]['src'] == f'{base}/missing.png'
+
+def test_premium_images_are_scored_and_filtered():
+    import app as app_module
+
+    with tempfile.TemporaryDirectory() as directory:
+        picture = scene(seed=3)
+        picture.save(os.path.join(directory, 'sharp.png'))
+        picture.filter(ImageFilter.GaussianBlur(5)).resize((300, 225)).save(os.path.join(directory, 'soft.jpg'), quality=30)
+        with open(os.path.join(directory, 'index.html'), 'w') as f:
+            f.write('<html><body><img src="soft.jpg"><img src="sharp.png"></body></html>')
+        server, base = serve_directory(directory)
+
+        class TestConfig(app_module.Config):
+            RESULTS_DB_PATH = os.path.join(directory, 'results.db')
+            RATE_LIMIT_PER_HOST = 100.0
+
+        try:
+            client = app_module.create_app(TestConfig).test_client()
+            ranked = client.post('/premium-scrape', json={
+                'url': base + '/index.html', 'type': 'premium_images', 'settings': {'auto_quality': True}}).get_json()
+            filtered = client.post('/premium-scrape', json={
+                'url': base + '/index.html', 'type': 'premium_images', 'settings': {'min_quality': 70}}).get_json()
+            invalid = client.post('/premium-scrape', json={
+                'url': base + '/index.html', 'type': 'premium_images', 'settings': {'min_quality': 'high'}})
+        finally:
+            server.shutdown()
+            app_module.create_app()
+
+    assert [image['src'].rsplit('/', 1)[1] for image in ranked['images']] == ['sharp.png', 'soft.jpg']
+    assert ranked['images'][0]['quality_score'] > ranked['images'][1]['quality_score']
+    assert 'ai_enhanced' not in ranked['images'][0]
+    assert invalid.status_code == 400 and 'min_quality' in invalid.get_json()['error']
+    assert filtered['total_found'] == 2 and [image['src'].rsplit('/', 1)[1] for image in filtered['images']] == ['sharp.png']
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
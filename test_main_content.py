@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for boilerplate removal and main-content extraction
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from scraper.main_content import MainContentExtractor
+
+ARTICLE = ("The scraper now scores blocks of text by their length, punctuation and link density, "
+           "so the article body wins over menus, banners and footers. ")
+
+PAGE = f"""
+<html><body>
+  <div class="menu"><a href="/a">Home</a> <a href="/b">News</a> <a href="/c">Sport</a> <a href="/d">Weather</a></div>
+  <div id="cookie-consent"><p>We use cookies on this website, by browsing you agree to our cookie policy.</p></div>
+  <div class="col-8"><p>{ARTICLE}</p><p>{ARTICLE}</p><p>{ARTICLE}</p></div>
+  <div class="related"><ul>{''.join(f'<li><a href="/s/{i}">Another related story headline number {i}</a></li>' for i in range(8))}</ul></div>
+  <div class="site-foot"><p>Copyright Example Media Group, all rights reserved, terms apply.</p></div>
+</body></html>
+"""
+
+def test_lxml_path_keeps_article_and_drops_boilerplate():
+    text = MainContentExtractor().extract(PAGE)
+    assert text.count('scraper now scores') == 3
+    assert 'cookies' not in text
+    assert 'related story' not in text
+    assert 'Copyright' not in text
+
+def test_short_pages_fall_back():
+    assert MainContentExtractor().extract('<html><body><p>Too short to be an article.</p></body></html>') == ''
+    assert MainContentExtractor().extract(b'') == ''
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the media probe stage, served by a local HTTP server
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from PIL import Image
+
+from testutils import serve_directory
+from utils.media_probe import MediaProbe, filter_probed, parse_filters
+
+def test_probe_reads_size_type_and_dimensions():
+    with tempfile.TemporaryDirectory() as directory:
+        Image.new('RGB', (640, 480), 'red').save(os.path.join(directory, 'big.png'))
+        Image.new('RGB', (16, 16), 'blue').save(os.path.join(directory, 'icon.png'))
+        server, base = serve_directory(directory)
+        try:
+            probe = MediaProbe(max_workers=2)
+            items = [{'src': f'{base}/big.png'}, {'src': f'{base}/icon.png'}, {'src': f'{base}/missing.png'}]
+            probe.probe_items(items)
+
+            assert items[0]['actual_width'] == 640 and items[0]['actual_height'] == 480
+            assert items[0]['mime_type'] == 'image/png'
+            assert items[0]['bytes'] == os.path.getsize(os.path.join(directory, 'big.png'))
+            assert items[1]['actual_width'] == 16
+            assert items[2]['actual_width'] is None
+
+            # Second probe is answered from the cache
+            assert probe.probe(f'{base}/big.png') is probe.probe(f'{base}/big.png')
+
+            kept = filter_probed(items, {'min_width': 32})
+            assert [item['src'] for item in kept] == [items[0]['src'], items[2]['src']]
+        finally:
+            server.shutdown()
+
+def test_probe_does_not_cache_a_request_deadline():
+    from utils.deadline import deadline_scope
+
+    with tempfile.TemporaryDirectory() as directory:
+        Image.new('RGB', (64, 48), 'red').save(os.path.join(directory, 'late.png'))
+        server, base = serve_directory(directory)
+        try:
+            probe = MediaProbe(max_workers=1)
+            with deadline_scope(0):
+                assert 'deadline' in probe.probe(f'{base}/late.png')['probe_error']
+            # A later request with time left probes the URL for real
+            assert probe.probe(f'{base}/late.png')['actual_width'] == 64
+
+            missing = probe.probe(f'{base}/missing.png')
+            assert 'probe_error' in missing and probe.probe(f'{base}/missing.png') is missing
+        finally:
+            server.shutdown()
+
+def test_filters_are_coerced_or_rejected():
+    import pytest
+
+    items = [{'actual_width': 640, 'bytes': 5000}, {'actual_width': 16, 'bytes': 200}, {'actual_width': None}]
+    assert filter_probed(items, {'min_width': '32', 'max_bytes': 10000.0}) == [items[0], items[2]]
+    for bad in ({'min_width': 'wide'}, {'max_bytes': [1]}, {'min_height': True}, ['min_width']):
+        with pytest.raises(ValueError):
+            parse_filters(bad)
+
+def test_scrape_rejects_bad_filters():
+    import app as app_module
+
+    with tempfile.TemporaryDirectory() as directory:
+        class TestConfig(app_module.Config):
+            RESULTS_DB_PATH = os.path.join(directory, 'results.db')
+
+        try:
+            client = app_module.create_app(TestConfig).test_client()
+            response = client.post('/scrape', json={'url': 'http://a.example.com/', 'type': 'images_videos',
+                                                    'probe': True, 'filters': {'min_width': 'wide'}})
+        finally:
+            app_module.create_app()
+
+    assert response.status_code == 400 and 'min_width' in response.get_json()['error']
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
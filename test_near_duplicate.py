@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for SimHash fingerprints and the near-duplicate LSH index
+"""
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.near_duplicate import NearDuplicateIndex, SimHasher, hamming_distance
+
+rng = random.Random(3)
+VOCABULARY = [f"word{i}" for i in range(3000)]
+
+def article(words=400):
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(words))
+
+def test_similar_texts_have_close_fingerprints():
+    hasher = SimHasher()
+    text = article()
+    variant = text + ' Page 2 of 7, printer friendly version'
+    assert hamming_distance(hasher.fingerprint(text), hasher.fingerprint(variant)) <= 6
+    assert hamming_distance(hasher.fingerprint(text), hasher.fingerprint(article())) > 10
+    assert hasher.fingerprint(text) == SimHasher().fingerprint(text)  # stable across instances
+
+def test_index_flags_near_duplicates_only():
+    index = NearDuplicateIndex(max_distance=6)
+    original = article()
+    assert index.check('http://x.com/story', original)[1] is None
+    assert index.check('http://x.com/story?utm_source=feed', original + ' Share this story')[1] == 'http://x.com/story'
+    assert index.check('http://x.com/other', article())[1] is None
+    assert index.check('http://x.com/empty', '')[1] is None
+    assert len(index) == 2
+
+def test_reindexing_a_changed_page_replaces_its_fingerprint():
+    index = NearDuplicateIndex()
+    index.check('http://x.com/live', article())
+    updated = article()
+    index.check('http://x.com/live', updated)
+    assert index.query(index.hasher.fingerprint(updated))[0] == ('http://x.com/live', 0)
+
+def test_index_evicts_the_least_recent_document():
+    index = NearDuplicateIndex(max_entries=2)
+    texts = {name: article() for name in ('a', 'b', 'c')}
+    index.check('http://x.com/a', texts['a'])
+    index.check('http://x.com/b', texts['b'])
+    # A copy of a keeps it fresh, so adding c evicts b
+    assert index.check('http://x.com/a-copy', texts['a'])[1] == 'http://x.com/a'
+    index.check('http://x.com/c', texts['c'])
+
+    assert len(index) == 2
+    assert index.query(index.hasher.fingerprint(texts['a']))[0] == ('http://x.com/a', 0)
+    assert index.query(index.hasher.fingerprint(texts['b'])) == []
+    # Evicted documents leave nothing behind in the band tables
+    indexed = {doc_id for table in index._tables for bucket in table.values() for doc_id in bucket}
+    assert indexed == set(index._fingerprints) and all(bucket for table in index._tables for bucket in table.values())
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
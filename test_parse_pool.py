@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for parsing pages in the worker process pool
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from scraper.content_scraper import ContentScraper
+from scraper.url_scraper import URLScraper
+from testutils import serve_directory
+from utils.deadline import DeadlineExceeded, deadline_scope
+from utils.parse_pool import ParsePool
+
+PAGE = b"""<html><head><title>Pool</title><link rel="stylesheet" href="/site.css"></head><body>
+<article><p>Parsing in worker processes keeps the request threads free, and every core busy.</p>
+<p>Each worker is recycled after a number of pages or when it grows past the memory cap.</p></article>
+<img src="/a.jpg" alt="A"><video src="/clip.mp4"></video>
+<a href="/about">About</a><a href="/report.pdf">Report</a><a href="mailto:x@x.com">Mail</a>
+</body></html>"""
+
+def test_pool_results_match_in_thread_scrapers():
+    pool = ParsePool(max_workers=2)
+    try:
+        images, urls, content = pool.parse_many([
+            ('images', 'http://x.com/', PAGE), ('urls', 'http://x.com/', PAGE), ('content', 'http://x.com/', PAGE)
+        ])
+    finally:
+        pool.close()
+
+    assert urls == URLScraper().scrape_urls('http://x.com/', PAGE)
+    assert content == ContentScraper().scrape_content('http://x.com/', PAGE)
+    images, stylesheet_links = images
+    assert [image['src'] for image in images] == ['http://x.com/a.jpg']
+    assert stylesheet_links == ['http://x.com/site.css']  # reported back, never fetched by the worker
+
+def test_memory_cap_recycles_the_pool_and_errors_propagate():
+    pool = ParsePool(max_workers=1, max_memory_mb=0)
+    try:
+        assert pool.parse('videos', 'http://x.com/', PAGE)[0]['src'] == 'http://x.com/clip.mp4'
+        assert pool.recycled == 1
+        try:
+            pool.parse('content', 'http://x.com/', None)
+            assert False, "expected the scraper error to propagate"
+        except Exception as e:
+            assert 'Error scraping content' in str(e)
+    finally:
+        pool.close()
+
+class HungPage:
+    """Unpickling this in a worker blocks it like a parse that never finishes"""
+
+    def __reduce__(self):
+        return time.sleep, (60,)
+
+def test_parse_outliving_its_timeout_is_killed_after_a_deadline():
+    pool = ParsePool(max_workers=1, timeout=1)
+    try:
+        with deadline_scope(0.2):
+            try:
+                pool.parse('content', 'http://x.com/', HungPage())
+                assert False, "expected the request deadline to end the wait"
+            except DeadlineExceeded:
+                pass
+        workers = list(pool._executor._processes.values())
+        assert pool.recycled == 0 and all(worker.is_alive() for worker in workers)
+
+        time.sleep(1.5)
+        assert pool.recycled == 1 and not any(worker.is_alive() for worker in workers)
+        assert pool.parse('content', 'http://x.com/', PAGE)['title'] == 'Pool'
+    finally:
+        pool.close()
+
+def test_scrape_with_parse_workers_fetches_once():
+    import app as app_module
+
+    with tempfile.TemporaryDirectory() as site:
+        with open(os.path.join(site, 'page.html'), 'wb') as f:
+            f.write(PAGE)
+        with open(os.path.join(site, 'site.css'), 'w') as f:
+            f.write('.hero { background: url(/hero.png) }')
+        server, base = serve_directory(site)
+
+        class TestConfig(app_module.Config):
+            PARSE_WORKERS = 2
+            RESULTS_DB_PATH = os.path.join(site, 'results.db')
+
+        class NoStylesheetsConfig(TestConfig):
+            CSS_FETCH_STYLESHEETS = False
+            RESULTS_DB_PATH = os.path.join(site, 'results-no-css.db')
+
+        bodies = []
+        try:
+            for config in (TestConfig, NoStylesheetsConfig):
+                app = app_module.create_app(config)
+                try:
+                    response = app.test_client().post('/scrape', json={'url': f'{base}/page.html',
+                                                                       'type': 'images_videos'})
+                    bodies.append(response.get_json())
+                finally:
+                    app.extensions['scrapers'].get('parse_pool').close()
+                    app.extensions['scrapers'].get('results_store').close()
+        finally:
+            server.shutdown()
+            app_module.create_app()
+
+    body, without_stylesheets = bodies
+    assert [image['src'] for image in body['images']] == [f'{base}/a.jpg', f'{base}/hero.png']
+    assert body['images'][1]['css_source'] == 'stylesheet'
+    assert body['videos'][0]['src'] == f'{base}/clip.mp4'
+    assert [image['src'] for image in without_stylesheets['images']] == [f'{base}/a.jpg']
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
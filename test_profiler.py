@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for profiling a scrape
+"""
+
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from testutils import serve_directory
+from utils.profiler import ScrapeProfiler
+
+def allocate(megabytes):
+    block = bytearray(megabytes * 1024 * 1024)
+    time.sleep(0.1)
+    return len(block)
+
+def test_report_keys_and_written_files():
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = ScrapeProfiler(directory, sample_interval=0.001)
+        result, report = profiler.profile(allocate, 4)
+
+        assert result == 4 * 1024 * 1024
+        assert set(report) == {'profile_id', 'wall_time', 'peak_memory_bytes', 'samples', 'time_breakdown',
+                               'top_functions', 'pstats_url', 'collapsed_url'}
+        assert report['wall_time'] >= 0.1 and report['peak_memory_bytes'] >= 4 * 1024 * 1024
+        assert report['samples'] > 0 and set(report['time_breakdown']) == {'network', 'cpu'}
+        assert any('allocate' in entry['function'] for entry in report['top_functions'])
+
+        # Reports link to the download endpoint, never to server paths
+        assert report['pstats_url'] == f"/profiles/{report['profile_id']}.pstats"
+        assert report['collapsed_url'] == f"/profiles/{report['profile_id']}.collapsed"
+        assert sorted(os.listdir(directory)) == [f"{report['profile_id']}.collapsed", f"{report['profile_id']}.pstats"]
+        with open(os.path.join(directory, f"{report['profile_id']}.collapsed")) as f:
+            lines = f.read().splitlines()
+        assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+        assert any('allocate' in line for line in lines)
+
+def test_concurrent_profiles_keep_their_own_peak():
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = ScrapeProfiler(directory)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            reports = [future.result()[1] for future in [pool.submit(profiler.profile, allocate, 8),
+                                                         pool.submit(profiler.profile, allocate, 8)]]
+    assert all(report['peak_memory_bytes'] >= 8 * 1024 * 1024 for report in reports)
+
+def test_scrape_endpoint_links_downloadable_profiles():
+    import app as app_module
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, 'page.html'), 'w') as f:
+            f.write('<html><head><title>Profiled</title></head><body><p>Measured.</p></body></html>')
+        server, base = serve_directory(directory)
+
+        class TestConfig(app_module.Config):
+            PROFILING_ENABLED = True
+            PROFILE_FOLDER = os.path.join(directory, 'profiles')
+            RESULTS_DB_PATH = os.path.join(directory, 'results.db')
+            RATE_LIMIT_PER_HOST = 100.0
+
+        try:
+            client = app_module.create_app(TestConfig).test_client()
+            body = client.post('/scrape', json={'url': f'{base}/page.html', 'type': 'content',
+                                                'profile': True}).get_json()
+            download = client.get(body['profile']['pstats_url'])
+            collapsed = client.get(body['profile']['collapsed_url'])
+        finally:
+            server.shutdown()
+            app_module.create_app()
+
+    assert body['content']['title'] == 'Profiled'
+    assert download.status_code == 200 and len(download.data) > 0
+    assert collapsed.status_code == 200
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-host politeness scheduler
+"""
+
+import os
+import sys
+import tempfile
+import time
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.rate_limiter import HostScheduler, get_host, parse_retry_after
+
+def test_token_bucket_limits_rate_per_host():
+    """Requests beyond the burst wait for tokens; other hosts are unaffected"""
+    scheduler = HostScheduler(rate=20.0, burst=2, max_concurrency=10)
+    started = time.monotonic()
+    for _ in range(4):
+        with scheduler.slot('http://a.example/page'):
+            pass
+    elapsed_a = time.monotonic() - started
+
+    started = time.monotonic()
+    with scheduler.slot('http://b.example/page'):
+        pass
+    elapsed_b = time.monotonic() - started
+
+    assert elapsed_a >= 0.09  # two tokens had to be refilled at 20/s
+    assert elapsed_b < 0.05
+
+def test_concurrency_cap_per_host():
+    """No more than max_concurrency requests run at once against a host"""
+    scheduler = HostScheduler(rate=1000.0, burst=1000, max_concurrency=2)
+    peak = []
+    lock = threading.Lock()
+
+    def worker():
+        with scheduler.slot('http://a.example/'):
+            with lock:
+                peak.append(scheduler.host_stats()['a.example']['in_flight'])
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+
+def test_backoff_on_429_honours_retry_after():
+    """A 429 halves the host rate and blocks it for Retry-After seconds"""
+    scheduler = HostScheduler(rate=4.0, burst=4)
+    scheduler.record_response('http://a.example/', 429, '0.2')
+    stats = scheduler.host_stats()['a.example']
+    assert stats['rate'] == 2.0
+    assert 0.1 < stats['blocked_for'] <= 0.2
+
+    started = time.monotonic()
+    with scheduler.slot('http://a.example/'):
+        pass
+    assert time.monotonic() - started >= 0.15
+
+    scheduler.record_response('http://a.example/', 200)
+    assert scheduler.host_stats()['a.example']['rate'] > 2.0
+
+def test_parse_retry_after():
+    assert parse_retry_after('5') == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('garbage') is None
+
+def test_fair_order_and_batch_interleave_hosts():
+    """Batches are spread across hosts instead of draining one host first"""
+    scheduler = HostScheduler(rate=1000.0, burst=1000, max_concurrency=1)
+    urls = [f'http://a.example/{i}' for i in range(3)] + [f'http://b.example/{i}' for i in range(3)]
+    ordered = scheduler.fair_order(urls)
+    assert [u.split('/')[2] for u in ordered] == ['a.example', 'b.example'] * 3
+
+    results = list(scheduler.run_batch(lambda url: url.upper(), urls, max_workers=4))
+    assert sorted(url for url, result, error in results) == sorted(urls)
+    assert all(error is None and result == url.upper() for url, result, error in results)
+
+def test_streamed_responses_hold_their_slot_until_closed():
+    from testutils import serve_directory
+    from utils.fetcher import Fetcher
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, 'big.bin'), 'wb') as f:
+            f.write(os.urandom(256 * 1024))
+        server, base = serve_directory(directory)
+        scheduler = HostScheduler(rate=1000.0, burst=1000, max_concurrency=2)
+        peak = []
+        lock = threading.Lock()
+
+        def download(read_to_end):
+            response = Fetcher(scheduler=scheduler).get(f'{base}/big.bin', stream=True)
+            with lock:
+                peak.append(scheduler.host_stats()[get_host(base)]['in_flight'])
+            time.sleep(0.05)
+            if read_to_end:
+                # Reading the whole body gives the slot back without an explicit close()
+                assert len(b''.join(response.iter_content(64 * 1024))) == 256 * 1024
+            else:
+                response.raw.read(1024)
+                response.close()
+
+        try:
+            threads = [threading.Thread(target=download, args=(i % 2 == 0,)) for i in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            server.shutdown()
+
+    assert len(peak) == 6 and max(peak) == 2
+    assert scheduler.host_stats()[get_host(base)]['in_flight'] == 0
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for /scrape field selection and cursor pagination
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.response_shaper import page_of, paginate, parse_fields, select_fields
+
+RESULT = {
+    'type': 'images_videos',
+    'url': 'http://x.com',
+    'images': [{'src': f'http://x.com/{i}.jpg', 'alt': f'image {i}', 'width': 100} for i in range(25)],
+    'videos': [{'src': 'http://x.com/v.mp4', 'sources': [{'url': 'http://x.com/v.mp4'}]}]
+}
+
+def test_select_fields_keeps_requested_paths_only():
+    tree = parse_fields('images.src, videos')
+    shaped = select_fields(RESULT, tree)
+    assert set(shaped) == {'type', 'url', 'images', 'videos'}
+    assert shaped['images'][0] == {'src': 'http://x.com/0.jpg'}
+    assert shaped['videos'] == RESULT['videos']
+    assert parse_fields(['images', 'images.src']) == {'images': {}}  # the wider selection wins
+    assert len(RESULT['images'][0]) == 3  # the cached original is never modified
+
+def test_paginate_and_follow_cursors():
+    shaped, pages = paginate(select_fields(RESULT, parse_fields('images.src')), 10, 'tok', ['images.src'])
+    assert len(shaped['images']) == 10 and pages['images']['total'] == 25
+
+    cursor, seen = pages['images']['next_cursor'], [image['src'] for image in shaped['images']]
+    while cursor:
+        page = page_of(RESULT, cursor)
+        assert set(page['items'][0]) == {'src'}
+        seen.extend(image['src'] for image in page['items'])
+        cursor = page['next_cursor']
+    assert seen == [image['src'] for image in RESULT['images']]
+
+def test_scrape_page_endpoint():
+    import app as app_module
+
+    with tempfile.TemporaryDirectory() as folder:
+        class TestConfig(app_module.Config):
+            RESULTS_DB_PATH = os.path.join(folder, 'results.db')
+
+        client = app_module.create_app(TestConfig).test_client()
+        store = client.application.extensions['scrapers'].get('results_store')
+        store.save('http://x.com', 'images_videos', RESULT)
+
+        response = client.post('/scrape', json={'url': 'http://x.com', 'type': 'images_videos', 'max_age': 60,
+                                                'fields': 'images.src', 'page_size': 20})
+        first = response.get_json()
+        assert len(response.data) < len(json.dumps(RESULT))
+        assert 'videos' not in first and len(first['images']) == 20
+
+        # The cursor still works after the in-process cache is gone, via the results store
+        client.application.extensions['scrapers'].get('result_pages').clear()
+        page = client.get(f"/scrape/page?cursor={first['pages']['images']['next_cursor']}").get_json()
+        assert [image['src'] for image in page['items']] == [f'http://x.com/{i}.jpg' for i in range(20, 25)]
+        assert client.get('/scrape/page?cursor=bogus').status_code == 400
+        invalid = client.post('/scrape', json={'url': 'http://x.com', 'type': 'images_videos', 'max_age': 60,
+                                               'page_size': 'twenty'})
+        assert invalid.status_code == 400 and 'page_size' in invalid.get_json()['error']
+        store.close()
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
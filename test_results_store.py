@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite results store and its query endpoints
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.results_store import ResultsStore
+
+def urls_payload(*files):
+    return {
+        'type': 'urls',
+        'url': 'http://x.com/docs',
+        'urls': {
+            'internal_links': [{'url': 'http://x.com/about', 'text': 'About'}],
+            'file_links': [{'url': f'http://x.com/{name}', 'text': name, 'file_type': name.split('.')[-1]}
+                           for name in files]
+        }
+    }
+
+def content_payload(*paragraphs):
+    return {
+        'type': 'content',
+        'url': 'http://x.com/post',
+        'content': {'title': 'Post', 'paragraphs': list(paragraphs), 'full_text': ' '.join(paragraphs)}
+    }
+
+def test_links_are_queryable_and_paginated():
+    with tempfile.TemporaryDirectory() as folder:
+        store = ResultsStore(os.path.join(folder, 'results.db'))
+        store.save('http://x.com/docs', 'urls', urls_payload('a.pdf', 'b.pdf', 'c.zip', 'd.pdf'))
+
+        first = store.links(host='x.com', file_type='pdf', limit=2)
+        assert [link['url'] for link in first['items']] == ['http://x.com/a.pdf', 'http://x.com/b.pdf']
+        second = store.links(host='x.com', file_type='pdf', limit=2, cursor=first['next_cursor'])
+        assert [link['url'] for link in second['items']] == ['http://x.com/d.pdf']
+        assert second['next_cursor'] is None
+        store.close()
+
+def test_rescrape_replaces_indexed_rows_and_keeps_history():
+    with tempfile.TemporaryDirectory() as folder:
+        store = ResultsStore(os.path.join(folder, 'results.db'), keep_snapshots=2)
+        for i, name in enumerate(['old.pdf', 'mid.pdf', 'new.pdf']):
+            store.save('http://x.com/docs', 'urls', urls_payload(name), fetched_at=1000 + i)
+
+        assert [link['url'] for link in store.links(file_type='pdf')['items']] == ['http://x.com/new.pdf']
+        history = store.pages(url='http://x.com/docs')['items']
+        assert [page['fetched_at'] for page in history] == [1002, 1001]
+        assert store.latest('http://x.com/docs', 'urls')['fetched_at'] == 1002
+        assert store.latest('http://x.com/docs', 'urls', max_age=60) is None
+        store.close()
+
+def test_concurrent_saves_leave_one_latest_snapshot():
+    class SlowStore(ResultsStore):
+        def _drop_details(self, connection, page_ids):
+            # Widen the gap between reading the latest rows and replacing them
+            time.sleep(0.1)
+            super()._drop_details(connection, page_ids)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'results.db')
+        stores = [SlowStore(path) for _ in range(2)]
+        stores[0].save('http://x.com/docs', 'urls', urls_payload('old.pdf'))
+
+        threads = [threading.Thread(target=store.save, args=('http://x.com/docs', 'urls', urls_payload(name)))
+                   for store, name in zip(stores, ['a.pdf', 'b.pdf'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        latest = stores[0]._connection().execute(
+            "SELECT COUNT(*) FROM pages WHERE url = 'http://x.com/docs' AND latest = 1").fetchone()[0]
+        assert latest == 1
+        assert len(stores[0].links(file_type='pdf')['items']) == 1
+        for store in stores:
+            store.close()
+
+def test_full_text_search_over_paragraphs():
+    with tempfile.TemporaryDirectory() as folder:
+        store = ResultsStore(os.path.join(folder, 'results.db'))
+        store.save('http://x.com/post', 'content', content_payload(
+            'The quick brown fox jumps over the lazy dog.', 'An unrelated second paragraph.'))
+
+        hits = store.search('brown fox')['items']
+        assert len(hits) == 1 and hits[0]['url'] == 'http://x.com/post' and hits[0]['position'] == 0
+        assert '[brown]' in hits[0]['snippet']
+        assert store.search('"unbalanced')['items'] == []  # user input is never parsed as FTS syntax
+        store.close()
+
+def test_scrape_endpoint_answers_from_store():
+    import app as app_module
+
+    with tempfile.TemporaryDirectory() as folder:
+        class TestConfig(app_module.Config):
+            RESULTS_DB_PATH = os.path.join(folder, 'results.db')
+
+        client = app_module.create_app(TestConfig).test_client()
+        store = client.application.extensions['scrapers'].get('results_store')
+        store.save('http://x.com/docs', 'urls', urls_payload('a.pdf'), fetched_at=time.time())
+
+        response = client.post('/scrape', json={'url': 'http://x.com/docs', 'type': 'urls', 'max_age': 3600})
+        assert response.get_json()['from_store'] is True
+        assert client.get('/results/links?file_type=pdf').get_json()['items'][0]['url'] == 'http://x.com/a.pdf'
+        assert client.get('/results/search').status_code == 400
+        store.close()
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight coalescing of identical concurrent scrapes
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight(grace=0)
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        time.sleep(0.2)
+        return {'value': value}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flight.do('key', slow, 1), range(8)))
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+    flight.do('key', slow, 2)  # nothing in flight and no grace window: runs again
+    assert calls == [1, 2]
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    flight = SingleFlight(grace=5)
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.2)
+        raise Exception("Error scraping URLs: 503")
+
+    def call():
+        try:
+            flight.do('key', failing)
+        except Exception as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(call)
+        started.wait()
+        followers = [pool.submit(call) for _ in range(3)]
+        errors = [leader.result()] + [future.result() for future in followers]
+    assert errors == ["Error scraping URLs: 503"] * 4
+    assert flight.do('key', lambda: 'recovered') == 'recovered'
+
+def test_followers_retry_when_the_leader_runs_out_of_its_deadline():
+    from utils.deadline import DeadlineExceeded, check_deadline, deadline_scope
+
+    flight = SingleFlight(grace=0)
+    started = threading.Event()
+    calls = []
+
+    def scrape():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        try:
+            check_deadline()
+        except DeadlineExceeded as e:
+            # Scrapers wrap failures; the deadline stays in the chain
+            raise Exception(f"Error scraping content: {str(e)}")
+        return 'page'
+
+    def leader():
+        with deadline_scope(0.05):
+            flight.do('key', scrape)
+
+    def follower():
+        with deadline_scope(5):
+            return flight.do('key', scrape)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(leader)
+        started.wait()
+        second = pool.submit(follower)
+        try:
+            first.result()
+            assert False, "the leader's own deadline must still fail it"
+        except Exception as e:
+            assert 'deadline' in str(e)
+        assert second.result() == 'page'
+    assert len(calls) == 2
+
+def test_grace_window_reuses_a_finished_result():
+    flight = SingleFlight(grace=0.2)
+    assert flight.do('key', lambda: 'first') == 'first'
+    assert flight.do('key', lambda: 'second') == 'first'
+    time.sleep(0.25)
+    assert flight.do('key', lambda: 'third') == 'third'
+
+def test_scrape_endpoint_coalesces_identical_requests():
+    import app as app_module
+
+    calls = []
+    original = app_module.run_scrape
+
+    def fake_run_scrape(url, scrape_type, options=None):
+        calls.append(url)
+        time.sleep(0.2)
+        return {'type': 'urls', 'urls': {'totals': {'total': 0}}, 'url': url}
+
+    with tempfile.TemporaryDirectory() as folder:
+        class TestConfig(app_module.Config):
+            RESULTS_DB_PATH = os.path.join(folder, 'results.db')
+
+        app = app_module.create_app(TestConfig)
+        app_module.run_scrape = fake_run_scrape
+        try:
+            def post(fields):
+                with app.test_client() as client:
+                    return client.post('/scrape', json={'url': 'http://x.com', 'type': 'urls', 'fields': fields})
+
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                responses = list(pool.map(post, ['urls', 'urls.totals'] * 3))
+        finally:
+            app_module.run_scrape = original
+            app.extensions['scrapers'].get('results_store').close()
+
+    assert calls == ['http://x.com']
+    assert all(response.status_code == 200 for response in responses)
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
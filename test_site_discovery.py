@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for robots.txt and sitemap based URL discovery
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from scraper.site_discovery import SiteDiscovery, parse_lastmod
+from testutils import serve_directory
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+def write(site, name, content):
+    mode = 'wb' if isinstance(content, bytes) else 'w'
+    with open(os.path.join(site, name), mode) as f:
+        f.write(content)
+
+def url_set(base, entries):
+    urls = ''.join(f'<url><loc>{base}{path}</loc>' + (f'<lastmod>{lastmod}</lastmod>' if lastmod else '') +
+                   '<image:image><image:loc>http://cdn.example.com/x.jpg</image:loc></image:image></url>'
+                   for path, lastmod in entries)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS} xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">{urls}</urlset>'
+
+def build_site(site, base):
+    write(site, 'robots.txt', f"User-agent: *\nDisallow: /private/\nSitemap: {base}/sitemap_index.xml\n")
+    write(site, 'sitemap_index.xml', f'<sitemapindex {NS}><sitemap><loc>{base}/posts.xml.gz</loc></sitemap>'
+                                     f'<sitemap><loc>{base}/nested_index.xml</loc></sitemap></sitemapindex>')
+    write(site, 'nested_index.xml', f'<sitemapindex {NS}><sitemap><loc>{base}/pages.xml</loc></sitemap>'
+                                    f'<sitemap><loc>{base}/missing.xml</loc></sitemap></sitemapindex>')
+    write(site, 'posts.xml.gz', gzip.compress(url_set(base, [
+        ('/post/old', '2023-01-05'), ('/post/new', '2024-06-01T08:00:00+00:00'), ('/private/draft', '2024-07-01')
+    ]).encode('utf-8')))
+    write(site, 'pages.xml', url_set(base, [('/about', None), ('/post/mid', '2024-02'), ('/post/new', '2024-06-01')]))
+    write(site, 'about', '<html><body><a href="/post/new">New</a></body></html>')
+
+def test_parse_lastmod_formats():
+    assert parse_lastmod('2024-06-01T08:00:00Z') == parse_lastmod('2024-06-01T10:00:00+02:00')
+    assert parse_lastmod('2024-06') == parse_lastmod('2024-06-01')
+    assert parse_lastmod('soon') is None
+
+def test_discover_follows_gzipped_nested_sitemaps_newest_first():
+    with tempfile.TemporaryDirectory() as site:
+        server, base = serve_directory(site)
+        try:
+            build_site(site, base)
+            result = SiteDiscovery().discover(base + '/')
+
+            assert [entry['url'] for entry in result['urls']] == [
+                f'{base}/post/new', f'{base}/post/mid', f'{base}/post/old', f'{base}/about'
+            ]
+            assert result['total'] == 4 and f'{base}/pages.xml' in result['sitemaps']
+            assert [error['sitemap'] for error in result['errors']] == [f'{base}/missing.xml']
+
+            newest = SiteDiscovery().discover(base + '/', max_urls=2, since=parse_lastmod('2024-01-01'))
+            assert [entry['url'] for entry in newest['urls']] == [f'{base}/post/new', f'{base}/post/mid']
+        finally:
+            server.shutdown()
+
+def test_plain_text_sitemap_without_robots():
+    with tempfile.TemporaryDirectory() as site:
+        server, base = serve_directory(site)
+        try:
+            write(site, 'sitemap.xml', f"{base}/a\n{base}/b\nhttp://other.example.com/c\n")
+            result = SiteDiscovery().discover(base + '/')
+            assert [entry['url'] for entry in result['urls']] == [f'{base}/a', f'{base}/b']
+            assert result['errors'] == []  # absent default locations are not errors
+        finally:
+            server.shutdown()
+
+def test_discover_endpoint_scrapes_discovered_urls():
+    import app as app_module
+
+    with tempfile.TemporaryDirectory() as site:
+        server, base = serve_directory(site)
+        build_site(site, base)
+
+        class TestConfig(app_module.Config):
+            RESULTS_DB_PATH = os.path.join(site, 'results.db')
+            RATE_LIMIT_PER_HOST = 100.0
+
+        app = app_module.create_app(TestConfig)
+        try:
+            response = app.test_client().post('/discover', json={'url': base + '/', 'scrape_type': 'urls'})
+            body = response.get_json()
+        finally:
+            server.shutdown()
+            app_module.create_app()  # restore the default scheduler settings
+
+    assert [outcome['url'] for outcome in body['scraped']] == [entry['url'] for entry in body['urls']]
+    # Only /about exists on the test server; the missing posts fail individually
+    assert [('result_id' in outcome) for outcome in body['scraped']] == [False, False, False, True]
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the thumbnail service and /thumbnail endpoint
+"""
+
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import pytest
+from PIL import Image
+
+from testutils import serve_directory
+from utils.thumbnailer import ThumbnailService
+
+def test_thumbnail_is_downscaled_cached_and_evicted():
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as cache:
+        for name in ('a', 'b', 'c'):
+            Image.effect_noise((1200, 900), 64).convert('RGB').save(os.path.join(site, f'{name}.jpg'))
+        server, base = serve_directory(site)
+        try:
+            service = ThumbnailService(cache_folder=cache, max_cache_bytes=40 * 1024)
+            path, mimetype, etag = service.get_thumbnail(f'{base}/a.jpg', 300, 'webp')
+
+            assert mimetype == 'image/webp'
+            with Image.open(path) as thumb:
+                assert thumb.format == 'WEBP'
+                assert thumb.size == (320, 240)  # snapped to the nearest allowed size
+
+            # Same request is served from the cache without refetching
+            assert service.get_thumbnail(f'{base}/a.jpg', 320, 'webp') == (path, mimetype, etag)
+
+            service.get_thumbnail(f'{base}/b.jpg', 320, 'jpeg')
+            newest, _, _ = service.get_thumbnail(f'{base}/c.jpg', 320, 'jpeg')
+            total = sum(os.path.getsize(os.path.join(cache, f)) for f in os.listdir(cache))
+            assert total <= 40 * 1024
+            # The least recently used thumbnail went first; the one just made is kept
+            assert not os.path.exists(path) and os.path.exists(newest)
+        finally:
+            server.shutdown()
+
+def test_new_thumbnail_survives_eviction_and_waits_respect_the_deadline():
+    from utils.deadline import DeadlineExceeded, deadline_scope
+
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as cache:
+        Image.effect_noise((800, 600), 64).convert('RGB').save(os.path.join(site, 'big.jpg'))
+        server, base = serve_directory(site)
+        try:
+            # A budget smaller than one thumbnail must not delete the file being served
+            service = ThumbnailService(cache_folder=cache, max_cache_bytes=1)
+            path, _, _ = service.get_thumbnail(f'{base}/big.jpg', 640, 'jpeg')
+            assert os.path.exists(path)
+
+            service._generate = lambda *args: time.sleep(2)
+            started = time.monotonic()
+            with deadline_scope(0.2), pytest.raises(DeadlineExceeded):
+                service.get_thumbnail(f'{base}/big.jpg', 128, 'jpeg')
+            assert time.monotonic() - started < 1
+        finally:
+            server.shutdown()
+
+def test_thumbnail_endpoint_sets_cache_headers():
+    import app as scraper_app
+    from config import Config
+
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as cache:
+        Image.new('RGB', (800, 600), 'green').save(os.path.join(site, 'photo.png'))
+        server, base = serve_directory(site)
+
+        class TestConfig(Config):
+            THUMBNAIL_FOLDER = cache
+
+        try:
+            client = scraper_app.create_app(TestConfig).test_client()
+            response = client.get('/thumbnail', query_string={'url': f'{base}/photo.png', 'size': 128},
+                                  headers={'Accept': 'image/webp,*/*'})
+            assert response.status_code == 200
+            assert response.mimetype == 'image/webp'
+            assert 'public' in response.headers['Cache-Control']
+            assert Image.open(BytesIO(response.data)).size == (128, 96)
+
+            again = client.get('/thumbnail', query_string={'url': f'{base}/photo.png', 'size': 128},
+                               headers={'Accept': 'image/webp,*/*', 'If-None-Match': response.headers['ETag']})
+            assert again.status_code == 304
+        finally:
+            server.shutdown()
+
+if __name__ == "__main__":
+    test_thumbnail_is_downscaled_cached_and_evicted()
+    test_new_thumbnail_survives_eviction_and_waits_respect_the_deadline()
+    test_thumbnail_endpoint_sets_cache_headers()
+    print("✅ thumbnail tests passed")
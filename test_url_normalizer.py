@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for URL normalisation and media de-duplication
+"""
+
+import os
+import sys
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.url_normalizer import normalize_url, best_srcset_candidate, parse_srcset, MediaInventory
+
+class FakeResponse:
+    def __init__(self, html):
+        self.content = html.encode('utf-8')
+        self.status_code = 200
+        self.headers = {'Content-Type': 'text/html'}
+
+    def raise_for_status(self):
+        pass
+
+def test_normalize_url():
+    assert normalize_url('HTTPS://Example.COM:443/a.jpg?utm_source=x&b=2&a=1#top') == 'https://example.com/a.jpg?a=1&b=2'
+    assert normalize_url('http://example.com:8080') == 'http://example.com:8080/'
+    assert normalize_url('http://example.com/a.jpg?fbclid=1') == normalize_url('http://example.com/a.jpg')
+
+def test_best_srcset_candidate():
+    url, width = best_srcset_candidate('small.jpg 320w, large.jpg 1280w, medium.jpg 640w', 'http://x.com/p/')
+    assert (url, width) == ('http://x.com/p/large.jpg', 1280)
+    url, width = best_srcset_candidate('a.jpg, b.jpg 2x', 'http://x.com/')
+    assert (url, width) == ('http://x.com/b.jpg', None)
+
+def test_parse_srcset_keeps_commas_inside_urls():
+    srcset = ('https://res.cloudinary.com/demo/image/upload/w_400,h_300,c_fill/sample.jpg 400w,'
+              'https://res.cloudinary.com/demo/image/upload/w_800,h_600,c_fill/sample.jpg 800w')
+    assert parse_srcset(srcset) == [
+        ('https://res.cloudinary.com/demo/image/upload/w_400,h_300,c_fill/sample.jpg', 400.0, 'w'),
+        ('https://res.cloudinary.com/demo/image/upload/w_800,h_600,c_fill/sample.jpg', 800.0, 'w'),
+    ]
+    # Trailing commas end a candidate without descriptors; bad descriptors drop theirs
+    assert parse_srcset(' a.jpg,, b.jpg 2x ,c.jpg 1q, d.jpg') == [
+        ('a.jpg', 1.0, 'x'), ('b.jpg', 2.0, 'x'), ('d.jpg', 1.0, 'x')
+    ]
+
+def test_media_inventory_keeps_first():
+    inventory = MediaInventory()
+    assert inventory.add('http://x.com/a.jpg', {'n': 1})
+    assert not inventory.add('HTTP://X.COM/a.jpg?utm_medium=y', {'n': 2})
+    assert inventory.items() == [{'n': 1}]
+
+def test_image_scraper_dedupes_and_resolves_srcset():
+    from scraper.image_scraper import ImageScraper
+    html = """
+    <img src="/logo.png"><img src="/logo.png?utm_source=a">
+    <picture><source srcset="/hero-800.webp 800w, /hero-1600.webp 1600w" type="image/webp">
+      <img src="/hero.jpg" srcset="/hero-400.jpg 400w"></picture>
+    <div style="background-image: url('/logo.png')"></div>
+    <div style="background-image: url('/bg.jpg')"></div>
+    """
+    scraper = ImageScraper()
+    with mock.patch.object(scraper.fetcher, 'get', return_value=FakeResponse(html)):
+        images = scraper.scrape_images('http://x.com/')
+
+    assert [img['src'] for img in images] == [
+        'http://x.com/logo.png', 'http://x.com/hero-1600.webp', 'http://x.com/bg.jpg'
+    ]
+    assert images[1]['width'] == 1600
+
+def test_video_scraper_dedupes_sources():
+    from scraper.video_scraper import VideoScraper
+    html = """
+    <video src="/clip.mp4"><source src="/clip.mp4" type="video/mp4"><source src="/clip.webm" type="video/webm"></video>
+    <video><source src="/clip.mp4#t=5"></video>
+    """
+    scraper = VideoScraper()
+    with mock.patch.object(scraper.fetcher, 'get', return_value=FakeResponse(html)):
+        videos = scraper.scrape_videos('http://x.com/')
+
+    assert len(videos) == 1
+    assert [s['url'] for s in videos[0]['sources']] == ['http://x.com/clip.mp4', 'http://x.com/clip.webm']
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
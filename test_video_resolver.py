@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the yt-dlp video resolver, with yt-dlp itself stubbed out
+"""
+
+import os
+import sys
+import time
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.video_resolver import VideoResolver
+
+FAKE_INFO = {
+    'id': 'abc123',
+    'title': 'Demo',
+    'duration': 42,
+    'extractor_key': 'Youtube',
+    'formats': [
+        {'format_id': '18', 'ext': 'mp4', 'width': 640, 'height': 360, 'vcodec': 'avc1', 'acodec': 'mp4a',
+         'filesize': 1000, 'tbr': 500, 'protocol': 'https', 'url': 'https://cdn.example/18.mp4'},
+        {'format_id': 'sb0', 'ext': 'mhtml', 'protocol': 'mhtml', 'url': 'https://cdn.example/sb'},
+    ]
+}
+
+def test_resolve_summarizes_and_caches():
+    resolver = VideoResolver(max_workers=2)
+    with mock.patch.object(resolver, '_extract_info', return_value=FAKE_INFO) as extract:
+        first = resolver.resolve('https://www.youtube.com/embed/abc123')
+        second = resolver.resolve('https://www.youtube.com/embed/abc123')
+
+    assert extract.call_count == 1
+    assert first is second
+    assert first['formats'] == [{
+        'format_id': '18', 'ext': 'mp4', 'resolution': '640x360', 'width': 640, 'height': 360, 'fps': None,
+        'vcodec': 'avc1', 'acodec': 'mp4a', 'filesize': 1000, 'bitrate': 500, 'protocol': 'https',
+        'url': 'https://cdn.example/18.mp4'
+    }]
+
+def test_resolve_items_only_touches_platform_videos():
+    resolver = VideoResolver(max_workers=2)
+    videos = [{'src': 'https://player.vimeo.com/video/1'}, {'src': 'https://example.com/clip.mp4'}]
+    with mock.patch.object(resolver, '_extract_info', side_effect=Exception('private video')):
+        resolver.resolve_items(videos)
+
+    assert videos[0]['resolve_error'] == 'private video'
+    assert 'resolved' not in videos[1] and 'resolve_error' not in videos[1]
+
+def test_is_supported_matches_platform_hosts_only():
+    resolver = VideoResolver(max_workers=1)
+    assert resolver.is_supported('https://www.youtube.com/watch?v=abc123')
+    assert resolver.is_supported('https://youtu.be/abc123')
+    assert resolver.is_supported('https://player.vimeo.com/video/1')
+    assert resolver.is_supported('HTTPS://WWW.YOUTUBE.COM/embed/abc123')
+
+    assert not resolver.is_supported('https://notyoutube.com/watch?v=abc123')
+    assert not resolver.is_supported('https://example.com/youtube.com/clip.mp4')
+    assert not resolver.is_supported('https://example.com/clip.mp4?ref=vimeo.com')
+    assert not resolver.is_supported('not a url')
+
+class FakeYoutubeDL:
+    options = None
+
+    def __init__(self, options):
+        FakeYoutubeDL.options = options
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        # A long download reporting progress fragment by fragment
+        for _ in range(50):
+            time.sleep(0.02)
+            for hook in self.options['progress_hooks']:
+                hook({'status': 'downloading'})
+        return {'requested_downloads': [{'filepath': '/tmp/video.mp4'}]}
+
+def test_download_stops_at_the_request_deadline():
+    import pytest
+
+    from utils.deadline import DeadlineExceeded, deadline_scope
+
+    resolver = VideoResolver(max_workers=1, timeout=30)
+    with mock.patch('yt_dlp.YoutubeDL', FakeYoutubeDL):
+        assert resolver.download('https://www.youtube.com/watch?v=abc123') == '/tmp/video.mp4'
+        assert FakeYoutubeDL.options['socket_timeout'] == 30
+
+        started = time.monotonic()
+        with deadline_scope(0.2), pytest.raises(DeadlineExceeded):
+            resolver.download('https://www.youtube.com/watch?v=abc123')
+    assert time.monotonic() - started < 0.5
+    assert FakeYoutubeDL.options['socket_timeout'] <= 0.2
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
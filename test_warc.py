@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for WARC recording and offline replay of fetched responses
+"""
+
+import os
+import sys
+import tempfile
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from testutils import serve_directory
+from utils.fetcher import Fetcher
+from utils.warc import WarcArchive, WarcWriter, configure_warc, iter_records
+
+PAGE = ('<html><head><title>Archived café</title></head><body><article>'
+        + '<p>Captured once and replayed offline without touching the network again.</p>' * 5
+        + '<img src="/logo.png" alt="Logo"></article></body></html>')
+
+def build_site(site):
+    os.makedirs(os.path.join(site, 'docs'))
+    with open(os.path.join(site, 'page.html'), 'w', encoding='utf-8') as f:
+        f.write(PAGE)
+    with open(os.path.join(site, 'docs', 'index.html'), 'w') as f:
+        f.write('<html><body>Docs</body></html>')
+
+def test_record_rotate_and_replay_offline():
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as archive_dir:
+        build_site(site)
+        server, base = serve_directory(site)
+        try:
+            # max_bytes=1 starts a new file after every exchange
+            fetcher = Fetcher(recorder=WarcWriter(archive_dir, max_bytes=1))
+            live = fetcher.get(base + '/docs')  # redirected to /docs/
+            fetcher.get(base + '/page.html')
+            fetcher.head(base + '/page.html')
+        finally:
+            server.shutdown()
+
+        assert live.history and live.url.endswith('/docs/')
+        assert len(os.listdir(archive_dir)) == 4  # redirect, docs, page, HEAD page
+        first = sorted(os.listdir(archive_dir))[0]
+        types = [headers['warc-type'] for _, headers, _ in iter_records(os.path.join(archive_dir, first))]
+        assert types == ['warcinfo', 'response', 'request']
+
+        replay = Fetcher(archive=WarcArchive(archive_dir))
+        replayed = replay.get(base + '/docs')
+        assert [r.status_code for r in replayed.history] == [301] and replayed.url == live.url
+        assert replayed.text == live.text
+
+        page = replay.get(base + '/page.html')
+        assert page.content == PAGE.encode('utf-8') and page.headers['Content-Length'] == str(len(PAGE.encode('utf-8')))
+        assert replay.head(base + '/page.html').content == b''
+        try:
+            replay.get(base + '/never-fetched')
+            assert False, "uncaptured URLs must fail like an unreachable host"
+        except requests.ConnectionError:
+            pass
+
+def test_partially_written_file_reads_up_to_last_complete_record():
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as archive_dir:
+        build_site(site)
+        server, base = serve_directory(site)
+        try:
+            writer = WarcWriter(archive_dir)
+            fetcher = Fetcher(recorder=writer)
+            fetcher.get(base + '/page.html')
+            fetcher.get(base + '/docs/')
+            writer.close()
+        finally:
+            server.shutdown()
+
+        path = writer.current_path
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data[:-10])  # the final request record is cut short
+
+        archive = WarcArchive(archive_dir)
+        assert archive.urls() == [base + '/page.html', base + '/docs/']
+
+def test_scrapers_replay_recorded_pages():
+    from scraper.content_scraper import ContentScraper
+    from scraper.url_scraper import URLScraper
+
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as archive_dir:
+        build_site(site)
+        server, base = serve_directory(site)
+        try:
+            configure_warc(record_dir=archive_dir)
+            live_content = ContentScraper().scrape_content(base + '/page.html')
+            live_urls = URLScraper().scrape_urls(base + '/page.html')
+        finally:
+            server.shutdown()
+            configure_warc()
+
+        try:
+            configure_warc(replay=archive_dir)
+            assert ContentScraper().scrape_content(base + '/page.html') == live_content
+            assert URLScraper().scrape_urls(base + '/page.html') == live_urls
+        finally:
+            configure_warc()
+
+def test_streamed_stylesheets_and_probes_replay():
+    from PIL import Image
+
+    from scraper.image_scraper import ImageScraper
+    from utils.media_probe import MediaProbe
+
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as archive_dir:
+        with open(os.path.join(site, 'styled.html'), 'w') as f:
+            f.write('<html><head><link rel="stylesheet" href="/site.css"></head><body>'
+                    '<img src="/a.png"><div style="background: url(/inline.png)"></div></body></html>')
+        with open(os.path.join(site, 'site.css'), 'w') as f:
+            f.write('.hero { background-image: url(/fromcss.png); }')
+        Image.new('RGB', (40, 30), 'red').save(os.path.join(site, 'a.png'))
+        server, base = serve_directory(site)
+        try:
+            configure_warc(record_dir=archive_dir)
+            live = ImageScraper().scrape_images(base + '/styled.html')
+            live_probe = MediaProbe().probe(base + '/a.png')
+        finally:
+            server.shutdown()
+            configure_warc()
+
+        try:
+            configure_warc(replay=archive_dir)
+            replayed = ImageScraper().scrape_images(base + '/styled.html')
+            replayed_probe = MediaProbe().probe(base + '/a.png')
+        finally:
+            configure_warc()
+
+    assert [image['src'].rsplit('/', 1)[1] for image in live] == ['a.png', 'inline.png', 'fromcss.png']
+    assert [image['src'] for image in replayed] == [image['src'] for image in live]
+    assert live_probe['actual_width'] == 40
+    assert replayed_probe['actual_width'] == 40 and replayed_probe.get('probe_error') is None
+
+def test_large_streamed_bodies_pass_through_unarchived():
+    import tracemalloc
+
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as archive_dir:
+        body = os.urandom(4 * 1024 * 1024)
+        with open(os.path.join(site, 'video.mp4'), 'wb') as f:
+            f.write(body)
+        with open(os.path.join(site, 'site.css'), 'w') as f:
+            f.write('.hero { background: url(/hero.png) }')
+        server, base = serve_directory(site)
+        try:
+            writer = WarcWriter(archive_dir, max_record_bytes=64 * 1024)
+            fetcher = Fetcher(recorder=writer)
+            tracemalloc.start()
+            try:
+                response = fetcher.get(base + '/video.mp4', stream=True)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            downloaded = b''.join(response.iter_content(256 * 1024))
+            response.close()
+            stylesheet = fetcher.get(base + '/site.css', stream=True)
+            css = stylesheet.raw.read(1024, decode_content=True)
+            stylesheet.close()
+            writer.close()
+        finally:
+            server.shutdown()
+
+        # Only the record cap was buffered before the caller started reading
+        assert peak < 1024 * 1024
+        assert downloaded == body and css.startswith(b'.hero')
+        assert WarcArchive(archive_dir).urls() == [base + '/site.css']
+
+def test_configuring_archives_does_not_import_requests():
+    import subprocess
+
+    code = ("import sys; sys.path[:0] = ['.', 'src']; import app; app.create_app(); "
+            "print('requests' in sys.modules)")
+    result = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,38 @@
+"""
+Helpers shared by the test modules: a local HTTP server for fixture sites and
+resetting the process-wide scheduler and circuit breaker
+"""
+
+import functools
+import os
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.circuit_breaker import configure_default_breaker
+from utils.rate_limiter import configure_default_scheduler
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def serve_directory(directory):
+    """Serve directory over HTTP on a free port; returns (server, base_url)"""
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def write_site(directory, pages):
+    """Write pages HTML pages, page-0.html onwards, each linking to the next"""
+    for i in range(pages):
+        with open(os.path.join(directory, f'page-{i}.html'), 'w') as f:
+            f.write(f'<html><head><title>Page {i}</title></head><body><p>Text of page {i}.</p>'
+                    f'<a href="page-{i + 1}.html">next</a><img src="photo-{i}.jpg"></body></html>')
+
+def restore_defaults():
+    """Put back the default scheduler and circuit breaker after a test configured its own"""
+    configure_default_scheduler()
+    configure_default_breaker()